@@ -2,22 +2,55 @@
 from __future__ import annotations
 
 import logging
+import shutil
 import zoneinfo
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 
 from .const import (
     DOMAIN,
     CONF_USERNAME,
     CONF_PASSWORD,
     UPDATE_INTERVAL,
-    DATA_COORDINATOR,
+    COMMUNITY_UPDATE_INTERVAL,
+    STATISTICS_UPDATE_INTERVAL,
+    REVISION_SWEEP_INTERVAL,
+    DATA_COORDINATORS,
     DATA_CLIENT,
     DATA_PRICING,
+    DATA_LOAD_PROFILES,
+    DATA_NEW_DATA,
+    DATA_KPI,
+    DATA_ANOMALIES,
+    DATA_BACKFILL,
+    DATA_MONTH_TOTALS,
+    DATA_WATCHDOG,
+    DATA_ARCHIVE,
+    DATA_CIRCUIT_BREAKER,
+    DATA_SCHEDULER,
+    CIRCUIT_BREAKERS,
+    REQUEST_SCHEDULERS,
+    EVENT_ANOMALY,
+    CONF_ARCHIVE_QUARTER_HOUR,
+    CONF_ARCHIVE_HISTORY,
+    CONF_BASE_URL,
+    BASE_URL,
+    CONF_LOOP_BLOCK_THRESHOLD,
+    DEFAULT_LOOP_BLOCK_THRESHOLD,
+    CONF_BACKFILL_YEARS,
+    CONF_BACKFILL_CONCURRENCY,
+    CONF_BACKFILL_RATE,
+    DEFAULT_BACKFILL_YEARS,
+    DEFAULT_BACKFILL_CONCURRENCY,
+    DEFAULT_BACKFILL_RATE,
     CONF_PRICE_GRID_CONSUMPTION,
     CONF_PRICE_COMMUNITY_CONSUMPTION,
     CONF_PRICE_GRID_FEED_IN,
@@ -26,168 +59,88 @@ from .const import (
     DEFAULT_PRICE_COMMUNITY_CONSUMPTION,
     DEFAULT_PRICE_GRID_FEED_IN,
     DEFAULT_PRICE_COMMUNITY_FEED_IN,
+    STORAGE_VERSION,
 )
-from .api_client import FroniusEnergyClient
+from .anomaly import AnomalyManager
+from .api_client import (
+    CircuitBreaker,
+    FroniusEnergyClient,
+    PortalUnavailableError,
+    RequestScheduler,
+)
+from .archive import ArchiveManager
+from .attributes import community_attributes, counter_point_attributes
+from .backfill import BackfillJob, MonthTotalsStore
+from .coordinator import (
+    COORDINATOR_COMMUNITIES,
+    COORDINATOR_COUNTER_POINTS,
+    COORDINATOR_STATISTICS,
+    FroniusDataUpdateCoordinator,
+    phase_offset,
+)
+from .cost_statistics import async_write_cost_statistics, month_totals_from_segment
+from .energy_data import (
+    COMMUNITY_INFO_KEYS,
+    COUNTER_POINT_INFO_KEYS,
+    MonthSegment,
+    SegmentCache,
+    slim_info,
+)
+from .kpi import KpiManager
+from .load_profile import LoadProfileManager
+from .new_data import NewDataNotifier
+from .services import async_setup_services, async_unload_services
+from .watchdog import LoopWatchdog
+from .websocket_api import async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
 
-def _get_last_n_months(n: int, reference: datetime | None = None) -> list[str]:
-    """Return list of YYYY-MM strings for the last n months, oldest first."""
-    if reference is None:
-        reference = datetime.now()
-    months = []
-    dt = reference.replace(day=1)
-    for _ in range(n):
-        months.append(dt.strftime("%Y-%m"))
-        dt = (dt - timedelta(days=1)).replace(day=1)
-    return list(reversed(months))
+def _parse_segments(raw_items: list[tuple]) -> list[tuple]:
+    """Parse raw month responses into segments (runs in the executor).
 
-
-def _extract_float(val) -> float:
-    """Extract float from API value (dict with 'value' key, or direct string/number)."""
-    if isinstance(val, dict):
-        return float(val.get("value", 0) or 0)
-    try:
-        return float(val or 0)
-    except (ValueError, TypeError):
-        return 0.0
-
-
-async def _write_cp_monthly_cost_statistics(
-    hass: HomeAssistant,
-    client,
-    cp_id: int,
-    cp_number: str,
-    months: list[str],
-    pricing: dict,
-) -> None:
-    """Fetch monthly totals for each month and write cost statistics to HA recorder."""
-    # HA 2024+ has all three in recorder.statistics; older versions split across models
-    try:
-        from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
-            StatisticData,
-            StatisticMetaData,
-            async_add_external_statistics,
+    Returns (key, info, [MonthSegment, ...]) per community / counter point.
+    """
+    return [
+        (
+            key,
+            info,
+            [
+                MonthSegment.from_energy_data(month, energy, total_key=total_key, rc_key=rc_key)
+                for month, energy in months
+            ],
         )
-    except ImportError:
-        try:
-            from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
-                async_add_external_statistics,
-            )
-            from homeassistant.components.recorder.models import (  # noqa: PLC0415
-                StatisticData,
-                StatisticMetaData,
-            )
-        except ImportError:
-            _LOGGER.warning("Recorder statistics API not available — skipping historical stats")
-            return
-
-    tz = zoneinfo.ZoneInfo(hass.config.time_zone)
-    statistic_id = f"{DOMAIN}:counter_point_{cp_id}_monthly_cost"
-
-    metadata = StatisticMetaData(
-        has_mean=False,
-        has_sum=True,
-        name=f"Counter Point {cp_number} Monthly Cost",
-        source=DOMAIN,
-        statistic_id=statistic_id,
-        unit_of_measurement="€",
-    )
-
-    statistics = []
-    cumulative_sum = 0.0
-
-    for month_str in months:
-        try:
-            energy_data = await client.get_counter_point_energy_data(
-                cp_id, view="month", time=month_str
-            )
-        except Exception as err:  # noqa: BLE001
-            _LOGGER.debug("Could not fetch %s for statistics: %s", month_str, err)
+        for key, info, total_key, rc_key, months in raw_items
+    ]
+
+
+def _archive_quarter_hours(archive: ArchiveManager, new_days: list[tuple]) -> None:
+    """Archive newly buffered quarter-hour days (runs in the executor)."""
+    for cp_id, day, slots in new_days:
+        archive.store_quarter_hours(cp_id, day, slots)
+
+
+def _archive_and_prepare(
+    changed_series: list[tuple], pricing: dict, archive: ArchiveManager
+) -> dict[tuple, dict]:
+    """Archive changed series and build their sensor attributes (runs in the executor)."""
+    prepared = {}
+    for key, series in changed_series:
+        section, item_id = key
+        for segment in series.segments:
+            archive.store_segment(section, item_id, segment)
+        if section == "community":
+            prepared[key] = community_attributes(series)
             continue
-
-        total_data = energy_data.get("total", {}).get("total", {})
-        if not total_data:
-            _LOGGER.debug(
-                "No total data for counter point %s month %s — skipping", cp_id, month_str
-            )
-            continue
-
-        cgrid = _extract_float(total_data.get("cgrid"))
-        crec = _extract_float(total_data.get("crec"))
-        fgrid = _extract_float(total_data.get("fgrid"))
-        frec = _extract_float(total_data.get("frec"))
-
-        consumption_cost = (
-            cgrid * pricing["grid_consumption"] + crec * pricing["community_consumption"]
-        )
-        feed_in_revenue = (
-            fgrid * pricing["grid_feed_in"] + frec * pricing["community_feed_in"]
-        )
-        net_cost = consumption_cost - feed_in_revenue
-        cumulative_sum += net_cost
-
-        dt = datetime.strptime(month_str, "%Y-%m").replace(tzinfo=tz)
-        statistics.append(
-            StatisticData(start=dt, state=round(net_cost, 2), sum=round(cumulative_sum, 2))
-        )
-
-    if statistics:
-        async_add_external_statistics(hass, metadata, statistics)
-        _LOGGER.info(
-            "Wrote %d monthly cost statistics for counter point %s (id=%s)",
-            len(statistics),
-            cp_number,
-            cp_id,
-        )
-
-
-def _normalize_data(data) -> dict | list | None:
-    """Normalize data: treat empty list as None (no data available)."""
-    if isinstance(data, list) and len(data) == 0:
-        return None
-    return data
-
-
-def _merge_energy_data(current: dict, previous: dict) -> dict:
-    """Merge energy data from two months (current wins on overlap).
-
-    Keeps 'total' and 'meta' from the current month.
-    Merges 'data' so daily entries from both months are available.
-
-    The API returns 'data' as:
-    - dict {"RC12345": {"2026-02-01": {...}}} when data exists
-    - [] (empty list) when no data for that month yet
-    """
-    merged = dict(current)
-    current_data = _normalize_data(current.get("data"))
-    prev_data = _normalize_data(previous.get("data"))
-
-    if isinstance(current_data, dict) and isinstance(prev_data, dict):
-        # Both months have dict data — merge by rc_key, current overwrites on overlap
-        merged_data = {}
-        for rc_key in set(list(current_data.keys()) + list(prev_data.keys())):
-            curr_rc = current_data.get(rc_key, {})
-            prev_rc = prev_data.get(rc_key, {})
-            if isinstance(curr_rc, dict) and isinstance(prev_rc, dict):
-                merged_data[rc_key] = {**prev_rc, **curr_rc}
-            else:
-                merged_data[rc_key] = curr_rc if curr_rc else prev_rc
-        merged["data"] = merged_data
-    elif isinstance(current_data, dict):
-        # Only current has data
-        merged["data"] = current_data
-    elif isinstance(prev_data, dict):
-        # Current month has no data yet (empty list) — use previous month
-        merged["data"] = prev_data
-    elif isinstance(current_data, list) and isinstance(prev_data, list):
-        # Both are non-empty lists — concatenate (prev first)
-        merged["data"] = prev_data + current_data
-
-    return merged
+        history = None
+        daily_archive = archive.daily(section, item_id)
+        if daily_archive is not None and len(series):
+            latest = date.fromisoformat(series.dates[-1])
+            history = daily_archive.slice(date(latest.year - 1, 1, 1), latest)
+        prepared[key] = counter_point_attributes(series, pricing, history)
+    return prepared
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -219,147 +172,386 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         ),
     }
 
-    client = FroniusEnergyClient(username, password, hass)
+    # Portal or caching proxy; options (preferred) or data like the prices
+    base_url = entry.options.get(CONF_BASE_URL, entry.data.get(CONF_BASE_URL, BASE_URL))
+    # Entries on the same host share one breaker, so an outage seen by one
+    # stops the requests of all of them
+    host = urlsplit(base_url).netloc
+    breaker = hass.data.setdefault(CIRCUIT_BREAKERS, {}).setdefault(host, CircuitBreaker(host))
+    # Entries of the same account share one concurrency budget, queued by
+    # priority (service calls > polling > sweep > backfill) and fairly per entry
+    scheduler = hass.data.setdefault(REQUEST_SCHEDULERS, {}).setdefault(
+        (host, username.lower()), RequestScheduler()
+    )
+    client = FroniusEnergyClient(
+        username,
+        password,
+        base_url=base_url,
+        breaker=breaker,
+        scheduler=scheduler,
+        owner=entry.entry_id,
+    )
 
     # Test login
     try:
         await client.login()
+    except PortalUnavailableError as err:
+        await client.close()
+        raise ConfigEntryNotReady(str(err)) from err
     except Exception as err:
         _LOGGER.error("Failed to login: %s", err)
         return False
 
-    # Track whether historical statistics have been written (backfill once on startup)
-    stats_backfilled = False
-
-    async def async_update_data():
-        """Fetch data from API."""
-        nonlocal stats_backfilled
-        try:
-            now = datetime.now()
-            current_month = now.strftime("%Y-%m")
-            prev_month = (now.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
-
-            # Get communities
-            communities = await client.get_communities()
-
-            # Get community energy data for all communities (current + previous month)
-            community_data = {}
-            for community in communities:
-                community_id = community["id"]
-                energy_current = await client.get_community_energy_data(
-                    community_id, view="month", time=current_month
-                )
-                energy_prev = await client.get_community_energy_data(
-                    community_id, view="month", time=prev_month
-                )
-                energy_data = _merge_energy_data(energy_current, energy_prev)
-
-                # Log data structure for debugging
-                data_section = energy_data.get("data", {})
-                for rc_key, rc_val in (data_section.items() if isinstance(data_section, dict) else []):
-                    _LOGGER.debug(
-                        "Community %s rc_key=%s data type=%s entries=%s",
-                        community_id, rc_key, type(rc_val).__name__,
-                        len(rc_val) if rc_val else 0,
-                    )
-                    break
-
-                community_data[community_id] = {
-                    "info": community,
-                    "energy": energy_data,
-                }
-
-            # Get counter points
-            counter_points_raw = await client.get_counter_points()
-            _LOGGER.debug(
-                "Counter points raw response type=%s value=%s",
-                type(counter_points_raw).__name__,
-                str(counter_points_raw)[:500],
-            )
-            # Handle both list and dict ({"data": [...]}) response formats
-            if isinstance(counter_points_raw, dict):
-                counter_points = counter_points_raw.get("data", [])
-            elif isinstance(counter_points_raw, list):
-                counter_points = counter_points_raw
-            else:
-                counter_points = []
-
-            # Get counter point energy data (current + previous month)
-            counter_point_data = {}
-            for counter_point in counter_points:
-                cp_id = counter_point["id"]
-                energy_current = await client.get_counter_point_energy_data(
-                    cp_id, view="month", time=current_month
-                )
-                energy_prev = await client.get_counter_point_energy_data(
-                    cp_id, view="month", time=prev_month
-                )
-                energy_data = _merge_energy_data(energy_current, energy_prev)
-
-                data_section = energy_data.get("data")
-                _LOGGER.debug(
-                    "CounterPoint %s data type=%s entries=%s",
-                    cp_id,
-                    type(data_section).__name__,
-                    len(data_section) if data_section else 0,
-                )
+    # Running KPI sums, updated only with new or revised days
+    kpis = KpiManager()
 
-                counter_point_data[cp_id] = {
-                    "info": counter_point,
-                    "energy": energy_data,
-                }
-
-            # Write monthly cost statistics to recorder
-            # First run: backfill last 13 months
-            # Subsequent runs: update current + previous month (prev may still be settling
-            # due to ~2 day data delay from Fronius portal)
-            months_for_stats = (
-                _get_last_n_months(13, now) if not stats_backfilled else [prev_month, current_month]
+    # Online statistics per counter point, flagging outliers and flatlines
+    anomalies = AnomalyManager()
+
+    # Bus events for newly published / revised days
+    new_data = NewDataNotifier(hass, entry.entry_id, pricing)
+    await new_data.async_load()
+
+    # Quarter-hour load profiles (view=day), kept in bounded ring buffers
+    load_profiles = LoadProfileManager(
+        client,
+        zoneinfo.ZoneInfo(hass.config.time_zone),
+        Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.load_profiles"),
+    )
+    await load_profiles.async_load()
+
+    # Warns when a synchronous stage holds the event loop too long
+    watchdog = LoopWatchdog(
+        entry.options.get(CONF_LOOP_BLOCK_THRESHOLD, DEFAULT_LOOP_BLOCK_THRESHOLD)
+    )
+
+    # Append-only binary archive of daily (optionally quarter-hour) values
+    archive = ArchiveManager(
+        Path(hass.config.path(".storage", f"{DOMAIN}_archive", entry.entry_id)),
+        quarter_hour=entry.options.get(CONF_ARCHIVE_QUARTER_HOUR, False),
+    )
+
+    # Monthly totals per counter point, persisted; doubles as backfill checkpoints
+    month_totals = MonthTotalsStore(hass, entry.entry_id)
+    await month_totals.async_load()
+
+    async def async_fetch_communities(current_month: str, prev_month: str) -> list[tuple]:
+        """Collect raw month responses of all communities (current + previous month)."""
+        raw_items = []
+        for community in await client.get_communities():
+            community_id = community["id"]
+            energy_current = await client.get_community_energy_data(
+                community_id, view="month", time=current_month
+            )
+            energy_prev = await client.get_community_energy_data(
+                community_id, view="month", time=prev_month
+            )
+            rc_number = community.get("rc_number", "")
+            raw_items.append((
+                ("community", community_id),
+                slim_info(community, COMMUNITY_INFO_KEYS),
+                rc_number,
+                rc_number,
+                [(prev_month, energy_prev), (current_month, energy_current)],
+            ))
+        return raw_items
+
+    async def async_fetch_counter_points(current_month: str, prev_month: str) -> list[tuple]:
+        """Collect raw month responses of all counter points (current + previous month)."""
+        counter_points_raw = await client.get_counter_points()
+        _LOGGER.debug(
+            "Counter points raw response type=%s value=%s",
+            type(counter_points_raw).__name__,
+            str(counter_points_raw)[:500],
+        )
+        # Handle both list and dict ({"data": [...]}) response formats
+        if isinstance(counter_points_raw, dict):
+            counter_points = counter_points_raw.get("data", [])
+        elif isinstance(counter_points_raw, list):
+            counter_points = counter_points_raw
+        else:
+            counter_points = []
+
+        raw_items = []
+        for counter_point in counter_points:
+            cp_id = counter_point["id"]
+            energy_current = await client.get_counter_point_energy_data(
+                cp_id, view="month", time=current_month
             )
-            for counter_point in counter_points:
-                cp_id = counter_point["id"]
-                cp_number = counter_point_data[cp_id]["info"].get(
-                    "counter_number", str(cp_id)
+            energy_prev = await client.get_counter_point_energy_data(
+                cp_id, view="month", time=prev_month
+            )
+            raw_items.append((
+                ("counter_point", cp_id),
+                slim_info(counter_point, COUNTER_POINT_INFO_KEYS),
+                "total",
+                None,
+                [(prev_month, energy_prev), (current_month, energy_current)],
+            ))
+        return raw_items
+
+    async def async_counter_point_extras(counter_point_data: dict, now: datetime) -> None:
+        """Anomaly checks of the counter points."""
+        with watchdog.blocking("anomaly update"):
+            for anomaly in anomalies.update(counter_point_data):
+                _LOGGER.warning(
+                    "Counter point %s: %s in %s on %s",
+                    anomaly["counter_number"],
+                    anomaly["type"],
+                    anomaly["flow"],
+                    anomaly["date"],
                 )
+                hass.bus.async_fire(EVENT_ANOMALY, {"entry_id": entry.entry_id, **anomaly})
+
+    def make_update_method(section: str, fetch, extras=None):
+        """Return the update method of the coordinator of one data section."""
+        # Parsed month segments shared between refreshes while unchanged
+        segment_cache = SegmentCache()
+        # Sensor attributes prepared off the loop, reused while a series is unchanged
+        attribute_cache: dict[tuple, tuple] = {}
+
+        async def async_update_data():
+            """Fetch data from API."""
+            try:
+                # One fetch context per refresh: every (endpoint, view, time) is
+                # downloaded at most once within it
+                async with client.fetch_context():
+                    now = datetime.now()
+                    current_month = now.strftime("%Y-%m")
+                    prev_month = (now.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+                    # Raw responses are only collected here; parsing runs in the executor
+                    # (key, info, total_key, rc_key, [(month, response), ...])
+                    raw_items = await fetch(current_month, prev_month)
+
+                    # Keep only the parsed segments; the raw payloads are dropped here
+                    parsed = await hass.async_add_executor_job(_parse_segments, raw_items)
+                    del raw_items
+
+                    with watchdog.blocking("series views"):
+                        section_data = {}
+                        items_by_key = {}
+                        for key, info, segments in parsed:
+                            _LOGGER.debug(
+                                "%s %s days per month=%s",
+                                *key,
+                                {segment.month: len(segment.dates) for segment in segments},
+                            )
+                            section_data[key[1]] = items_by_key[key] = {
+                                "info": info,
+                                "energy": segment_cache.series(key, segments),
+                            }
+                        segment_cache.prune(set(items_by_key), {prev_month, current_month})
+
+                    with watchdog.blocking("kpi update"):
+                        kpis.update({section: section_data})
+
+                    with watchdog.blocking("new data events"):
+                        new_data.update(section, section_data)
+
+                    # Changed series are archived and their sensor attributes prepared
+                    # in the executor
+                    changed_series = [
+                        (key, item["energy"])
+                        for key, item in items_by_key.items()
+                        if key not in attribute_cache
+                        or attribute_cache[key][0] is not item["energy"]
+                    ]
+                    if changed_series:
+                        prepared = await hass.async_add_executor_job(
+                            _archive_and_prepare, changed_series, pricing, archive
+                        )
+                        for key, series in changed_series:
+                            attribute_cache[key] = (series, prepared[key])
+                    for key in [k for k in attribute_cache if k not in items_by_key]:
+                        del attribute_cache[key]
+                    for key, item in items_by_key.items():
+                        item["attributes"] = attribute_cache[key][1]
+
+                    if extras is not None:
+                        await extras(section_data, now)
+
+                    return {section: section_data}
+            except PortalUnavailableError:
+                # Logged once per outage by the coordinator
+                raise
+            except Exception as err:
+                _LOGGER.error("Error fetching %s data: %s", section, err)
+                raise
+
+        return async_update_data
+
+    def make_coordinator(resource: str, update_method, interval: int):
+        return FroniusDataUpdateCoordinator(
+            hass,
+            _LOGGER,
+            watchdog,
+            resource=resource,
+            update_method=update_method,
+            update_interval=timedelta(seconds=interval),
+            phase=phase_offset(entry.entry_id, resource, timedelta(seconds=interval)),
+        )
+
+    community_coordinator = make_coordinator(
+        COORDINATOR_COMMUNITIES,
+        make_update_method(COORDINATOR_COMMUNITIES, async_fetch_communities),
+        COMMUNITY_UPDATE_INTERVAL,
+    )
+    counter_point_coordinator = make_coordinator(
+        COORDINATOR_COUNTER_POINTS,
+        make_update_method(
+            COORDINATOR_COUNTER_POINTS, async_fetch_counter_points, async_counter_point_extras
+        ),
+        UPDATE_INTERVAL,
+    )
+
+    async def async_update_statistics() -> dict:
+        """Write monthly cost statistics for months whose totals changed.
+
+        Covers the months in the counter point data (current + previous; prev
+        may still be settling due to ~2 day data delay from Fronius portal).
+        Older months are filled by the background backfill job.
+        """
+        written = {}
+        counter_point_data = (counter_point_coordinator.data or {}).get("counter_points", {})
+        with watchdog.blocking("statistics"):
+            for cp_id, cp_item in counter_point_data.items():
+                changed = [
+                    segment.month
+                    for segment in cp_item["energy"].segments
+                    if month_totals.set(
+                        cp_id,
+                        segment.month,
+                        month_totals_from_segment(segment),
+                        segment.fingerprint,
+                    )
+                ]
+                if not changed:
+                    continue
                 try:
-                    await _write_cp_monthly_cost_statistics(
-                        hass, client, cp_id, cp_number, months_for_stats, pricing
+                    async_write_cost_statistics(
+                        hass,
+                        cp_id,
+                        cp_item["info"].get("counter_number", str(cp_id)),
+                        month_totals.months(cp_id),
+                        pricing,
+                        from_month=min(changed),
                     )
+                    written[cp_id] = sorted(changed)
                 except Exception as stats_err:  # noqa: BLE001
                     _LOGGER.error(
                         "Failed to write statistics for counter point %s: %s",
                         cp_id,
                         stats_err,
                     )
-            stats_backfilled = True
+        return written
 
-            return {
-                "communities": community_data,
-                "counter_points": counter_point_data,
-            }
-        except Exception as err:
-            _LOGGER.error("Error fetching data: %s", err)
-            raise
+    statistics_coordinator = make_coordinator(
+        COORDINATOR_STATISTICS, async_update_statistics, STATISTICS_UPDATE_INTERVAL
+    )
+
+    coordinators = {
+        COORDINATOR_COMMUNITIES: community_coordinator,
+        COORDINATOR_COUNTER_POINTS: counter_point_coordinator,
+        COORDINATOR_STATISTICS: statistics_coordinator,
+    }
 
-    coordinator = DataUpdateCoordinator(
+    # Fetch initial data (statistics need the counter point data)
+    await community_coordinator.async_config_entry_first_refresh()
+    await counter_point_coordinator.async_config_entry_first_refresh()
+    await statistics_coordinator.async_config_entry_first_refresh()
+
+    # Historical statistics are backfilled in the background, resuming from checkpoints
+    backfill = BackfillJob(
         hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=UPDATE_INTERVAL),
+        entry.entry_id,
+        client,
+        month_totals,
+        pricing,
+        archive=archive,
+        archive_history=entry.options.get(CONF_ARCHIVE_HISTORY, False),
+        years=entry.options.get(CONF_BACKFILL_YEARS, DEFAULT_BACKFILL_YEARS),
+        concurrency=entry.options.get(CONF_BACKFILL_CONCURRENCY, DEFAULT_BACKFILL_CONCURRENCY),
+        rate=entry.options.get(CONF_BACKFILL_RATE, DEFAULT_BACKFILL_RATE),
     )
 
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
-
     hass.data[DOMAIN][entry.entry_id] = {
-        DATA_COORDINATOR: coordinator,
+        DATA_COORDINATORS: coordinators,
         DATA_CLIENT: client,
         DATA_PRICING: pricing,
+        DATA_LOAD_PROFILES: load_profiles,
+        DATA_NEW_DATA: new_data,
+        DATA_KPI: kpis,
+        DATA_ANOMALIES: anomalies,
+        DATA_MONTH_TOTALS: month_totals,
+        DATA_BACKFILL: backfill,
+        DATA_WATCHDOG: watchdog,
+        DATA_ARCHIVE: archive,
+        DATA_CIRCUIT_BREAKER: breaker,
+        DATA_SCHEDULER: scheduler,
     }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+
+    # Statistics have no entities; a listener keeps their coordinator scheduled
+    @callback
+    def _async_statistics_written() -> None:
+        if statistics_coordinator.data:
+            _LOGGER.debug("Statistics written for %s", statistics_coordinator.data)
+
+    entry.async_on_unload(statistics_coordinator.async_add_listener(_async_statistics_written))
+
+    # Counter points discovered on later refreshes are backfilled as well
+    @callback
+    def _async_start_backfill() -> None:
+        backfill.async_start(
+            {
+                cp_id: cp_item["info"].get("counter_number", str(cp_id))
+                for cp_id, cp_item in (counter_point_coordinator.data or {})
+                .get("counter_points", {})
+                .items()
+            }
+        )
+
+    _async_start_backfill()
+    entry.async_on_unload(counter_point_coordinator.async_add_listener(_async_start_backfill))
+
+    async def _async_load_profiles_stored(new_days: list[tuple]) -> None:
+        """Archive new quarter-hour days and let the peak sensors pick them up."""
+        if archive.quarter_hour:
+            await hass.async_add_executor_job(_archive_quarter_hours, archive, new_days)
+        counter_point_coordinator.async_update_listeners()
+
+    # Quarter-hour load profiles are fetched in the background after each refresh
+    @callback
+    def _async_start_load_profiles() -> None:
+        if not counter_point_coordinator.last_update_success:
+            return
+        load_profiles.async_start(
+            hass,
+            list((counter_point_coordinator.data or {}).get("counter_points", {})),
+            _async_load_profiles_stored,
+        )
+
+    _async_start_load_profiles()
+    entry.async_on_unload(
+        counter_point_coordinator.async_add_listener(_async_start_load_profiles)
+    )
+
+    # Low-priority rotation over stored months to pick up portal revisions
+    @callback
+    def _async_sweep_step(_now: datetime) -> None:
+        backfill.async_start_sweep()
+
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, _async_sweep_step, timedelta(seconds=REVISION_SWEEP_INTERVAL)
+        )
+    )
+
     # Register update listener for options changes
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
@@ -374,10 +566,24 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        # Close the API client session
+        # Stop the background jobs (checkpoints and buffers are flushed) and close
+        # the API client session
+        await hass.data[DOMAIN][entry.entry_id][DATA_BACKFILL].async_stop()
+        await hass.data[DOMAIN][entry.entry_id][DATA_LOAD_PROFILES].async_stop()
+        await hass.data[DOMAIN][entry.entry_id][DATA_NEW_DATA].async_save()
         client = hass.data[DOMAIN][entry.entry_id][DATA_CLIENT]
         await client.close()
 
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_unload_services(hass)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the binary archive of a removed config entry."""
+    await hass.async_add_executor_job(
+        shutil.rmtree,
+        hass.config.path(".storage", f"{DOMAIN}_archive", entry.entry_id),
+        True,
+    )
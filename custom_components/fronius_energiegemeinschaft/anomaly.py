@@ -0,0 +1,200 @@
+"""Streaming anomaly detection on the daily series of counter points.
+
+Every counter point keeps an exponentially weighted mean and variance per
+flow and weekday, plus the run length of identical values per flow. Each
+new day is scored against its weekday statistics and then folded in, so a
+refresh costs a constant amount of work per new day and history is never
+rescanned. Revisions of days that were already scored are not re-scored.
+
+- Outlier: a flow deviates more than ANOMALY_Z_THRESHOLD standard
+  deviations from its weekday mean (once ANOMALY_MIN_SAMPLES days of that
+  weekday were seen).
+- Flatline: a flow that normally carries energy reports the identical value
+  on ANOMALY_FLATLINE_DAYS consecutive days (stuck meter or inverter).
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from datetime import date
+
+from .const import (
+    ANOMALY_FLATLINE_DAYS,
+    ANOMALY_FLATLINE_LEVEL,
+    ANOMALY_MIN_SAMPLES,
+    ANOMALY_MIN_STD,
+    ANOMALY_SPAN,
+    ANOMALY_Z_THRESHOLD,
+)
+from .energy_data import FLOWS, EnergySeries
+
+ANOMALY_OUTLIER = "outlier"
+ANOMALY_FLATLINE = "flatline"
+
+# Weight of a new sample once warmed up (span in samples of the same weekday)
+_ALPHA = 2 / (ANOMALY_SPAN + 1)
+
+
+class _FlowStats:
+    """EWMA mean/variance per weekday and the current run of identical values."""
+
+    __slots__ = ("mean", "var", "count", "last", "run", "run_start")
+
+    def __init__(self) -> None:
+        self.mean = [0.0] * 7
+        self.var = [0.0] * 7
+        self.count = [0] * 7
+        self.last: float | None = None
+        self.run = 0
+        self.run_start: date | None = None
+
+    def level(self) -> float:
+        """Return the typical daily value over the weekdays seen so far."""
+        seen = [mean for mean, count in zip(self.mean, self.count) if count]
+        return sum(seen) / len(seen) if seen else 0.0
+
+    def score(self, weekday: int, value: float) -> tuple[float, float] | None:
+        """Return (expected, z-score) of a value, None while warming up."""
+        if self.count[weekday] < ANOMALY_MIN_SAMPLES:
+            return None
+        mean = self.mean[weekday]
+        std = max(math.sqrt(self.var[weekday]), ANOMALY_MIN_STD)
+        return mean, (value - mean) / std
+
+    def add(self, weekday: int, value: float) -> None:
+        """Fold a value into the weekday statistics (plain average while warming up)."""
+        self.count[weekday] += 1
+        alpha = max(_ALPHA, 1 / self.count[weekday])
+        diff = value - self.mean[weekday]
+        increment = alpha * diff
+        self.mean[weekday] += increment
+        self.var[weekday] = (1 - alpha) * (self.var[weekday] + diff * increment)
+
+
+class AnomalyTracker:
+    """Online statistics and current anomalies of one counter point."""
+
+    __slots__ = ("_flows", "_series", "last_day", "outliers", "flatlines")
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self._flows = {flow: _FlowStats() for flow in FLOWS}
+        self._series: EnergySeries | None = None
+        self.last_day: date | None = None
+        # Outliers of the last scored day and flatlines still running
+        self.outliers: list[dict] = []
+        self.flatlines: dict[str, dict] = {}
+
+    @property
+    def warming_up(self) -> bool:
+        """Return True until every weekday of the reported flows has enough samples."""
+        reported = [stats for stats in self._flows.values() if any(stats.count)]
+        return not reported or any(
+            count < ANOMALY_MIN_SAMPLES for stats in reported for count in stats.count
+        )
+
+    def update(self, series: EnergySeries) -> list[dict]:
+        """Score and fold in days newer than the last scored day.
+
+        Returns the anomalies found (one dict per outlier or starting flatline).
+        Scoring stops at the first day without any value, so a day the portal
+        has not delivered yet is scored once it arrives.
+        """
+        if series is self._series:
+            return []
+        self._series = series
+
+        found: list[dict] = []
+        dates = series.dates
+        first = 0 if self.last_day is None else bisect_right(dates, self.last_day.isoformat())
+        for index in range(first, len(dates)):
+            day = date.fromisoformat(dates[index])
+            values = {flow: series.raw_value(flow, index) for flow in FLOWS}
+            if all(math.isnan(value) for value in values.values()):
+                break
+            found.extend(self._score_day(day, values))
+            self.last_day = day
+        return found
+
+    def _score_day(self, day: date, values: dict[str, float]) -> list[dict]:
+        """Score one day against the statistics, then fold it in."""
+        weekday = day.weekday()
+        found = []
+        outliers = []
+        for flow, value in values.items():
+            if math.isnan(value):
+                continue
+            stats = self._flows[flow]
+
+            scored = stats.score(weekday, value)
+            if scored is not None and abs(scored[1]) > ANOMALY_Z_THRESHOLD:
+                outliers.append({
+                    "type": ANOMALY_OUTLIER,
+                    "date": day.isoformat(),
+                    "flow": flow,
+                    "value": round(value, 3),
+                    "expected": round(scored[0], 3),
+                    "z_score": round(scored[1], 1),
+                })
+
+            if stats.last is not None and abs(value - stats.last) < 1e-9:
+                stats.run += 1
+            else:
+                stats.run, stats.run_start = 1, day
+                self.flatlines.pop(flow, None)
+            stats.last = value
+            if (
+                stats.run >= ANOMALY_FLATLINE_DAYS
+                and flow not in self.flatlines
+                and stats.level() > ANOMALY_FLATLINE_LEVEL
+            ):
+                self.flatlines[flow] = {
+                    "type": ANOMALY_FLATLINE,
+                    "date": day.isoformat(),
+                    "flow": flow,
+                    "value": round(value, 3),
+                    "since": stats.run_start.isoformat(),
+                }
+                found.append(self.flatlines[flow])
+            elif flow in self.flatlines:
+                self.flatlines[flow]["date"] = day.isoformat()
+
+            stats.add(weekday, value)
+
+        self.outliers = outliers
+        found.extend(outliers)
+        return found
+
+
+class AnomalyManager:
+    """Anomaly trackers for all counter points of an entry."""
+
+    def __init__(self) -> None:
+        """Initialize the manager."""
+        self.trackers: dict = {}
+
+    def update(self, counter_points: dict) -> list[dict]:
+        """Update trackers from coordinator data and drop vanished counter points.
+
+        Returns the new anomalies, each with counter_point_id and
+        counter_number. A tracker's first update replays the months in the
+        coordinator data; only anomalies of its newest day are returned then.
+        """
+        found = []
+        for cp_id, item in counter_points.items():
+            tracker = self.trackers.get(cp_id)
+            first = tracker is None
+            if first:
+                tracker = self.trackers[cp_id] = AnomalyTracker()
+            anomalies = tracker.update(item["energy"])
+            if first and tracker.last_day is not None:
+                latest = tracker.last_day.isoformat()
+                anomalies = [anomaly for anomaly in anomalies if anomaly["date"] == latest]
+            counter_number = item["info"].get("counter_number", str(cp_id))
+            found.extend(
+                {"counter_point_id": cp_id, "counter_number": counter_number, **anomaly}
+                for anomaly in anomalies
+            )
+        for cp_id in [key for key in self.trackers if key not in counter_points]:
+            del self.trackers[cp_id]
+        return found
@@ -1,13 +1,22 @@
-"""API client for Fronius Energiegemeinschaft."""
+"""API client for Fronius Energiegemeinschaft.
+
+Independent of Home Assistant (aiohttp only), so the caching proxy and the
+command-line tool use it as well.
+"""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Any
-from urllib.parse import unquote
+from typing import Any, NamedTuple
+from urllib.parse import unquote, urlsplit
 
 import aiohttp
-from homeassistant.core import HomeAssistant
 
 from .const import (
     BASE_URL,
@@ -17,22 +26,417 @@ from .const import (
     API_COMMUNITY_ENERGY,
     API_COUNTER_POINT,
     API_COUNTER_POINT_ENERGY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_RESET_TIMEOUT,
+    CIRCUIT_RESET_TIMEOUT,
+    SCHEDULER_CONCURRENCY,
+    SCHEDULER_FOREGROUND_RESERVE,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Responses memoized for the current fetch context (one refresh cycle),
+# keyed by client and then by (endpoint, params)
+_FETCH_MEMO: ContextVar[dict[int, dict[tuple, Any]] | None] = ContextVar(
+    "fronius_fetch_memo", default=None
+)
+
+# Scheduling class of the requests made in the current context, see RequestScheduler
+PRIORITY_INTERACTIVE = 0  # A user waits for the result (service calls)
+PRIORITY_POLLING = 1  # Coordinator refreshes
+PRIORITY_SWEEP = 2  # Revision sweep
+PRIORITY_BACKFILL = 3  # Statistics backfill
+PRIORITY_NAMES = ("interactive", "polling", "sweep", "backfill")
+_REQUEST_PRIORITY: ContextVar[int] = ContextVar(
+    "fronius_request_priority", default=PRIORITY_POLLING
+)
+
+VIEW_DAY = "day"
+VIEW_MONTH = "month"
+VIEW_YEAR = "year"
+
+# Resolution of the entries each energy_data view returns
+VIEW_RESOLUTION = {
+    VIEW_DAY: "quarter_hour",
+    VIEW_MONTH: "day",
+    VIEW_YEAR: "month",
+}
+
+
+class ViewRequest(NamedTuple):
+    """One energy_data request of a history plan."""
+
+    view: str
+    time: str
+    months: tuple[str, ...]
+
+
+def plan_history_requests(
+    months: list[str], resolution: str, views: set[str] | frozenset[str]
+) -> list[ViewRequest]:
+    """Return the fewest requests that cover the months at the given resolution.
+
+    months are YYYY-MM strings. For "month" resolution a year view replaces
+    the month views of a year as soon as it saves a request, i.e. when two or
+    more months of that year are needed; a single month keeps its month view,
+    whose totals block is authoritative. "day" resolution needs month views.
+    """
+    if resolution == "day" or (resolution == "month" and VIEW_YEAR not in views):
+        return [ViewRequest(VIEW_MONTH, month, (month,)) for month in sorted(set(months))]
+    if resolution != "month":
+        raise ValueError(f"Unsupported resolution for history plans: {resolution}")
+
+    by_year: dict[str, list[str]] = {}
+    for month in sorted(set(months)):
+        by_year.setdefault(month[:4], []).append(month)
+
+    plan = []
+    for year, year_months in by_year.items():
+        if len(year_months) > 1:
+            plan.append(ViewRequest(VIEW_YEAR, year, tuple(year_months)))
+        else:
+            plan.append(ViewRequest(VIEW_MONTH, year_months[0], (year_months[0],)))
+    return plan
+
+
+class RateLimiter:
+    """Space request starts at least 1/rate seconds apart (no limit for rate <= 0)."""
+
+    def __init__(self, rate: float) -> None:
+        """Initialize the limiter."""
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._next_request = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """Wait until the next request may start."""
+        if not self._interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            wait = self._next_request - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_request = max(now, self._next_request) + self._interval
+
+
+class PortalUnavailableError(Exception):
+    """The portal did not answer (connection error, timeout, 502-504) or its circuit is open."""
+
+
+class PortalRequestError(Exception):
+    """The portal answered a request with an error status other than an outage."""
+
+    def __init__(self, message: str, status: int) -> None:
+        """Initialize the error."""
+        super().__init__(message)
+        self.status = status
+
+
+# Gateway answers of a portal that is down; a plain 500 may be a rejected
+# request (e.g. an unsupported view) and does not count
+OUTAGE_STATUSES = frozenset({502, 503, 504})
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop requests to a portal host after consecutive failures.
+
+    Closed, requests pass; `threshold` failures in a row open the circuit.
+    While open, requests fail immediately with PortalUnavailableError. Once
+    the reset timeout has passed, the next request is let through as the
+    only probe (half-open): success closes the circuit, failure opens it
+    again with twice the timeout, up to `max_reset_timeout`. Any answer
+    other than OUTAGE_STATUSES counts as success, the portal is reachable.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        max_reset_timeout: float = CIRCUIT_MAX_RESET_TIMEOUT,
+    ) -> None:
+        """Initialize the breaker."""
+        self.host = host
+        self._threshold = threshold
+        self._base_timeout = reset_timeout
+        self._max_timeout = max_reset_timeout
+        self._timeout = reset_timeout
+        self._opened_at: float | None = None
+        self._probing = False
+        self.failures = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        """Return closed, open or half_open."""
+        if self._opened_at is None:
+            return CIRCUIT_CLOSED
+        if self._probing or time.monotonic() - self._opened_at >= self._timeout:
+            return CIRCUIT_HALF_OPEN
+        return CIRCUIT_OPEN
+
+    def acquire(self) -> bool:
+        """Admit a request; return True if it is the probe of a half-open circuit.
+
+        Raises PortalUnavailableError while the circuit is open or another
+        request is probing.
+        """
+        if self._opened_at is None:
+            return False
+        if self._probing or time.monotonic() - self._opened_at < self._timeout:
+            raise PortalUnavailableError(f"Portal {self.host} unavailable (circuit open)")
+        self._probing = True
+        return True
+
+    def release(self) -> None:
+        """End a probe that finished without a result (e.g. cancelled)."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        if self._opened_at is not None:
+            _LOGGER.info("Portal %s reachable again, resuming requests", self.host)
+        self._opened_at = None
+        self._probing = False
+        self._timeout = self._base_timeout
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failed request; open the circuit at the threshold or on a failed probe."""
+        self.failures += 1
+        if self._probing:
+            self._probing = False
+            self._timeout = min(self._timeout * 2, self._max_timeout)
+            self._opened_at = time.monotonic()
+            _LOGGER.debug(
+                "Probe of portal %s failed, next probe in %d s", self.host, self._timeout
+            )
+        elif self._opened_at is None and self.failures >= self._threshold:
+            self._opened_at = time.monotonic()
+            self.trips += 1
+            _LOGGER.warning(
+                "Portal %s failed %d times in a row, pausing requests for %d s",
+                self.host,
+                self.failures,
+                self._timeout,
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state for diagnostics."""
+        return {
+            "host": self.host,
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "reset_timeout_s": self._timeout,
+        }
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Schedule the requests of the context (and of tasks created in it) with priority."""
+    token = _REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _REQUEST_PRIORITY.reset(token)
+
+
+class SchedulerTicket:
+    """Priority of one scheduled request; it can be raised while the request waits."""
+
+    __slots__ = ("priority", "waiter", "running")
+
+    def __init__(self, priority: int) -> None:
+        """Initialize the ticket."""
+        self.priority = priority
+        self.waiter: asyncio.Future | None = None
+        self.running = False
+
+
+class RequestScheduler:
+    """Concurrency budget of one portal account, handed out by priority.
+
+    At most `concurrency` requests run at once. Waiting requests are started
+    strictly by priority class (PRIORITY_*, taken from the context), and
+    within a class round-robin over owners (config entries), so one entry's
+    large job does not starve another entry. Sweep and backfill requests
+    together never hold the last `foreground_reserve` slots, so interactive
+    and polling requests do not wait for a long background request.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        foreground_reserve: int = SCHEDULER_FOREGROUND_RESERVE,
+    ) -> None:
+        """Initialize the scheduler."""
+        self._limit = max(1, concurrency)
+        self._background_limit = max(1, self._limit - foreground_reserve)
+        self._active = 0
+        self._background = 0
+        # Per priority: owner -> waiting futures; owners rotate round-robin
+        self._queues: list[OrderedDict[str, deque[SchedulerTicket]]] = [
+            OrderedDict() for _ in PRIORITY_NAMES
+        ]
+        self._stats = [
+            {"requests": 0, "queued": 0, "wait_s": 0.0, "max_wait_s": 0.0}
+            for _ in PRIORITY_NAMES
+        ]
+
+    def _can_start(self, priority: int) -> bool:
+        if self._active >= self._limit:
+            return False
+        return priority < PRIORITY_SWEEP or self._background < self._background_limit
+
+    def _start(self, priority: int) -> None:
+        self._active += 1
+        if priority >= PRIORITY_SWEEP:
+            self._background += 1
+
+    def _finish(self, priority: int) -> None:
+        self._active -= 1
+        if priority >= PRIORITY_SWEEP:
+            self._background -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start waiting requests while the budget allows, highest priority first."""
+        for priority, owners in enumerate(self._queues):
+            while owners and self._can_start(priority):
+                owner, waiters = next(iter(owners.items()))
+                ticket = waiters.popleft()
+                if waiters:
+                    owners.move_to_end(owner)
+                else:
+                    del owners[owner]
+                if ticket.waiter is not None and not ticket.waiter.done():
+                    self._start(priority)
+                    ticket.waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(
+        self, owner: str, ticket: SchedulerTicket | None = None
+    ) -> AsyncIterator[None]:
+        """Hold one slot of the budget for a request of owner.
+
+        The priority comes from the ticket, or from the context without one.
+        """
+        if ticket is None:
+            ticket = SchedulerTicket(_REQUEST_PRIORITY.get())
+        self._stats[ticket.priority]["requests"] += 1
+        if self._can_start(ticket.priority) and not any(self._queues[: ticket.priority + 1]):
+            self._start(ticket.priority)
+        else:
+            loop = asyncio.get_running_loop()
+            waiter = ticket.waiter = loop.create_future()
+            self._queues[ticket.priority].setdefault(owner, deque()).append(ticket)
+            queued_at = loop.time()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Cancelled after the slot was handed over
+                    self._finish(ticket.priority)
+                else:
+                    self._discard(ticket, owner)
+                raise
+            finally:
+                ticket.waiter = None
+            # Counted in the class the request finally waited in
+            stats = self._stats[ticket.priority]
+            wait = loop.time() - queued_at
+            stats["queued"] += 1
+            stats["wait_s"] += wait
+            stats["max_wait_s"] = max(stats["max_wait_s"], wait)
+        ticket.running = True
+        try:
+            yield
+        finally:
+            self._finish(ticket.priority)
+
+    def promote(self, ticket: SchedulerTicket, owner: str, priority: int) -> None:
+        """Move a request to a more urgent class (no-op once it runs)."""
+        if priority >= ticket.priority or ticket.running:
+            return
+        if ticket.waiter is None:
+            # Not asked for a slot yet
+            ticket.priority = priority
+            return
+        if ticket.waiter.done():
+            return
+        self._discard(ticket, owner)
+        ticket.priority = priority
+        self._queues[priority].setdefault(owner, deque()).append(ticket)
+        self._dispatch()
+
+    def _discard(self, ticket: SchedulerTicket, owner: str) -> None:
+        waiters = self._queues[ticket.priority].get(owner)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(ticket)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._queues[ticket.priority][owner]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return budget, running and waiting requests and wait times per priority."""
+        return {
+            "concurrency": self._limit,
+            "background_concurrency": self._background_limit,
+            "active": self._active,
+            "priorities": {
+                name: {
+                    **{key: round(value, 3) for key, value in self._stats[priority].items()},
+                    "waiting": sum(len(waiters) for waiters in self._queues[priority].values()),
+                }
+                for priority, name in enumerate(PRIORITY_NAMES)
+            },
+        }
+
 
 class FroniusEnergyClient:
     """Client to interact with Fronius Energiegemeinschaft API."""
 
-    def __init__(self, username: str, password: str, hass: HomeAssistant) -> None:
-        """Initialize the client."""
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        base_url: str = BASE_URL,
+        breaker: CircuitBreaker | None = None,
+        scheduler: RequestScheduler | None = None,
+        owner: str = "",
+    ) -> None:
+        """Initialize the client.
+
+        base_url is the portal or a caching proxy serving the same endpoints.
+        Clients of the same host may share a breaker; without one, the client
+        gets its own. Clients of one account may share a scheduler, requests
+        are queued fairly across their owners; without one, requests are not
+        scheduled.
+        """
         self.username = username
         self.password = password
-        self.hass = hass
+        self.base_url = base_url.rstrip("/")
+        self.breaker = breaker or CircuitBreaker(urlsplit(self.base_url).netloc)
+        self.scheduler = scheduler
+        self._owner = owner
         self.session: aiohttp.ClientSession | None = None
         self.cookies: dict[str, str] = {}
         self.csrf_token: str | None = None
+        # Identical GET requests currently in flight (single-flight)
+        self._in_flight: dict[tuple, tuple[asyncio.Task, SchedulerTicket]] = {}
+        # Aggregation levels the energy_data endpoints are assumed to accept
+        # until the portal proves otherwise
+        self.views: set[str] = {VIEW_DAY, VIEW_MONTH, VIEW_YEAR}
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
@@ -40,12 +444,39 @@ class FroniusEnergyClient:
             self.session = aiohttp.ClientSession()
         return self.session
 
+    @asynccontextmanager
+    async def _guarded(self) -> AsyncIterator[None]:
+        """Pass one HTTP request through the circuit breaker.
+
+        Connection errors and timeouts count as failures and are raised as
+        PortalUnavailableError; the status is recorded by _record_status.
+        Other errors (e.g. an undecodable body of a 200 answer) are the
+        request's own and leave the breaker alone.
+        """
+        probe = self.breaker.acquire()
+        try:
+            yield
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+            self.breaker.record_failure()
+            raise PortalUnavailableError(f"Portal {self.base_url} not reachable: {err}") from err
+        finally:
+            if probe:
+                self.breaker.release()
+
+    def _record_status(self, status: int) -> None:
+        """Record a response status with the breaker."""
+        if status in OUTAGE_STATUSES:
+            self.breaker.record_failure()
+            raise PortalUnavailableError(f"Portal {self.base_url} answered {status}")
+        self.breaker.record_success()
+
     async def login(self) -> bool:
         """Login to the Fronius Energiegemeinschaft portal."""
         session = await self._get_session()
 
         # First, get the login page to get initial cookies
-        async with session.get(f"{BASE_URL}/backend/login") as resp:
+        async with self._guarded(), session.get(f"{self.base_url}/backend/login") as resp:
+            self._record_status(resp.status)
             if resp.status != 200:
                 raise Exception(f"Failed to get login page: {resp.status}")
 
@@ -75,18 +506,19 @@ class FroniusEnergyClient:
             "Content-Type": "application/json",
             "Accept": "application/json",
             "X-Requested-With": "XMLHttpRequest",
-            "Referer": f"{BASE_URL}/backend/login",
+            "Referer": f"{self.base_url}/backend/login",
         }
 
         _LOGGER.debug(f"Attempting login for user: {self.username}")
-        _LOGGER.debug(f"Login URL: {BASE_URL}/backend/login")
+        _LOGGER.debug(f"Login URL: {self.base_url}/backend/login")
 
-        async with session.post(
-            f"{BASE_URL}/backend/login",
+        async with self._guarded(), session.post(
+            f"{self.base_url}/backend/login",
             json=login_data,
             headers=headers,
             cookies=self.cookies
         ) as resp:
+            self._record_status(resp.status)
             _LOGGER.debug(f"Login response status: {resp.status}")
 
             if resp.status not in [200, 204]:
@@ -116,9 +548,10 @@ class FroniusEnergyClient:
         kwargs["headers"] = headers
         kwargs["cookies"] = self.cookies
 
-        url = f"{BASE_URL}{endpoint}"
+        url = f"{self.base_url}{endpoint}"
 
-        async with session.request(method, url, **kwargs) as resp:
+        async with self._guarded(), session.request(method, url, **kwargs) as resp:
+            self._record_status(resp.status)
             if resp.status == 401:
                 # Try to re-login
                 _LOGGER.warning("Session expired, attempting re-login")
@@ -131,13 +564,17 @@ class FroniusEnergyClient:
                 kwargs["cookies"] = self.cookies
 
                 # Retry request
-                async with session.request(method, url, **kwargs) as retry_resp:
+                async with self._guarded(), session.request(method, url, **kwargs) as retry_resp:
+                    self._record_status(retry_resp.status)
                     if retry_resp.status != 200:
-                        raise Exception(f"Request failed after re-login: {retry_resp.status}")
+                        raise PortalRequestError(
+                            f"Request failed after re-login: {retry_resp.status}",
+                            retry_resp.status,
+                        )
                     return await retry_resp.json()
 
             if resp.status != 200:
-                raise Exception(f"Request failed: {resp.status}")
+                raise PortalRequestError(f"Request failed: {resp.status}", resp.status)
 
             # Update cookies
             for cookie in resp.cookies.values():
@@ -145,9 +582,78 @@ class FroniusEnergyClient:
 
             return await resp.json()
 
+    async def _scheduled_request(
+        self, method: str, endpoint: str, ticket: SchedulerTicket | None = None, **kwargs
+    ) -> dict[str, Any] | list[dict[str, Any]]:
+        """Make a request within a slot of the scheduler, if the client has one."""
+        if self.scheduler is None:
+            return await self._make_request(method, endpoint, **kwargs)
+        async with self.scheduler.slot(self._owner, ticket):
+            return await self._make_request(method, endpoint, **kwargs)
+
+    @asynccontextmanager
+    async def fetch_context(self) -> AsyncIterator[None]:
+        """Download every (endpoint, params) at most once within the context.
+
+        Used around one coordinator refresh, so subsystems that need the same
+        month (sensors, statistics, ...) share a single download. Memoized
+        responses are shared objects and must not be modified by callers.
+        """
+        token = _FETCH_MEMO.set({})
+        try:
+            yield
+        finally:
+            _FETCH_MEMO.reset(token)
+
+    async def _get(
+        self, endpoint: str, params: dict[str, str] | None = None
+    ) -> dict[str, Any] | list[dict[str, Any]]:
+        """GET with request-scoped memoization and single-flight deduplication.
+
+        Concurrent identical requests share one download; within a fetch
+        context the response is reused until the context ends. A more urgent
+        caller joining a download that still waits for the scheduler raises
+        its priority, so it does not wait behind background requests.
+        """
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        memo_root = _FETCH_MEMO.get()
+        memo = memo_root.setdefault(id(self), {}) if memo_root is not None else None
+        if memo is not None and key in memo:
+            return memo[key]
+
+        priority = _REQUEST_PRIORITY.get()
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            ticket = SchedulerTicket(priority)
+            task = asyncio.ensure_future(
+                self._scheduled_request("GET", endpoint, ticket, params=params)
+            )
+            self._in_flight[key] = (task, ticket)
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            task, ticket = in_flight
+            if self.scheduler is not None:
+                self.scheduler.promote(ticket, self._owner, priority)
+        # Shield so one cancelled caller does not cancel the shared download
+        result = await asyncio.shield(task)
+
+        if memo is not None:
+            memo[key] = result
+        return result
+
+    def mark_view_unsupported(self, view: str) -> None:
+        """Stop planning requests with a view the portal does not answer."""
+        if view in self.views and view != VIEW_MONTH:
+            _LOGGER.info("Portal does not support view=%s, using month views instead", view)
+            self.views.discard(view)
+
+    def plan_history(self, months: list[str], resolution: str = "month") -> list[ViewRequest]:
+        """Return the cheapest requests covering months with the supported views."""
+        return plan_history_requests(months, resolution, self.views)
+
     async def get_communities(self) -> list[dict[str, Any]]:
         """Get list of communities."""
-        return await self._make_request("GET", API_COMMUNITY)
+        return await self._get(API_COMMUNITY)
 
     async def get_community_energy_data(
         self, community_id: int, view: str = "month", time: str | None = None
@@ -159,23 +665,28 @@ class FroniusEnergyClient:
         endpoint = API_COMMUNITY_ENERGY.format(community_id=community_id)
         params = {"view": view, "time": time}
 
-        return await self._make_request("GET", endpoint, params=params)
+        return await self._get(endpoint, params)
 
     async def get_counter_points(self) -> list[dict[str, Any]]:
         """Get list of counter points."""
-        return await self._make_request("GET", API_COUNTER_POINT)
+        return await self._get(API_COUNTER_POINT)
 
     async def get_counter_point_energy_data(
         self, counter_point_id: int, view: str = "month", time: str | None = None
     ) -> dict[str, Any]:
-        """Get energy data for a counter point."""
+        """Get energy data for a counter point.
+
+        view="year" with time="YYYY" returns monthly values,
+        view="month" with time="YYYY-MM" returns daily values,
+        view="day" with time="YYYY-MM-DD" returns quarter-hour values.
+        """
         if time is None:
             time = datetime.now().strftime("%Y-%m")
 
         endpoint = API_COUNTER_POINT_ENERGY.format(counter_point_id=counter_point_id)
         params = {"view": view, "time": time}
 
-        return await self._make_request("GET", endpoint, params=params)
+        return await self._get(endpoint, params)
 
     async def close(self) -> None:
         """Close the session."""
@@ -0,0 +1,391 @@
+"""Append-only binary archive of multi-year daily (and quarter-hour) series.
+
+One file per series. After a fixed header, every record is a row of native
+float64 values: the day as proleptic ordinal followed by one value per column (NaN
+for missing). Records up to ``sorted_count`` are ordered by day and unique;
+revisions of days already archived are appended to an unsorted tail, which
+compaction merges back (last write wins) once it exceeds ARCHIVE_COMPACT_TAIL
+records.
+
+Write protocol: records are appended and fsynced before the header's record
+counts are updated and fsynced. A crash in between leaves records beyond
+the committed count, which are ignored and truncated on the next open.
+Compaction writes a new file next to the archive and atomically replaces it.
+
+The file is read through mmap; ranges are found by binary search on the
+sorted records and handed out as zero-copy memoryview slices. Tail records
+of a range are merged into a copy at read time.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections.abc import Iterable, Sequence
+from datetime import date
+from pathlib import Path
+
+from .const import ARCHIVE_COMPACT_TAIL, LOAD_PROFILE_SLOTS
+from .energy_data import FLOWS, MonthSegment
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"FEGARCH1"
+VERSION = 1
+# magic, version, columns, committed records, sorted records
+_HEADER = struct.Struct("<8sIIQQ")
+HEADER_SIZE = 64
+_COUNTS_OFFSET = 16
+_COUNTS = struct.Struct("<QQ")
+_ITEM = 8  # float64
+
+
+class ArchiveCorruptError(Exception):
+    """The archive file is not readable."""
+
+
+class ArchiveSlice:
+    """Zero-copy view over consecutive records of an archive.
+
+    Provides ``dates`` and ``value(flow, index)`` like EnergySeries, so the
+    cost aggregation in attributes.py works on it unchanged.
+    """
+
+    __slots__ = ("_flat", "_width", "_columns", "_dates")
+
+    def __init__(self, flat: memoryview, columns: dict[str, int]) -> None:
+        """Initialize the slice."""
+        self._flat = flat
+        self._columns = columns
+        self._width = len(columns) + 1
+        self._dates: tuple[str, ...] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of days."""
+        return len(self._flat) // self._width
+
+    @property
+    def flat(self) -> memoryview:
+        """Return the contiguous float64 records (day ordinal + columns per row)."""
+        return self._flat
+
+    @property
+    def dates(self) -> tuple[str, ...]:
+        """Return the days as YYYY-MM-DD, oldest first."""
+        if self._dates is None:
+            self._dates = tuple(
+                date.fromordinal(int(ordinal)).isoformat()
+                for ordinal in self._flat[:: self._width]
+            )
+        return self._dates
+
+    def column(self, flow: str) -> memoryview:
+        """Return a strided zero-copy view of one column (NaN for missing)."""
+        return self._flat[self._columns[flow] + 1 :: self._width]
+
+    def value(self, flow: str, index: int) -> float:
+        """Return the value of a column on the day at index, 0.0 if missing."""
+        column = self._columns.get(flow)
+        if column is None:
+            return 0.0
+        value = self._flat[index * self._width + column + 1]
+        return 0.0 if math.isnan(value) else value
+
+
+class SeriesArchive:
+    """One archive file. All methods are blocking; call them from the executor."""
+
+    def __init__(self, path: Path, columns: Sequence[str]) -> None:
+        """Open or create the archive."""
+        self.path = path
+        self._column_names = tuple(columns)
+        self._columns = {name: i for i, name in enumerate(self._column_names)}
+        self._width = len(self._column_names) + 1
+        self._record_size = self._width * _ITEM
+        self._lock = threading.Lock()
+        self._mmap: mmap.mmap | None = None
+        self._flat: memoryview | None = None
+        self.count = 0
+        self.sorted_count = 0
+        self._open()
+
+    # -- file handling -----------------------------------------------------
+
+    def _open(self) -> None:
+        if not self.path.exists():
+            self._write_new(self.path, array("d"))
+        with open(self.path, "r+b") as file:
+            header = file.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ArchiveCorruptError(f"{self.path}: truncated header")
+            magic, version, columns, count, sorted_count = _HEADER.unpack_from(header)
+            if magic != MAGIC or version != VERSION or columns != len(self._column_names):
+                raise ArchiveCorruptError(f"{self.path}: unexpected header")
+
+            # Drop records written after the last committed header update
+            size = os.fstat(file.fileno()).st_size
+            available = (size - HEADER_SIZE) // self._record_size
+            if available < count:
+                _LOGGER.warning(
+                    "Archive %s lost %d records, keeping %d",
+                    self.path,
+                    count - available,
+                    available,
+                )
+                count = available
+                sorted_count = min(sorted_count, count)
+                self._write_counts(file, count, sorted_count)
+            if size != HEADER_SIZE + count * self._record_size:
+                file.truncate(HEADER_SIZE + count * self._record_size)
+                os.fsync(file.fileno())
+        self.count = count
+        self.sorted_count = sorted_count
+        self._remap()
+
+    def _remap(self) -> None:
+        # Slices handed out earlier keep the previous mapping alive until released
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._flat = memoryview(self._mmap)[
+            HEADER_SIZE : HEADER_SIZE + self.count * self._record_size
+        ].cast("d")
+
+    def _write_counts(self, file, count: int, sorted_count: int) -> None:
+        file.seek(_COUNTS_OFFSET)
+        file.write(_COUNTS.pack(count, sorted_count))
+        file.flush()
+        os.fsync(file.fileno())
+
+    def _write_new(self, path: Path, records: array) -> None:
+        """Write a complete archive file atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        count = len(records) // self._width
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as file:
+            header = _HEADER.pack(MAGIC, VERSION, len(self._column_names), count, count)
+            file.write(header.ljust(HEADER_SIZE, b"\0"))
+            records.tofile(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+        directory = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    # -- lookup ------------------------------------------------------------
+
+    def _ordinal(self, index: int) -> float:
+        return self._flat[index * self._width]
+
+    def _bisect(self, ordinal: int, hi: int | None = None) -> int:
+        """Return the first sorted record index with day >= ordinal (O(log n))."""
+        lo, hi = 0, self.sorted_count if hi is None else hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ordinal(mid) < ordinal:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, ordinal: int) -> int | None:
+        """Return the index of the newest record of a day, if any."""
+        for index in range(self.count - 1, self.sorted_count - 1, -1):
+            if self._ordinal(index) == ordinal:
+                return index
+        index = self._bisect(ordinal)
+        if index < self.sorted_count and self._ordinal(index) == ordinal:
+            return index
+        return None
+
+    def months(self) -> set[str]:
+        """Return the months (YYYY-MM) with at least one archived day."""
+        with self._lock:
+            ordinals = {int(ordinal) for ordinal in self._flat[:: self._width]}
+        return {date.fromordinal(ordinal).strftime("%Y-%m") for ordinal in ordinals}
+
+    def slice(self, start: date, end: date) -> ArchiveSlice:
+        """Return the records from start to end (inclusive).
+
+        The slice is a zero-copy view of the mapping unless revised days of
+        the range wait in the tail; those are merged into a copy.
+        """
+        first, last = start.toordinal(), end.toordinal()
+        with self._lock:
+            lo = self._bisect(first)
+            hi = self._bisect(last + 1)
+            records = self._flat[lo * self._width : hi * self._width]
+            # Later tail records are newer revisions of the same day
+            revised = {}
+            for index in range(self.sorted_count, self.count):
+                ordinal = self._ordinal(index)
+                if first <= ordinal <= last:
+                    revised[ordinal] = index
+            if revised:
+                records = self._merge_tail(records, revised)
+            return ArchiveSlice(records, self._columns)
+
+    def _merge_tail(self, records: memoryview, revised: dict[float, int]) -> memoryview:
+        """Return sorted records with the revised tail records replacing or adding days."""
+        rows = {
+            records[start]: records[start : start + self._width]
+            for start in range(0, len(records), self._width)
+        }
+        for ordinal, index in revised.items():
+            rows[ordinal] = self._flat[index * self._width : (index + 1) * self._width]
+        merged = array("d")
+        for ordinal in sorted(rows):
+            merged.extend(rows[ordinal])
+        return memoryview(merged)
+
+    # -- writing -----------------------------------------------------------
+
+    def upsert(self, rows: Iterable[tuple[date, Sequence[float]]]) -> int:
+        """Store days whose values differ from the archived ones. Returns rows written."""
+        with self._lock:
+            records = array("d")
+            appended_sorted = 0
+            last = self._ordinal(self.sorted_count - 1) if self.sorted_count else -math.inf
+            for day, values in sorted(rows, key=lambda row: row[0]):
+                ordinal = day.toordinal()
+                row = [float(ordinal), *(float(v) for v in values)]
+                if len(row) != self._width:
+                    raise ValueError(f"Expected {self._width - 1} values, got {len(row) - 1}")
+                index = self._find(ordinal)
+                if index is not None and self._same(index, row):
+                    continue
+                records.extend(row)
+                # New days after the sorted part extend it while no tail exists
+                if index is None and ordinal > last:
+                    appended_sorted += 1
+                    last = ordinal
+            if not records:
+                return 0
+            written = len(records) // self._width
+            self._append(records, written, appended_sorted)
+            if self.count - self.sorted_count > ARCHIVE_COMPACT_TAIL:
+                self._compact()
+            return written
+
+    def _same(self, index: int, row: list[float]) -> bool:
+        start = index * self._width
+        for stored, value in zip(self._flat[start : start + self._width], row):
+            if stored != value and not (math.isnan(stored) and math.isnan(value)):
+                return False
+        return True
+
+    def _append(self, records: array, written: int, appended_sorted: int) -> None:
+        """Append records, then commit the new counts (crash-safe order)."""
+        with open(self.path, "r+b") as file:
+            file.seek(HEADER_SIZE + self.count * self._record_size)
+            records.tofile(file)
+            file.flush()
+            os.fsync(file.fileno())
+            count = self.count + written
+            # Sorted records stay a prefix: only if no tail existed and all rows were new days
+            extends_sorted = self.count == self.sorted_count and appended_sorted == written
+            sorted_count = count if extends_sorted else self.sorted_count
+            self._write_counts(file, count, sorted_count)
+        self.count, self.sorted_count = count, sorted_count
+        self._remap()
+
+    def _compact(self) -> None:
+        if self.count == self.sorted_count:
+            return
+        latest: dict[float, memoryview] = {}
+        for index in range(self.count):
+            start = index * self._width
+            latest[self._flat[start]] = self._flat[start : start + self._width]
+        records = array("d")
+        for ordinal in sorted(latest):
+            records.extend(latest[ordinal])
+        self._write_new(self.path, records)
+        self.count = self.sorted_count = len(latest)
+        self._remap()
+        _LOGGER.debug("Compacted archive %s to %d records", self.path, self.count)
+
+    def size(self) -> int:
+        """Return the file size in bytes."""
+        return HEADER_SIZE + self.count * self._record_size
+
+
+class ArchiveManager:
+    """Daily archives per community / counter point, optional quarter-hour archives.
+
+    All methods are blocking; call them from the executor.
+    """
+
+    def __init__(self, directory: Path, quarter_hour: bool = False) -> None:
+        """Initialize the manager."""
+        self.directory = directory
+        self.quarter_hour = quarter_hour
+        self._archives: dict[tuple, SeriesArchive] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: tuple, name: str, columns: Sequence[str]) -> SeriesArchive | None:
+        with self._lock:
+            archive = self._archives.get(key)
+            if archive is None:
+                try:
+                    archive = SeriesArchive(self.directory / name, columns)
+                except (ArchiveCorruptError, OSError) as err:
+                    _LOGGER.error("Cannot open archive %s: %s", name, err)
+                    return None
+                self._archives[key] = archive
+            return archive
+
+    def daily(self, section: str, item_id) -> SeriesArchive | None:
+        """Return the daily archive of a community or counter point."""
+        return self._get((section, item_id, "daily"), f"{section}_{item_id}_daily.bin", FLOWS)
+
+    def archived_months(self, section: str, item_id) -> set[str]:
+        """Return the months with archived days of a community or counter point."""
+        archive = self.daily(section, item_id)
+        return archive.months() if archive is not None else set()
+
+    def store_segment(self, section: str, item_id, segment: MonthSegment) -> int:
+        """Archive the days of a month segment."""
+        archive = self.daily(section, item_id)
+        if archive is None:
+            return 0
+        return archive.upsert(
+            (
+                date.fromisoformat(day),
+                [segment.raw_value(flow, index) for flow in FLOWS],
+            )
+            for index, day in enumerate(segment.dates)
+        )
+
+    def quarter_hour_archive(self, cp_id, create: bool = False) -> SeriesArchive | None:
+        """Return the quarter-hour archive of a counter point, if it exists (or create it)."""
+        name = f"counter_point_{cp_id}_quarter_hour.bin"
+        if not create and not (self.directory / name).exists():
+            return None
+        columns = [f"{flow}_{slot}" for flow in FLOWS for slot in range(LOAD_PROFILE_SLOTS)]
+        return self._get(("counter_point", cp_id, "quarter_hour"), name, columns)
+
+    def store_quarter_hours(self, cp_id, day: str, slots: dict[str, list[float]]) -> int:
+        """Archive the 96 quarter-hour slots per flow of one day, if enabled."""
+        if not self.quarter_hour:
+            return 0
+        archive = self.quarter_hour_archive(cp_id, create=True)
+        if archive is None:
+            return 0
+        values = [value for flow in FLOWS for value in slots[flow]]
+        return archive.upsert([(date.fromisoformat(day), values)])
+
+    def stats(self) -> dict:
+        """Return file count and total size for diagnostics."""
+        with self._lock:
+            archives = list(self._archives.values())
+        return {
+            "files": len(archives),
+            "bytes": sum(archive.size() for archive in archives),
+            "days": sum(archive.count for archive in archives),
+        }
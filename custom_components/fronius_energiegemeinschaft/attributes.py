@@ -0,0 +1,246 @@
+"""Ready-to-serve sensor values and attributes, built off the event loop.
+
+The per-day loops behind the daily series, cost and cost breakdown
+attributes run in the executor once per changed series. Sensors only look
+up the prepared values; the returned structures are shared and must not be
+modified.
+
+Chart attributes are pre-sorted ``[timestamp_ms, value]`` pairs, so an
+ApexCharts ``data_generator`` can return them as they are.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+from .energy_data import FLOWS, EnergySeries
+from .kpi import KPI_COMMUNITY_COVERAGE, KPI_FEED_IN_SHARE, KPI_SELF_SUFFICIENCY, kpi_value
+
+CHART_DAYS = 30
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Cost series per day / month in chart attributes, from the cost components
+_COST_CHART_KEYS = (
+    "net",
+    "grid_consumption_cost",
+    "community_consumption_cost",
+    "consumption_cost",
+    "feed_in_revenue",
+    "grid_net",
+    "community_net",
+)
+
+
+def timestamp_ms(key: str) -> int:
+    """Return UTC midnight of a YYYY-MM-DD (or first day of a YYYY-MM) key in ms.
+
+    Matches ``new Date(key).getTime()`` in the browser.
+    """
+    day = date.fromisoformat(key if len(key) == 10 else f"{key}-01")
+    return (day.toordinal() - _EPOCH_ORDINAL) * 86_400_000
+
+
+def _points(values: dict[str, float | None], digits: int = 3) -> list[list]:
+    """Return [[timestamp_ms, value], ...] of a date-ordered dict."""
+    return [
+        [timestamp_ms(key), None if value is None else round(value, digits)]
+        for key, value in values.items()
+    ]
+
+
+def _tail(values: dict[str, float], count: int = CHART_DAYS) -> dict[str, float]:
+    """Return the last count entries of a date-ordered dict."""
+    keys = list(values)[-count:]
+    return {key: values[key] for key in keys}
+
+
+def _current_month(values: dict[str, float]) -> dict[str, float]:
+    """Return the entries of the newest month of a date-ordered dict."""
+    if not values:
+        return {}
+    month = max(values)[:7]
+    return {key: value for key, value in values.items() if key.startswith(month)}
+
+
+def _monthly_sums(values: dict[str, float]) -> dict[str, float]:
+    """Return {YYYY-MM: sum} of a date-ordered dict."""
+    sums: dict[str, float] = {}
+    for key, value in values.items():
+        sums[key[:7]] = sums.get(key[:7], 0.0) + value
+    return sums
+
+
+def _flow_chart(daily_data: dict[str, float]) -> dict[str, list]:
+    """Return last 30 days, current month and per-month sums of one flow."""
+    return {
+        "last_30_days": _points(_tail(daily_data)),
+        "current_month": _points(_current_month(daily_data)),
+        "monthly": _points(_monthly_sums(daily_data)),
+    }
+
+
+def _cost_chart_values(grid_cons, comm_cons, grid_feed, comm_feed) -> tuple[float, ...]:
+    """Return the cost chart values in _COST_CHART_KEYS order."""
+    return (
+        grid_cons + comm_cons - grid_feed - comm_feed,
+        grid_cons,
+        comm_cons,
+        grid_cons + comm_cons,
+        grid_feed + comm_feed,
+        grid_cons - grid_feed,
+        comm_cons - comm_feed,
+    )
+
+
+def cost_components(series: EnergySeries, pricing: dict):
+    """Yield (date, grid consumption cost, community consumption cost,
+    grid feed-in revenue, community feed-in revenue) for each day."""
+    for index, day in enumerate(series.dates):
+        yield (
+            day,
+            series.value("cgrid", index) * pricing["grid_consumption"],
+            series.value("crec", index) * pricing["community_consumption"],
+            series.value("fgrid", index) * pricing["grid_feed_in"],
+            series.value("frec", index) * pricing["community_feed_in"],
+        )
+
+
+def aggregate_costs(
+    series: EnergySeries, pricing: dict, key_length: int
+) -> tuple[dict[str, float], dict[str, dict[str, float]]]:
+    """Aggregate net costs and their breakdown by date prefix (7 = month, 4 = year)."""
+    totals: dict[str, float] = {}
+    breakdown: dict[str, dict[str, float]] = {}
+    for day, grid_cons, comm_cons, grid_feed, comm_feed in cost_components(series, pricing):
+        period = day[:key_length]
+        totals[period] = totals.get(period, 0) + (grid_cons + comm_cons - grid_feed - comm_feed)
+        entry = breakdown.get(period)
+        if entry is None:
+            entry = breakdown[period] = {
+                "grid_consumption_cost": 0,
+                "community_consumption_cost": 0,
+                "grid_feed_in_revenue": 0,
+                "community_feed_in_revenue": 0,
+                "days_count": 0,
+            }
+        entry["grid_consumption_cost"] += grid_cons
+        entry["community_consumption_cost"] += comm_cons
+        entry["grid_feed_in_revenue"] += grid_feed
+        entry["community_feed_in_revenue"] += comm_feed
+        entry["days_count"] += 1
+    return totals, breakdown
+
+
+def _latest(values: dict[str, float]) -> float | None:
+    """Return the value of the newest key, rounded to cents."""
+    if not values:
+        return None
+    return round(values[max(values)], 2)
+
+
+def community_attributes(series: EnergySeries) -> dict:
+    """Return {flow: {"daily_data": ..., "last_30_days": ..., "chart": ...}} of a community."""
+    prepared = {}
+    for flow in FLOWS:
+        daily_data = series.daily(flow)
+        prepared[flow] = {
+            "daily_data": daily_data,
+            "last_30_days": list(daily_data.values())[-30:],
+            "chart": _flow_chart(daily_data),
+        }
+    return prepared
+
+
+def counter_point_attributes(series: EnergySeries, pricing: dict, history=None) -> dict:
+    """Return daily series, daily/monthly/yearly costs, breakdowns and charts of a counter point.
+
+    history is an optional longer daily series (e.g. an ArchiveSlice since
+    January of the previous year); yearly costs are aggregated from it when
+    given, so they cover more than the months in the coordinator data.
+    """
+    daily = {flow: series.daily(flow) for flow in FLOWS}
+
+    daily_costs = {}
+    daily_breakdown = {}
+    daily_cost_values = {}
+    latest_daily_cost = None
+    for day, grid_cons, comm_cons, grid_feed, comm_feed in cost_components(series, pricing):
+        latest_daily_cost = grid_cons + comm_cons - grid_feed - comm_feed
+        daily_costs[day] = round(latest_daily_cost, 2)
+        daily_breakdown[day] = {
+            "grid_consumption_cost": round(grid_cons, 2),
+            "community_consumption_cost": round(comm_cons, 2),
+            "grid_feed_in_revenue": round(grid_feed, 2),
+            "community_feed_in_revenue": round(comm_feed, 2),
+        }
+        daily_cost_values[day] = _cost_chart_values(grid_cons, comm_cons, grid_feed, comm_feed)
+
+    monthly_costs, monthly_breakdown = aggregate_costs(series, pricing, 7)
+    monthly_cost_values = {
+        month: _cost_chart_values(
+            breakdown["grid_consumption_cost"],
+            breakdown["community_consumption_cost"],
+            breakdown["grid_feed_in_revenue"],
+            breakdown["community_feed_in_revenue"],
+        )
+        for month, breakdown in monthly_breakdown.items()
+    }
+
+    # Daily KPIs in percent for the chart window (None where undefined)
+    chart_days = list(series.dates)[-CHART_DAYS:]
+    offset = len(series.dates) - len(chart_days)
+    day_sums = {
+        day: [series.value(flow, offset + i) for flow in FLOWS]
+        for i, day in enumerate(chart_days)
+    }
+    yearly_costs, yearly_breakdown = aggregate_costs(
+        history if history is not None and len(history) else series, pricing, 4
+    )
+
+    return {
+        "daily": daily,
+        "last_30_days": {flow: list(values.values())[-30:] for flow, values in daily.items()},
+        "daily_cost": None if latest_daily_cost is None else round(latest_daily_cost, 2),
+        "daily_costs": daily_costs,
+        "daily_costs_breakdown": daily_breakdown,
+        "last_30_days_costs": list(daily_costs.values())[-30:],
+        "monthly_cost": _latest(monthly_costs),
+        "monthly_costs": {k: round(v, 2) for k, v in monthly_costs.items()},
+        "monthly_costs_breakdown": {
+            month: {
+                key: value if key == "days_count" else round(value, 2)
+                for key, value in breakdown.items()
+            }
+            for month, breakdown in monthly_breakdown.items()
+        },
+        "chart": {
+            "last_30_days": {flow: _points(_tail(values)) for flow, values in daily.items()},
+            "current_month": {
+                flow: _points(_current_month(values)) for flow, values in daily.items()
+            },
+            "monthly": {flow: _points(_monthly_sums(values)) for flow, values in daily.items()},
+            "percentages": {
+                kpi: _points({day: kpi_value(kpi, sums) for day, sums in day_sums.items()}, 1)
+                for kpi in (KPI_SELF_SUFFICIENCY, KPI_COMMUNITY_COVERAGE, KPI_FEED_IN_SHARE)
+            },
+        },
+        "daily_costs_chart": {
+            key: _points({day: values[i] for day, values in _tail(daily_cost_values).items()}, 2)
+            for i, key in enumerate(_COST_CHART_KEYS)
+        },
+        "monthly_costs_chart": {
+            key: _points({month: values[i] for month, values in monthly_cost_values.items()}, 2)
+            for i, key in enumerate(_COST_CHART_KEYS)
+        },
+        "yearly_cost": _latest(yearly_costs),
+        "yearly_costs": {k: round(v, 2) for k, v in yearly_costs.items()},
+        # The yearly breakdown has no day count
+        "yearly_cost_breakdown": {
+            year: {
+                key: round(value, 2)
+                for key, value in breakdown.items()
+                if key != "days_count"
+            }
+            for year, breakdown in yearly_breakdown.items()
+        },
+    }
@@ -0,0 +1,477 @@
+"""Resumable background backfill of monthly cost statistics.
+
+Monthly totals per counter point are persisted with a Store; a stored month
+is the checkpoint that it does not need to be fetched again. The backfill
+runs as a background task with bounded concurrency and a request rate limit,
+so it never delays regular polling, and it resumes where it stopped after a
+restart. Months that fail are retried a few times per run and stay pending
+for the next start instead of being skipped forever.
+
+A low-priority revision sweep re-fetches already stored months in rotation
+and compares their content fingerprint with the stored one; only months the
+portal revised are re-imported, with cumulative sums rewritten from there.
+
+Requests are planned by the client: a year view covers all missing months of
+a year in one request where the portal supports it, with month views as the
+fallback for months a year view did not deliver. Year views carry no days,
+so archiving the history is a separate, optional pass after the totals that
+fetches month views only for months the archive is missing. The tasks run with the
+backfill and sweep request priorities, so the client's scheduler starts
+polling and service call requests first.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+
+from .api_client import (
+    PRIORITY_BACKFILL,
+    PRIORITY_SWEEP,
+    VIEW_MONTH,
+    VIEW_YEAR,
+    RateLimiter,
+    ViewRequest,
+    request_priority,
+)
+from .const import (
+    BACKFILL_MAX_ROUNDS,
+    BACKFILL_RETRY_DELAY,
+    DOMAIN,
+    REVISION_SWEEP_BATCH,
+    SIGNAL_BACKFILL_PROGRESS,
+    STORAGE_VERSION,
+)
+from .cost_statistics import (
+    async_write_cost_statistics,
+    last_n_months,
+    month_totals_from_energy_data,
+    month_totals_from_year_view,
+)
+from .energy_data import MonthSegment
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_IDLE = "idle"
+STATE_RUNNING = "running"
+STATE_WAITING_RETRY = "waiting_retry"
+STATE_DONE = "done"
+STATE_INCOMPLETE = "incomplete"
+
+
+class MonthTotalsStore:
+    """Persisted [cgrid, crec, fgrid, frec] per counter point and month.
+
+    None marks a month the portal has no data for (e.g. before the meter
+    was installed); it still counts as fetched. Next to the totals the
+    content fingerprint of the month view is kept, if known, so revisions
+    of single days are detected as well.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.month_totals")
+        self._data: dict[str, dict[str, list[float] | None]] = {}
+        self._fingerprints: dict[str, dict[str, str]] = {}
+        self.sweep_cursor = 0
+
+    async def async_load(self) -> None:
+        """Load persisted totals."""
+        stored = await self._store.async_load() or {}
+        self._data = stored.get("counter_points", {})
+        self._fingerprints = stored.get("fingerprints", {})
+        self.sweep_cursor = stored.get("sweep_cursor", 0)
+
+    async def async_save(self) -> None:
+        """Write pending changes immediately."""
+        await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict:
+        return {
+            "counter_points": self._data,
+            "fingerprints": self._fingerprints,
+            "sweep_cursor": self.sweep_cursor,
+        }
+
+    def schedule_save(self) -> None:
+        """Save soon, batching further changes."""
+        self._store.async_delay_save(self._data_to_save, 10)
+
+    def fingerprint(self, cp_id: int, month: str) -> str | None:
+        """Return the stored content fingerprint of a month, if known."""
+        return self._fingerprints.get(str(cp_id), {}).get(month)
+
+    def months(self, cp_id: int) -> dict[str, list[float] | None]:
+        """Return stored totals of a counter point by month."""
+        return self._data.get(str(cp_id), {})
+
+    def has(self, cp_id: int, month: str) -> bool:
+        """Return True if the month has been fetched (checkpoint)."""
+        return month in self._data.get(str(cp_id), {})
+
+    def set(
+        self,
+        cp_id: int,
+        month: str,
+        totals: list[float] | None,
+        fingerprint: str | None = None,
+    ) -> bool:
+        """Store totals (and fingerprint) of a month. Returns True if the totals changed.
+
+        An empty response never overwrites a month that already has data.
+        """
+        if totals is None and self._data.get(str(cp_id), {}).get(month) is not None:
+            return False
+        if fingerprint is not None:
+            fingerprints = self._fingerprints.setdefault(str(cp_id), {})
+            if fingerprints.get(month) != fingerprint:
+                fingerprints[month] = fingerprint
+                self.schedule_save()
+        months = self._data.setdefault(str(cp_id), {})
+        if month in months and months[month] == totals:
+            return False
+        months[month] = totals
+        self.schedule_save()
+        return True
+
+
+class BackfillJob:
+    """Background job that fills missing months into the totals store."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        client,
+        month_totals: MonthTotalsStore,
+        pricing: dict,
+        years: int,
+        concurrency: int,
+        rate: float,
+        archive=None,
+        archive_history: bool = False,
+    ) -> None:
+        """Initialize the job."""
+        self._hass = hass
+        self._entry_id = entry_id
+        self._client = client
+        self._month_totals = month_totals
+        self._pricing = pricing
+        self._archive = archive
+        self._archive_history = archive_history and archive is not None
+        self._years = years
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._rate_limiter = RateLimiter(rate)
+        self._counter_points: dict[int, str] = {}
+        self._task: asyncio.Task | None = None
+        self._sweep_task: asyncio.Task | None = None
+        self._rerun = False
+
+        self.state = STATE_IDLE
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+
+    @property
+    def progress(self) -> float:
+        """Return progress in percent."""
+        if not self.total:
+            return 100.0 if self.state == STATE_DONE else 0.0
+        return round(self.done / self.total * 100, 1)
+
+    def _months(self) -> list[str]:
+        """Return the months to backfill, oldest first.
+
+        The current and previous month are kept up to date by regular polling.
+        """
+        return last_n_months(self._years * 12 + 1, datetime.now())[:-2]
+
+    def async_start(self, counter_points: dict[int, str]) -> None:
+        """Start the backfill for the given {cp_id: cp_number}.
+
+        Once started, a call only re-runs the job if it adds counter points.
+        """
+        new = {
+            cp_id: number
+            for cp_id, number in counter_points.items()
+            if cp_id not in self._counter_points
+        }
+        if not new and self._task is not None:
+            return
+        self._counter_points.update(new)
+        if self._task is not None and not self._task.done():
+            self._rerun = True
+            return
+        self._start_run()
+
+    def _start_run(self) -> None:
+        # The task copies the context, and with it the request priority
+        with request_priority(PRIORITY_BACKFILL):
+            self._task = self._hass.async_create_background_task(
+                self._async_run(), name=f"{DOMAIN} statistics backfill {self._entry_id}"
+            )
+
+    async def async_stop(self) -> None:
+        """Cancel the job and a running sweep; checkpoints written so far are kept."""
+        for task in (self._task, self._sweep_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self._month_totals.async_save()
+
+    def async_start_sweep(self) -> None:
+        """Start one revision sweep step unless the backfill or a sweep is running."""
+        for task in (self._task, self._sweep_task):
+            if task is not None and not task.done():
+                return
+        with request_priority(PRIORITY_SWEEP):
+            self._sweep_task = self._hass.async_create_background_task(
+                self._async_sweep(), name=f"{DOMAIN} revision sweep {self._entry_id}"
+            )
+
+    async def _async_sweep(self) -> None:
+        """Re-check the next stored months in rotation for portal revisions.
+
+        Newest months come first in the rotation, as they are revised most
+        often. A month is re-imported only if its content fingerprint changed
+        and its totals differ from the stored ones.
+        """
+        pairs = [
+            (cp_id, month)
+            for month in reversed(self._months())
+            for cp_id in sorted(self._counter_points)
+            if self._month_totals.has(cp_id, month)
+        ]
+        if not pairs:
+            return
+        start = self._month_totals.sweep_cursor % len(pairs)
+        size = min(REVISION_SWEEP_BATCH, len(pairs))
+        batch = [pairs[(start + i) % len(pairs)] for i in range(size)]
+        self._month_totals.sweep_cursor = (start + len(batch)) % len(pairs)
+        self._month_totals.schedule_save()
+
+        for cp_id, month in batch:
+            energy_data = await self._async_request(cp_id, VIEW_MONTH, month)
+            if energy_data is None:
+                continue
+            segment = MonthSegment.from_energy_data(month, energy_data, "total")
+            fingerprint = segment.fingerprint
+            if fingerprint == self._month_totals.fingerprint(cp_id, month):
+                continue
+            await self._async_archive(cp_id, segment)
+            if not self._month_totals.set(
+                cp_id, month, month_totals_from_energy_data(energy_data), fingerprint
+            ):
+                continue
+            _LOGGER.info(
+                "Portal revised counter point %s month %s, re-importing statistics from there",
+                self._counter_points[cp_id],
+                month,
+            )
+            async_write_cost_statistics(
+                self._hass,
+                cp_id,
+                self._counter_points[cp_id],
+                self._month_totals.months(cp_id),
+                self._pricing,
+                from_month=month,
+            )
+
+    def _notify(self) -> None:
+        async_dispatcher_send(self._hass, SIGNAL_BACKFILL_PROGRESS.format(self._entry_id))
+
+    async def _async_run(self) -> None:
+        """Run until every month is fetched or retries are exhausted."""
+        self._rerun = False
+        self.state = STATE_RUNNING
+        months = self._months()
+
+        # Re-apply the current pricing to everything already stored
+        for cp_id, cp_number in self._counter_points.items():
+            async_write_cost_statistics(
+                self._hass, cp_id, cp_number, self._month_totals.months(cp_id), self._pricing
+            )
+
+        self.total = len(months) * len(self._counter_points)
+        pending = self._pending(months)
+        self.done = self.total - len(pending)
+        self._notify()
+
+        for round_number in range(BACKFILL_MAX_ROUNDS):
+            if not pending:
+                break
+            if round_number:
+                self.state = STATE_WAITING_RETRY
+                self._notify()
+                await asyncio.sleep(BACKFILL_RETRY_DELAY)
+                self.state = STATE_RUNNING
+            self.failed = 0
+            for cp_id in {cp_id for cp_id, _ in pending}:
+                await self._async_backfill_counter_point(
+                    cp_id, [month for pending_cp, month in pending if pending_cp == cp_id]
+                )
+            pending = self._pending(months)
+
+        self.state = STATE_DONE if not pending else STATE_INCOMPLETE
+        if pending:
+            _LOGGER.warning(
+                "Statistics backfill incomplete: %d months still missing, will resume on next start",
+                len(pending),
+            )
+        self._notify()
+
+        if self._archive_history:
+            await self._async_fill_archive(months)
+
+        if self._rerun:
+            self._start_run()
+
+    async def _async_fill_archive(self, months: list[str]) -> None:
+        """Fetch the days of months that have totals but no archived days.
+
+        Runs after the totals, so the statistics never wait for it. Months
+        that fail stay missing until the next start.
+        """
+        archived = await self._hass.async_add_executor_job(
+            self._archived_months, list(self._counter_points)
+        )
+        missing: dict[int, list[str]] = {}
+        for cp_id, cp_archived in archived.items():
+            stored = self._month_totals.months(cp_id)
+            for month in months:
+                if stored.get(month) is not None and month not in cp_archived:
+                    missing.setdefault(cp_id, []).append(month)
+        if not missing:
+            return
+        _LOGGER.debug(
+            "Archiving the days of %d backfilled months",
+            sum(len(cp_months) for cp_months in missing.values()),
+        )
+        for cp_id, cp_months in missing.items():
+            results = await asyncio.gather(
+                *(self._async_archive_month(cp_id, month) for month in cp_months)
+            )
+            # Month view totals are authoritative over those of a year view
+            changed = [month for month, revised in zip(cp_months, results) if revised]
+            if changed:
+                async_write_cost_statistics(
+                    self._hass,
+                    cp_id,
+                    self._counter_points[cp_id],
+                    self._month_totals.months(cp_id),
+                    self._pricing,
+                    from_month=min(changed),
+                )
+
+    async def _async_archive_month(self, cp_id: int, month: str) -> bool:
+        """Fetch and archive one month. Returns True if its stored totals changed."""
+        energy_data = await self._async_request(cp_id, VIEW_MONTH, month)
+        if energy_data is None:
+            return False
+        segment = MonthSegment.from_energy_data(month, energy_data, "total")
+        await self._async_archive(cp_id, segment)
+        return self._month_totals.set(
+            cp_id, month, month_totals_from_energy_data(energy_data), segment.fingerprint
+        )
+
+    def _archived_months(self, cp_ids: list[int]) -> dict[int, set[str]]:
+        """Return the months with archived days per counter point (runs in the executor)."""
+        return {cp_id: self._archive.archived_months("counter_point", cp_id) for cp_id in cp_ids}
+
+    def _pending(self, months: list[str]) -> list[tuple[int, str]]:
+        """Return (cp_id, month) without stored totals."""
+        return [
+            (cp_id, month)
+            for cp_id in self._counter_points
+            for month in months
+            if not self._month_totals.has(cp_id, month)
+        ]
+
+    async def _async_backfill_counter_point(self, cp_id: int, months: list[str]) -> None:
+        """Fetch missing months of one counter point, then rewrite its statistics."""
+        plan = self._client.plan_history(months, "month")
+        results = await asyncio.gather(
+            *(self._async_fetch_planned(cp_id, request) for request in plan)
+        )
+        changed = [month for fetched in results for month in fetched]
+        if changed:
+            async_write_cost_statistics(
+                self._hass,
+                cp_id,
+                self._counter_points[cp_id],
+                self._month_totals.months(cp_id),
+                self._pricing,
+                from_month=min(changed),
+            )
+
+    async def _async_fetch_planned(self, cp_id: int, request: ViewRequest) -> list[str]:
+        """Run one planned request and checkpoint its months. Returns the months fetched."""
+        if request.view != VIEW_YEAR:
+            month = request.months[0]
+            return [month] if await self._async_fetch_month(cp_id, month) else []
+
+        energy_data = await self._async_request(cp_id, VIEW_YEAR, request.time)
+        fetched = []
+        if energy_data is not None:
+            year_totals = month_totals_from_year_view(energy_data)
+            for month in request.months:
+                if month in year_totals:
+                    self._month_totals.set(cp_id, month, year_totals[month])
+                    fetched.append(month)
+            self.done += len(fetched)
+            self._notify()
+
+        # Months the year view did not deliver fall back to month views
+        missing = [month for month in request.months if month not in fetched]
+        results = await asyncio.gather(
+            *(self._async_fetch_month(cp_id, month) for month in missing)
+        )
+        if energy_data is None and any(results):
+            # Month views work while the year view failed: stop planning year views
+            self._client.mark_view_unsupported(VIEW_YEAR)
+        return fetched + [month for month, ok in zip(missing, results) if ok]
+
+    async def _async_fetch_month(self, cp_id: int, month: str) -> bool:
+        """Fetch one month and checkpoint it. Returns True on success."""
+        energy_data = await self._async_request(cp_id, VIEW_MONTH, month)
+        if energy_data is None:
+            return False
+        segment = MonthSegment.from_energy_data(month, energy_data, "total")
+        await self._async_archive(cp_id, segment)
+        self._month_totals.set(
+            cp_id, month, month_totals_from_energy_data(energy_data), segment.fingerprint
+        )
+        self.done += 1
+        self._notify()
+        return True
+
+    async def _async_archive(self, cp_id: int, segment: MonthSegment) -> None:
+        """Store the days of a fetched month in the binary archive, if any."""
+        if self._archive is not None:
+            await self._hass.async_add_executor_job(
+                self._archive.store_segment, "counter_point", cp_id, segment
+            )
+
+    async def _async_request(self, cp_id: int, view: str, time: str) -> dict | None:
+        """Fetch one energy_data view within the concurrency and rate limits, None on failure."""
+        async with self._semaphore:
+            await self._rate_limiter.wait()
+            try:
+                return await self._client.get_counter_point_energy_data(
+                    cp_id, view=view, time=time
+                )
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.debug(
+                    "Backfill of counter point %s (view=%s, time=%s) failed: %s",
+                    cp_id, view, time, err,
+                )
+                self.failed += 1
+                self._notify()
+                return None
@@ -0,0 +1,121 @@
+"""Binary sensor platform for Fronius Energiegemeinschaft (anomaly flags)."""
+from __future__ import annotations
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import (
+    CoordinatorEntity,
+    DataUpdateCoordinator,
+)
+
+from .anomaly import ANOMALY_FLATLINE, ANOMALY_OUTLIER, AnomalyManager
+from .const import DATA_ANOMALIES, DATA_COORDINATORS, DOMAIN
+from .coordinator import COORDINATOR_COUNTER_POINTS
+from .sensor import CounterPointRef, EntityDiscovery, SkipUnchangedMixin
+
+ANOMALY_NAMES = {
+    ANOMALY_OUTLIER: "Outlier",
+    ANOMALY_FLATLINE: "Flatline",
+}
+
+
+def _counter_point_entities(
+    coordinator: DataUpdateCoordinator, anomalies: AnomalyManager, cp_id, cp_data: dict
+) -> list[BinarySensorEntity]:
+    """Create the anomaly binary sensors of one counter point."""
+    cp_info = cp_data["info"]
+    counter_point = CounterPointRef(
+        cp_id,
+        cp_info.get("counter_number", str(cp_id)),
+        "Producer" if cp_info.get("energy_direction") == "1" else "Consumer",
+    )
+    return [
+        AnomalyBinarySensor(coordinator, anomalies, counter_point, kind)
+        for kind in ANOMALY_NAMES
+    ]
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the binary sensor platform."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATORS][
+        COORDINATOR_COUNTER_POINTS
+    ]
+    anomalies = hass.data[DOMAIN][config_entry.entry_id][DATA_ANOMALIES]
+
+    discovery = EntityDiscovery(
+        hass,
+        coordinator,
+        async_add_entities,
+        {
+            "counter_points": lambda item_id, item: _counter_point_entities(
+                coordinator, anomalies, item_id, item
+            ),
+        },
+    )
+    discovery.async_update()
+    config_entry.async_on_unload(coordinator.async_add_listener(discovery.async_update))
+
+
+class AnomalyBinarySensor(SkipUnchangedMixin, CoordinatorEntity, BinarySensorEntity):
+    """On while the latest day of a counter point is an outlier or a flow is flat."""
+
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        anomalies: AnomalyManager,
+        counter_point: CounterPointRef,
+        kind: str,
+    ) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator)
+        self._anomalies = anomalies
+        self._cp = counter_point
+        self._kind = kind
+        self._attr_name = f"Counter Point {counter_point.cp_number} {ANOMALY_NAMES[kind]}"
+        self._attr_unique_id = f"fronius_counter_point_{counter_point.cp_id}_{kind}"
+
+    def _fingerprint(self) -> tuple:
+        # Outliers and flatlines only change when a new day is scored
+        tracker = self._anomalies.trackers.get(self._cp.cp_id)
+        return (tracker, tracker.last_day if tracker is not None else None)
+
+    def _current(self) -> list[dict] | None:
+        tracker = self._anomalies.trackers.get(self._cp.cp_id)
+        if tracker is None:
+            return None
+        if self._kind == ANOMALY_OUTLIER:
+            return tracker.outliers
+        return list(tracker.flatlines.values())
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return True if an anomaly is present."""
+        current = self._current()
+        return None if current is None else bool(current)
+
+    def _state_attributes(self) -> dict[str, any]:
+        """Return the state attributes."""
+        tracker = self._anomalies.trackers.get(self._cp.cp_id)
+        if tracker is None:
+            return {}
+        return {
+            "counter_point_id": self._cp.cp_id,
+            "counter_number": self._cp.cp_number,
+            "last_checked_day": tracker.last_day.isoformat() if tracker.last_day else None,
+            "warming_up": tracker.warming_up,
+            "anomalies": [
+                {key: value for key, value in anomaly.items() if key != "type"}
+                for anomaly in self._current()
+            ],
+        }
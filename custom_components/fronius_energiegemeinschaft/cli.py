@@ -0,0 +1,386 @@
+"""Command-line tool for bulk history pulls outside Home Assistant.
+
+Needs aiohttp only. Run the file directly; the package ``__init__`` (which
+imports Home Assistant) is not executed then:
+
+    FRONIUS_USERNAME=... FRONIUS_PASSWORD=... \\
+        python custom_components/fronius_energiegemeinschaft/cli.py history \\
+        --from 2022-01 --to 2024-12 --output ./fronius-history
+
+Subcommands:
+
+- ``history``: communities, counter points and their energy_data for a range
+  of months, fetched concurrently within a request rate limit. Every response
+  is written as raw JSON, the values additionally as one CSV row per entity
+  and day (month views) or month (year views). Throughput is reported while
+  running and in ``summary.json``.
+- ``proxy``: the caching proxy (see proxy.py).
+"""
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+if __package__ in (None, ""):
+    # Started as a script: register this directory as a package without
+    # running __init__.py, so the relative imports below resolve
+    _PACKAGE_DIR = Path(__file__).resolve().parent
+    if sys.path and Path(sys.path[0]).resolve() == _PACKAGE_DIR:
+        del sys.path[0]
+    _package = types.ModuleType("fronius_energiegemeinschaft")
+    _package.__path__ = [str(_PACKAGE_DIR)]
+    sys.modules[_package.__name__] = _package
+    __package__ = _package.__name__
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+
+import aiohttp
+
+from .api_client import (
+    VIEW_MONTH,
+    VIEW_YEAR,
+    FroniusEnergyClient,
+    PortalRequestError,
+    RateLimiter,
+    ViewRequest,
+)
+from .const import (
+    BASE_URL,
+    CLI_DEFAULT_CONCURRENCY,
+    CLI_DEFAULT_RATE,
+    CLI_PROGRESS_INTERVAL,
+    CLI_RETRIES,
+    CLI_RETRY_DELAY,
+)
+from .energy_data import FLOWS, iter_daily_values, month_range
+
+_LOGGER = logging.getLogger(__name__)
+
+CSV_COLUMNS = ("source", "id", "name", "date", *FLOWS)
+
+# Answers that reject a request for good; anything else may pass on a retry
+REJECTED_STATUSES = frozenset({400, 404, 422})
+
+
+def _is_rejection(err: Exception) -> bool:
+    """Return True for a definitive answer: a rejected request or an unparseable body."""
+    if isinstance(err, PortalRequestError):
+        return err.status in REJECTED_STATUSES
+    return isinstance(err, (ValueError, aiohttp.ContentTypeError))
+
+
+@dataclass
+class PullStats:
+    """Counters of a history pull."""
+
+    requests: int = 0
+    failed: int = 0
+    bytes: int = 0
+    rows: int = 0
+    started: float = field(default_factory=time.monotonic)
+    failures: list[str] = field(default_factory=list)
+
+    def report(self, pending: int | None = None) -> dict:
+        """Return the counters with elapsed time and rates."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        report = {
+            "requests": self.requests,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "rows": self.rows,
+            "elapsed_s": round(elapsed, 1),
+            "requests_per_s": round(self.requests / elapsed, 2),
+            "kb_per_s": round(self.bytes / 1024 / elapsed, 1),
+        }
+        if pending is not None:
+            report["pending"] = pending
+        return report
+
+
+class _HistoryWriter:
+    """Raw responses and CSV rows below one output directory.
+
+    All writes go through a single worker thread, so files are written in
+    order and the event loop never waits on disk I/O.
+    """
+
+    def __init__(self, output: Path, resolution: str) -> None:
+        self._output = output
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        output.mkdir(parents=True, exist_ok=True)
+        self._csv_file = open(  # noqa: SIM115
+            output / f"{'daily' if resolution == 'day' else 'monthly'}.csv",
+            "w",
+            newline="",
+            encoding="utf-8",
+        )
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(CSV_COLUMNS)
+
+    async def _run(self, func, *args) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _write_json(self, relative: str, body: bytes) -> None:
+        path = self._output / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+
+    async def write_json(self, relative: str, data) -> int:
+        """Write a response as JSON, return its size in bytes."""
+        body = json.dumps(data, ensure_ascii=False).encode()
+        await self._run(self._write_json, relative, body)
+        return len(body)
+
+    async def write_rows(self, rows: list[tuple]) -> None:
+        """Append CSV rows."""
+        if rows:
+            await self._run(self._csv.writerows, rows)
+
+    async def close(self) -> None:
+        """Flush and close the CSV file."""
+        await self._run(self._csv_file.close)
+        self._executor.shutdown()
+
+
+async def pull_history(
+    client: FroniusEnergyClient,
+    output: Path,
+    months: list[str],
+    resolution: str = "day",
+    concurrency: int = CLI_DEFAULT_CONCURRENCY,
+    rate: float = CLI_DEFAULT_RATE,
+    counter_point_ids: set[int] | None = None,
+    communities: bool = True,
+) -> PullStats:
+    """Download the history of all (or selected) entities into output.
+
+    Requests are planned with the client's history planner (year views for
+    monthly values where supported). Transient errors are retried with
+    backoff. A year view the portal rejects marks the view as unsupported;
+    its months, like those of a year view that keeps failing, are re-queued
+    as month views. Requests and writes that fail for good are counted in
+    the stats.
+    """
+    stats = PullStats()
+    writer = _HistoryWriter(output, resolution)
+    limiter = RateLimiter(rate)
+    queue: asyncio.Queue = asyncio.Queue()
+    wanted = set(months)
+
+    try:
+        targets = []
+        if communities:
+            community_list = await client.get_communities()
+            stats.requests += 1
+            stats.bytes += await writer.write_json("communities.json", community_list)
+            targets += [
+                ("community", item["id"], item.get("name", ""), client.get_community_energy_data)
+                for item in community_list
+            ]
+        counter_point_list = await client.get_counter_points()
+        stats.requests += 1
+        stats.bytes += await writer.write_json("counter_points.json", counter_point_list)
+        targets += [
+            (
+                "counter_point",
+                item["id"],
+                item.get("counter_number", str(item["id"])),
+                client.get_counter_point_energy_data,
+            )
+            for item in counter_point_list
+            if counter_point_ids is None or item["id"] in counter_point_ids
+        ]
+
+        for target in targets:
+            for request in client.plan_history(months, resolution):
+                queue.put_nowait((target, request, 0))
+
+        def fail(target: tuple, request: ViewRequest, err: Exception) -> None:
+            source, target_id = target[:2]
+            _LOGGER.warning(
+                "%s %s (view=%s, time=%s) failed: %s",
+                source, target_id, request.view, request.time, err,
+            )
+            stats.failed += 1
+            stats.failures.append(f"{source}:{target_id}:{request.time}")
+
+        def as_month_views(target: tuple, request: ViewRequest) -> None:
+            for month in request.months:
+                queue.put_nowait((target, ViewRequest(VIEW_MONTH, month, (month,)), 0))
+
+        async def pull(target: tuple, request: ViewRequest, attempt: int) -> None:
+            source, target_id, name, fetch = target
+            await limiter.wait()
+            stats.requests += 1
+            try:
+                data = await fetch(target_id, view=request.view, time=request.time)
+                if not isinstance(data, dict):
+                    raise ValueError(f"unexpected {type(data).__name__} response")
+            except Exception as err:  # noqa: BLE001
+                if _is_rejection(err):
+                    if request.view == VIEW_YEAR:
+                        client.mark_view_unsupported(VIEW_YEAR)
+                        as_month_views(target, request)
+                    else:
+                        fail(target, request, err)
+                elif attempt < CLI_RETRIES:
+                    _LOGGER.debug(
+                        "%s %s (view=%s, time=%s) failed, retrying: %s",
+                        source, target_id, request.view, request.time, err,
+                    )
+                    await asyncio.sleep(CLI_RETRY_DELAY * 2**attempt)
+                    queue.put_nowait((target, request, attempt + 1))
+                elif request.view == VIEW_YEAR:
+                    # Still failing, but not rejected: month views for this year only
+                    as_month_views(target, request)
+                else:
+                    fail(target, request, err)
+                return
+
+            rows = [
+                (source, str(target_id), name, day, *(flows.get(flow) for flow in FLOWS))
+                for day, flows in sorted(iter_daily_values(data))
+                if day[:7] in wanted
+            ]
+            try:
+                stats.bytes += await writer.write_json(
+                    f"{source}/{target_id}/{request.view}-{request.time}.json", data
+                )
+                await writer.write_rows(rows)
+            except OSError as err:
+                fail(target, request, err)
+                return
+            stats.rows += len(rows)
+
+        async def worker() -> None:
+            while True:
+                target, request, attempt = await queue.get()
+                try:
+                    await pull(target, request, attempt)
+                finally:
+                    queue.task_done()
+
+        async def progress() -> None:
+            while True:
+                await asyncio.sleep(CLI_PROGRESS_INTERVAL)
+                _LOGGER.info("Progress: %s", stats.report(queue.qsize()))
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        done = asyncio.create_task(queue.join())
+        tasks = [*workers, done, asyncio.create_task(progress())]
+        try:
+            await asyncio.wait([done, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for task in workers:
+                if task.done():
+                    # A worker died on an unexpected error: fail the run instead of
+                    # waiting forever for the items it would have processed
+                    task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        await writer.close()
+    return stats
+
+
+async def _async_history(args: argparse.Namespace) -> int:
+    """Run the history subcommand, return the exit code."""
+    months = month_range(args.start, args.end)
+    if not months:
+        raise SystemExit(f"--from {args.start} is after --to {args.end}")
+    output = Path(args.output)
+    client = FroniusEnergyClient(args.username, args.password, base_url=args.base_url)
+    try:
+        await client.login()
+        stats = await pull_history(
+            client,
+            output,
+            months,
+            resolution=args.resolution,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            counter_point_ids=set(args.counter_point) if args.counter_point else None,
+            communities=not args.no_communities,
+        )
+    finally:
+        await client.close()
+
+    summary = {
+        "months": [months[0], months[-1]],
+        "resolution": args.resolution,
+        **stats.report(),
+        "failures": stats.failures,
+    }
+    (output / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    _LOGGER.info("Done: %s", {key: value for key, value in summary.items() if key != "failures"})
+    return 1 if stats.failed else 0
+
+
+def _month(value: str) -> str:
+    """Validate a YYYY-MM argument."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        return date(year, month, 1).strftime("%Y-%m")
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {value!r}") from err
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["proxy"]:
+        from .proxy import main as proxy_main  # noqa: PLC0415
+
+        proxy_main(argv[1:])
+        return 0
+
+    this_month = date.today().strftime("%Y-%m")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("proxy", help="run the caching proxy (options: proxy --help)")
+    history = subparsers.add_parser("history", help="download history into files")
+    history.add_argument("--username", default=os.environ.get("FRONIUS_USERNAME"))
+    history.add_argument("--password", default=os.environ.get("FRONIUS_PASSWORD"))
+    history.add_argument("--base-url", default=BASE_URL, help="portal or caching proxy")
+    history.add_argument("--from", dest="start", type=_month, default=this_month)
+    history.add_argument("--to", dest="end", type=_month, default=this_month)
+    history.add_argument(
+        "--resolution",
+        choices=("day", "month"),
+        default="day",
+        help="daily values (month views) or monthly values (year views)",
+    )
+    history.add_argument("--output", default="fronius-history")
+    history.add_argument("--concurrency", type=int, default=CLI_DEFAULT_CONCURRENCY)
+    history.add_argument(
+        "--rate", type=float, default=CLI_DEFAULT_RATE, help="requests per second, 0 = unlimited"
+    )
+    history.add_argument(
+        "--counter-point", type=int, action="append", help="only this counter point id"
+    )
+    history.add_argument("--no-communities", action="store_true")
+    history.add_argument("--debug", action="store_true")
+    args = parser.parse_args(argv)
+    if not args.username or not args.password:
+        parser.error("portal credentials missing (--username/--password or FRONIUS_* variables)")
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    return asyncio.run(_async_history(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
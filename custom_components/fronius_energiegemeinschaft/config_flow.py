@@ -23,6 +23,18 @@ from .const import (
     DEFAULT_PRICE_COMMUNITY_CONSUMPTION,
     DEFAULT_PRICE_GRID_FEED_IN,
     DEFAULT_PRICE_COMMUNITY_FEED_IN,
+    CONF_BACKFILL_YEARS,
+    CONF_BACKFILL_CONCURRENCY,
+    CONF_BACKFILL_RATE,
+    DEFAULT_BACKFILL_YEARS,
+    DEFAULT_BACKFILL_CONCURRENCY,
+    DEFAULT_BACKFILL_RATE,
+    CONF_LOOP_BLOCK_THRESHOLD,
+    DEFAULT_LOOP_BLOCK_THRESHOLD,
+    CONF_ARCHIVE_QUARTER_HOUR,
+    CONF_ARCHIVE_HISTORY,
+    CONF_BASE_URL,
+    BASE_URL,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -31,6 +43,8 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_USERNAME): str,
         vol.Required(CONF_PASSWORD): str,
+        # The portal, or a caching proxy (proxy.py) shared by several instances
+        vol.Required(CONF_BASE_URL, default=BASE_URL): str,
     }
 )
 
@@ -61,9 +75,52 @@ def get_pricing_schema(defaults: dict | None = None) -> vol.Schema:
     )
 
 
+def get_tuning_schema(defaults: dict | None = None) -> vol.Schema:
+    """Get backfill, loop watchdog and archive schema with optional defaults."""
+    if defaults is None:
+        defaults = {}
+
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_BACKFILL_YEARS,
+                default=defaults.get(CONF_BACKFILL_YEARS, DEFAULT_BACKFILL_YEARS)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+            vol.Required(
+                CONF_BACKFILL_CONCURRENCY,
+                default=defaults.get(CONF_BACKFILL_CONCURRENCY, DEFAULT_BACKFILL_CONCURRENCY)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+            vol.Required(
+                CONF_BACKFILL_RATE,
+                default=defaults.get(CONF_BACKFILL_RATE, DEFAULT_BACKFILL_RATE)
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=10)),
+            vol.Required(
+                CONF_LOOP_BLOCK_THRESHOLD,
+                default=defaults.get(CONF_LOOP_BLOCK_THRESHOLD, DEFAULT_LOOP_BLOCK_THRESHOLD)
+            ): vol.All(vol.Coerce(int), vol.Range(min=10, max=10000)),
+            vol.Required(
+                CONF_ARCHIVE_QUARTER_HOUR,
+                default=defaults.get(CONF_ARCHIVE_QUARTER_HOUR, False)
+            ): bool,
+            vol.Required(
+                CONF_ARCHIVE_HISTORY,
+                default=defaults.get(CONF_ARCHIVE_HISTORY, False)
+            ): bool,
+            vol.Required(
+                CONF_BASE_URL,
+                default=defaults.get(CONF_BASE_URL, BASE_URL)
+            ): str,
+        }
+    )
+
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
-    client = FroniusEnergyClient(data[CONF_USERNAME], data[CONF_PASSWORD], hass)
+    client = FroniusEnergyClient(
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+        base_url=data.get(CONF_BASE_URL, BASE_URL),
+    )
 
     try:
         await client.login()
@@ -143,8 +200,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Manage the options."""
-        if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+        errors: dict[str, str] = {}
 
         # Get current values from config entry
         current_values = {
@@ -172,10 +228,52 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_PRICE_COMMUNITY_FEED_IN, DEFAULT_PRICE_COMMUNITY_FEED_IN
                 ),
             ),
+            CONF_BACKFILL_YEARS: self.config_entry.options.get(
+                CONF_BACKFILL_YEARS, DEFAULT_BACKFILL_YEARS
+            ),
+            CONF_BACKFILL_CONCURRENCY: self.config_entry.options.get(
+                CONF_BACKFILL_CONCURRENCY, DEFAULT_BACKFILL_CONCURRENCY
+            ),
+            CONF_BACKFILL_RATE: self.config_entry.options.get(
+                CONF_BACKFILL_RATE, DEFAULT_BACKFILL_RATE
+            ),
+            CONF_LOOP_BLOCK_THRESHOLD: self.config_entry.options.get(
+                CONF_LOOP_BLOCK_THRESHOLD, DEFAULT_LOOP_BLOCK_THRESHOLD
+            ),
+            CONF_ARCHIVE_QUARTER_HOUR: self.config_entry.options.get(
+                CONF_ARCHIVE_QUARTER_HOUR, False
+            ),
+            CONF_ARCHIVE_HISTORY: self.config_entry.options.get(
+                CONF_ARCHIVE_HISTORY, False
+            ),
+            CONF_BASE_URL: self.config_entry.options.get(
+                CONF_BASE_URL, self.config_entry.data.get(CONF_BASE_URL, BASE_URL)
+            ),
         }
 
+        if user_input is not None:
+            base_url = user_input.get(CONF_BASE_URL, BASE_URL)
+            if base_url != current_values[CONF_BASE_URL]:
+                # Same login check as the user step, against the new address
+                try:
+                    await validate_input(
+                        self.hass, {**self.config_entry.data, CONF_BASE_URL: base_url}
+                    )
+                except InvalidAuth:
+                    errors["base"] = "cannot_connect"
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Unexpected exception")
+                    errors["base"] = "unknown"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+            current_values.update(user_input)
+
         return self.async_show_form(
-            step_id="init", data_schema=get_pricing_schema(current_values)
+            step_id="init",
+            data_schema=get_pricing_schema(current_values).extend(
+                get_tuning_schema(current_values).schema
+            ),
+            errors=errors,
         )
 
 
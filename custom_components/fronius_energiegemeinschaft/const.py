@@ -10,6 +10,15 @@ CONF_PRICE_COMMUNITY_CONSUMPTION = "price_community_consumption"
 CONF_PRICE_GRID_FEED_IN = "price_grid_feed_in"
 CONF_PRICE_COMMUNITY_FEED_IN = "price_community_feed_in"
 
+# Backfill configuration keys
+CONF_BACKFILL_YEARS = "backfill_years"
+CONF_BACKFILL_CONCURRENCY = "backfill_concurrency"
+CONF_BACKFILL_RATE = "backfill_rate"
+CONF_LOOP_BLOCK_THRESHOLD = "loop_block_threshold"
+CONF_ARCHIVE_QUARTER_HOUR = "archive_quarter_hour"
+CONF_ARCHIVE_HISTORY = "archive_history"
+CONF_BASE_URL = "base_url"
+
 # Default prices (€/kWh)
 DEFAULT_PRICE_GRID_CONSUMPTION = 0.35
 DEFAULT_PRICE_COMMUNITY_CONSUMPTION = 0.25
@@ -25,10 +34,119 @@ API_COMMUNITY_ENERGY = "/vis/community/{community_id}/energy_data"
 API_COUNTER_POINT = "/vis/counter_point"
 API_COUNTER_POINT_ENERGY = "/vis/counter_point/{counter_point_id}/energy_data"
 
-# Update interval
-UPDATE_INTERVAL = 300  # 5 minutes
+# Update intervals per coordinator
+UPDATE_INTERVAL = 300  # Counter point data, 5 minutes
+COMMUNITY_UPDATE_INTERVAL = 900  # Community data, 15 minutes
+STATISTICS_UPDATE_INTERVAL = 1800  # Recorder statistics of changed months, 30 minutes
+COORDINATOR_JITTER = 0.1  # Random share of the interval added to / taken from each refresh
+
+# Circuit breaker per portal host, shared by all entries (api_client.CircuitBreaker)
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive failed requests before requests are stopped
+CIRCUIT_RESET_TIMEOUT = 120  # Seconds until a single probe request is let through
+CIRCUIT_MAX_RESET_TIMEOUT = 1800  # Cap of the timeout, doubled after every failed probe
+ATTR_STALE_SINCE = "stale_since"
+
+# Request scheduler per portal account, shared by all entries (api_client.RequestScheduler)
+SCHEDULER_CONCURRENCY = 4  # Requests running at once per account
+SCHEDULER_FOREGROUND_RESERVE = 1  # Slots sweep and backfill requests never take
+
+# Refreshes a community / counter point must be missing before its sensors are removed
+ENTITY_REMOVAL_GRACE = 3
+
+# Quarter-hour load profiles (view=day)
+LOAD_PROFILE_DAYS = 7  # Days kept per counter point in the ring buffer
+LOAD_PROFILE_SLOTS = 96  # 15-minute slots per day
+LOAD_PROFILE_RETRY = 3600  # Seconds before re-requesting a day without (complete) data
+LOAD_PROFILE_SETTLE_DAYS = 3  # Incomplete days this recent (incl. today) are fetched again
+
+# Event loop watchdog
+DEFAULT_LOOP_BLOCK_THRESHOLD = 100  # Milliseconds a synchronous stage may hold the loop
+
+# Statistics backfill (background job)
+DEFAULT_BACKFILL_YEARS = 1
+DEFAULT_BACKFILL_CONCURRENCY = 2
+DEFAULT_BACKFILL_RATE = 1.0  # Requests per second
+BACKFILL_RETRY_DELAY = 600  # Seconds before failed months are retried
+BACKFILL_MAX_ROUNDS = 3  # Retry rounds per run; leftovers resume on next start
+STORAGE_VERSION = 1
+
+# Binary archive of daily / quarter-hour series
+ARCHIVE_COMPACT_TAIL = 64  # Revised records tolerated in the unsorted tail before compaction
+
+# Revision sweep: stored months re-checked in rotation for portal corrections
+REVISION_SWEEP_INTERVAL = 1800  # Seconds between sweep steps
+REVISION_SWEEP_BATCH = 2  # Months re-fetched per sweep step
+
+# Anomaly detection on daily counter point series
+ANOMALY_SPAN = 8  # EWMA span in samples of the same weekday (about two months)
+ANOMALY_MIN_SAMPLES = 4  # Samples per weekday before outliers are reported
+ANOMALY_Z_THRESHOLD = 4.0  # Standard deviations from the weekday mean
+ANOMALY_MIN_STD = 0.2  # kWh; floor for the deviation of very regular flows
+ANOMALY_FLATLINE_DAYS = 3  # Consecutive identical daily values
+ANOMALY_FLATLINE_LEVEL = 0.1  # kWh; flows below this typical level are not flatline-checked
+EVENT_ANOMALY = f"{DOMAIN}_anomaly"
+
+# Fired once per newly published or revised day of a community / counter point
+EVENT_NEW_DATA = f"{DOMAIN}_new_data"
+
+# Services
+SERVICE_EXPORT_HISTORY = "export_history"
+SERVICE_PROFILE_REFRESH = "profile_refresh"
+SERVICE_COMPARE_TARIFFS = "compare_tariffs"
+SERVICE_SIMULATE_BATTERY = "simulate_battery"
+
+# Battery simulation
+DEFAULT_BATTERY_EFFICIENCY = 0.9  # Round-trip efficiency
+BATTERY_MAX_CONFIGURATIONS = 200  # Capacity/power combinations per service call
+BATTERY_MAX_MONTHS = 36  # Timeline length per service call
+BATTERY_CHUNK_STEPS = 2880  # Steps whose limits are precomputed at once (30 quarter-hour days)
+
+# Caching proxy (proxy.py)
+PROXY_DEFAULT_PORT = 8780
+PROXY_CACHE_ENTRIES = 4096  # Responses kept, least recently used dropped first
+PROXY_TTL_LIST = 900  # Seconds; community and counter point lists
+PROXY_TTL_CURRENT = 300  # Periods that end less than PROXY_SETTLE_DAYS ago (still filling)
+PROXY_TTL_SETTLING = 3600  # Periods ended less than PROXY_REVISION_DAYS ago (late corrections)
+PROXY_TTL_CLOSED = 86400  # Older periods
+PROXY_SETTLE_DAYS = 3  # Smart meter data arrives about two days late
+PROXY_REVISION_DAYS = 35
+PROXY_SESSION_TTL = 7 * 86400  # Seconds; instances log in again after a 401
+PROXY_MAX_SESSIONS = 256  # Oldest sessions dropped first
+
+# Command-line tool (cli.py)
+CLI_DEFAULT_CONCURRENCY = 4
+CLI_DEFAULT_RATE = 2.0  # Requests per second
+CLI_PROGRESS_INTERVAL = 10  # Seconds between throughput reports
+CLI_RETRIES = 3  # Retries of a request after a transient error
+CLI_RETRY_DELAY = 5.0  # Seconds before the first retry, doubled for each further one
+
+# Refresh profiler
+PROFILE_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples of the loop thread
+PROFILE_LAG_INTERVAL = 0.05  # Seconds between event loop lag probes
+
+# History export
+EXPORT_CHUNK_ROWS = 5000  # Rows buffered before each write to disk
+EXPORT_DEFAULT_MONTHS = 12
 
 # Data keys
-DATA_COORDINATOR = "coordinator"
+DATA_COORDINATORS = "coordinators"
 DATA_CLIENT = "client"
 DATA_PRICING = "pricing"
+DATA_LOAD_PROFILES = "load_profiles"
+DATA_NEW_DATA = "new_data"
+DATA_KPI = "kpi"
+DATA_ANOMALIES = "anomalies"
+DATA_BACKFILL = "backfill"
+DATA_MONTH_TOTALS = "month_totals"
+DATA_WATCHDOG = "watchdog"
+DATA_ARCHIVE = "archive"
+DATA_CIRCUIT_BREAKER = "circuit_breaker"
+DATA_SCHEDULER = "scheduler"
+
+# hass.data keys (next to DOMAIN) of the circuit breakers by portal host and
+# the request schedulers by (host, username)
+CIRCUIT_BREAKERS = f"{DOMAIN}_circuit_breakers"
+REQUEST_SCHEDULERS = f"{DOMAIN}_request_schedulers"
+
+# Dispatcher signals
+SIGNAL_BACKFILL_PROGRESS = f"{DOMAIN}_backfill_progress_{{}}"
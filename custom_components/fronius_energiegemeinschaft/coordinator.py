@@ -0,0 +1,118 @@
+"""Update coordinators with staggered, jittered schedules.
+
+Community data, counter point data and statistics maintenance each have
+their own coordinator and interval. Every coordinator of every entry gets a
+fixed phase offset derived from the entry id and the resource, and each
+refresh is rescheduled with random jitter, so several entries (and the
+resources of one entry) do not hit the portal at the same instant.
+
+While the portal is unavailable, a coordinator that already has data keeps
+it (marked with stale_since) instead of failing, so entities stay available;
+everything except the last ~2 days is final anyway.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .api_client import PortalUnavailableError
+
+from .const import COORDINATOR_JITTER, DOMAIN
+from .watchdog import LoopWatchdog
+
+# Resources with their own coordinator; the first two are coordinator data sections
+COORDINATOR_COMMUNITIES = "communities"
+COORDINATOR_COUNTER_POINTS = "counter_points"
+COORDINATOR_STATISTICS = "statistics"
+SECTIONS = (COORDINATOR_COMMUNITIES, COORDINATOR_COUNTER_POINTS)
+
+
+def phase_offset(entry_id: str, resource: str, interval: timedelta) -> timedelta:
+    """Return a stable offset within one interval for an entry's resource."""
+    digest = hashlib.blake2b(f"{entry_id}:{resource}".encode(), digest_size=8).digest()
+    fraction = int.from_bytes(digest, "big") / 2**64
+    return timedelta(seconds=interval.total_seconds() * fraction)
+
+
+class FroniusDataUpdateCoordinator(DataUpdateCoordinator):
+    """Coordinator with phase offset and jitter that reports slow state writes.
+
+    The first refresh (at setup) runs immediately. The refresh after it
+    comes the interval plus the phase offset later, every following one the
+    interval later; each delay is varied by plus or minus COORDINATOR_JITTER
+    of the interval.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        logger: logging.Logger,
+        watchdog: LoopWatchdog,
+        *,
+        resource: str,
+        update_method,
+        update_interval: timedelta,
+        phase: timedelta = timedelta(0),
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            logger,
+            name=f"{DOMAIN} {resource}",
+            update_method=update_method,
+            update_interval=update_interval,
+        )
+        self.resource = resource
+        self.watchdog = watchdog
+        self._base_interval = update_interval
+        self._phase = phase
+        # Set while the data is kept from before a portal outage
+        self.stale_since: datetime | None = None
+
+    async def _async_update_data(self):
+        """Fetch data, then pick the delay of the next refresh."""
+        try:
+            data = await super()._async_update_data()
+        except PortalUnavailableError as err:
+            if self.data is None:
+                raise
+            if self.stale_since is None:
+                self.stale_since = dt_util.utcnow()
+                self.logger.warning(
+                    "Portal unavailable, keeping the last %s data until it answers: %s",
+                    self.resource,
+                    err,
+                )
+            return self.data
+        else:
+            if self.stale_since is not None:
+                self.logger.info("Fresh %s data after the portal outage", self.resource)
+                self.stale_since = None
+            return data
+        finally:
+            jitter = self._base_interval.total_seconds() * COORDINATOR_JITTER
+            self.update_interval = (
+                self._base_interval
+                + self._phase
+                + timedelta(seconds=random.uniform(-jitter, jitter))
+            )
+            self._phase = timedelta(0)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners (entity state writes)."""
+        with self.watchdog.blocking(f"state writes ({self.resource})"):
+            super().async_update_listeners()
+
+
+def merged_data(coordinators: dict[str, FroniusDataUpdateCoordinator]) -> dict:
+    """Return {"communities": ..., "counter_points": ...} of the data coordinators."""
+    return {
+        section: (coordinators[section].data or {}).get(section, {}) for section in SECTIONS
+    }
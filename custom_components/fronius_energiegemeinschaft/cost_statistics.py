@@ -0,0 +1,142 @@
+"""Monthly cost statistics written to the Home Assistant recorder."""
+from __future__ import annotations
+
+import logging
+import zoneinfo
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .energy_data import extract_value, iter_daily_values
+
+_LOGGER = logging.getLogger(__name__)
+
+# Flows that enter the cost formula, in the order they are stored
+COST_FLOWS = ("cgrid", "crec", "fgrid", "frec")
+
+
+def last_n_months(n: int, reference: datetime | None = None) -> list[str]:
+    """Return list of YYYY-MM strings for the last n months, oldest first."""
+    if reference is None:
+        reference = datetime.now()
+    months = []
+    dt = reference.replace(day=1)
+    for _ in range(n):
+        months.append(dt.strftime("%Y-%m"))
+        dt = (dt - timedelta(days=1)).replace(day=1)
+    return list(reversed(months))
+
+
+def month_totals_from_energy_data(energy_data: dict) -> list[float] | None:
+    """Return [cgrid, crec, fgrid, frec] of a counter point month view, None if empty."""
+    total_data = (energy_data.get("total") or {}).get("total") or {}
+    if not total_data:
+        return None
+    return [extract_value(total_data.get(flow)) or 0.0 for flow in COST_FLOWS]
+
+
+def month_totals_from_year_view(energy_data: dict) -> dict[str, list[float]]:
+    """Return {YYYY-MM: [cgrid, crec, fgrid, frec]} of a counter point year view.
+
+    Months the response has no entry for are omitted.
+    """
+    result = {}
+    for day, flows in iter_daily_values(energy_data):
+        if any(flow in flows for flow in COST_FLOWS):
+            result[day[:7]] = [flows.get(flow, 0.0) for flow in COST_FLOWS]
+    return result
+
+
+def month_totals_from_segment(segment) -> list[float] | None:
+    """Return [cgrid, crec, fgrid, frec] from a MonthSegment's totals, None if empty."""
+    values = [segment.totals.get(flow) for flow in COST_FLOWS]
+    if all(value is None for value in values):
+        return None
+    return [value or 0.0 for value in values]
+
+
+def net_cost(totals: list[float], pricing: dict) -> float:
+    """Return consumption cost minus feed-in revenue for [cgrid, crec, fgrid, frec]."""
+    cgrid, crec, fgrid, frec = totals
+    consumption_cost = (
+        cgrid * pricing["grid_consumption"] + crec * pricing["community_consumption"]
+    )
+    feed_in_revenue = fgrid * pricing["grid_feed_in"] + frec * pricing["community_feed_in"]
+    return consumption_cost - feed_in_revenue
+
+
+def statistic_id(cp_id: int) -> str:
+    """Return the external statistic id of a counter point's monthly cost."""
+    return f"{DOMAIN}:counter_point_{cp_id}_monthly_cost"
+
+
+def async_write_cost_statistics(
+    hass: HomeAssistant,
+    cp_id: int,
+    cp_number: str,
+    month_totals: dict[str, list[float] | None],
+    pricing: dict,
+    from_month: str | None = None,
+) -> int:
+    """Write monthly cost statistics from stored month totals.
+
+    The cumulative sum always starts at the oldest known month, so writing
+    only the months from ``from_month`` on keeps earlier rows untouched while
+    every later row gets a correct running total. Returns the number of rows.
+    """
+    # HA 2024+ has all three in recorder.statistics; older versions split across models
+    try:
+        from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
+            StatisticData,
+            StatisticMetaData,
+            async_add_external_statistics,
+        )
+    except ImportError:
+        try:
+            from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
+                async_add_external_statistics,
+            )
+            from homeassistant.components.recorder.models import (  # noqa: PLC0415
+                StatisticData,
+                StatisticMetaData,
+            )
+        except ImportError:
+            _LOGGER.warning("Recorder statistics API not available — skipping historical stats")
+            return 0
+
+    tz = zoneinfo.ZoneInfo(hass.config.time_zone)
+
+    metadata = StatisticMetaData(
+        has_mean=False,
+        has_sum=True,
+        name=f"Counter Point {cp_number} Monthly Cost",
+        source=DOMAIN,
+        statistic_id=statistic_id(cp_id),
+        unit_of_measurement="€",
+    )
+
+    statistics = []
+    cumulative_sum = 0.0
+    for month_str in sorted(month_totals):
+        totals = month_totals[month_str]
+        if totals is None:
+            continue
+        cost = net_cost(totals, pricing)
+        cumulative_sum += cost
+        if from_month is not None and month_str < from_month:
+            continue
+        dt = datetime.strptime(month_str, "%Y-%m").replace(tzinfo=tz)
+        statistics.append(
+            StatisticData(start=dt, state=round(cost, 2), sum=round(cumulative_sum, 2))
+        )
+
+    if statistics:
+        async_add_external_statistics(hass, metadata, statistics)
+        _LOGGER.debug(
+            "Wrote %d monthly cost statistics for counter point %s (id=%s)",
+            len(statistics),
+            cp_number,
+            cp_id,
+        )
+    return len(statistics)
@@ -0,0 +1,114 @@
+"""Diagnostics support for Fronius Energiegemeinschaft."""
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from .const import (
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    DATA_ARCHIVE,
+    DATA_CIRCUIT_BREAKER,
+    DATA_COORDINATORS,
+    DATA_LOAD_PROFILES,
+    DATA_PRICING,
+    DATA_SCHEDULER,
+    DATA_WATCHDOG,
+    DOMAIN,
+)
+from .coordinator import merged_data
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+def _deep_sizeof(obj: Any, seen: set[int]) -> int:
+    """Return the approximate memory footprint of obj and everything it references.
+
+    Objects reachable through several paths (e.g. interned date strings shared
+    by all series) are counted once.
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        pass
+    else:
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    size += _deep_sizeof(getattr(obj, slot), seen)
+        if hasattr(obj, "__dict__"):
+            size += _deep_sizeof(vars(obj), seen)
+    return size
+
+
+def _memory_report(hass: HomeAssistant, entry: ConfigEntry, entry_data: dict) -> dict:
+    """Estimate the memory held by this entry, to size low-RAM hosts."""
+    data = merged_data(entry_data[DATA_COORDINATORS])
+    seen: set[int] = set()
+
+    sections = {}
+    for section in ("communities", "counter_points"):
+        items = data.get(section, {})
+        sections[section] = {
+            "count": len(items),
+            "bytes": sum(_deep_sizeof(item, seen) for item in items.values()),
+            "days": sum(len(item["energy"]) for item in items.values()),
+        }
+
+    load_profiles = entry_data[DATA_LOAD_PROFILES]
+    load_profile_bytes = _deep_sizeof(load_profiles.buffers, seen)
+
+    entity_count = len(er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id))
+
+    return {
+        "coordinator_data_bytes": sections["communities"]["bytes"]
+        + sections["counter_points"]["bytes"],
+        "communities": sections["communities"],
+        "counter_points": sections["counter_points"],
+        "load_profiles": {
+            "counter_points": len(load_profiles.buffers),
+            "bytes": load_profile_bytes,
+        },
+        "entities": entity_count,
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinators = entry_data[DATA_COORDINATORS]
+    data = merged_data(coordinators)
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "pricing": entry_data[DATA_PRICING],
+        "coordinators": {
+            resource: {
+                "last_update_success": coordinator.last_update_success,
+                "next_interval_s": round(coordinator.update_interval.total_seconds()),
+                "stale_since": coordinator.stale_since,
+            }
+            for resource, coordinator in coordinators.items()
+        },
+        "communities": [item["info"] for item in data.get("communities", {}).values()],
+        "counter_points": [item["info"] for item in data.get("counter_points", {}).values()],
+        "memory": _memory_report(hass, entry, entry_data),
+        "loop_watchdog": entry_data[DATA_WATCHDOG].as_dict(),
+        "circuit_breaker": entry_data[DATA_CIRCUIT_BREAKER].as_dict(),
+        "request_scheduler": entry_data[DATA_SCHEDULER].as_dict(),
+        "archive": await hass.async_add_executor_job(entry_data[DATA_ARCHIVE].stats),
+    }
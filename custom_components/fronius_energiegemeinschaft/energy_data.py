@@ -0,0 +1,317 @@
+"""Parsing helpers for Fronius Energiegemeinschaft energy_data responses."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import sys
+from array import array
+from collections.abc import Iterator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Energy flows reported by the portal for communities and counter points
+FLOWS = ("crec", "cgrid", "ctotal", "frec", "fgrid", "ftotal")
+
+# Info fields kept from the community / counter point lists
+COMMUNITY_INFO_KEYS = ("id", "name", "rc_number")
+COUNTER_POINT_INFO_KEYS = ("id", "counter_number", "counter_point_number", "energy_direction")
+
+
+def month_range(start: str, end: str) -> list[str]:
+    """Return YYYY-MM strings from start to end (inclusive), oldest first."""
+    year, month = (int(part) for part in start.split("-"))
+    end_year, end_month = (int(part) for part in end.split("-"))
+    months = []
+    while (year, month) <= (end_year, end_month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def slim_info(info: dict, keys: tuple[str, ...]) -> dict:
+    """Return only the info fields the integration uses, with interned strings."""
+    return {
+        key: sys.intern(value) if isinstance(value, str) else value
+        for key, value in info.items()
+        if key in keys
+    }
+
+
+def extract_value(val) -> float | None:
+    """Extract float from API value (dict with 'value' key, or direct string/number).
+
+    Returns None if the value is missing or not numeric.
+    """
+    if isinstance(val, dict):
+        val = val.get("value")
+    if val is None or val == "":
+        return None
+    try:
+        return float(val)
+    except (ValueError, TypeError):
+        return None
+
+
+def iter_entries(data_section, rc_key: str | None = None) -> Iterator[tuple[str, dict]]:
+    """Iterate (timestamp, values) entries of an energy_data 'data' section.
+
+    Handles all shapes the portal has returned so far:
+    - {"RC12345": {"2026-02-01T00:00:00+01:00": {"crec": {...}, ...}}}
+    - {"2026-02-01T00:00:00+01:00": {"crec": {...}, ...}}
+    - [{"date": "2026-02-01T00:00:00+01:00", "crec": {...}, ...}]
+    - [] when no data is available yet
+
+    If rc_key is given and present, that wrapper is used instead of the first one.
+    """
+    if rc_key and isinstance(data_section, dict) and rc_key in data_section:
+        data_section = data_section[rc_key]
+    elif isinstance(data_section, dict) and data_section:
+        first = next(iter(data_section.values()))
+        if isinstance(first, (dict, list)) and not any(k in first for k in FLOWS):
+            # Wrapped by rc_key
+            data_section = first
+
+    if isinstance(data_section, dict):
+        yield from data_section.items()
+    elif isinstance(data_section, list):
+        for item in data_section:
+            if isinstance(item, dict):
+                ts = item.get("date", item.get("datetime", item.get("date_time", "")))
+                if ts:
+                    yield ts, item
+                else:
+                    _LOGGER.debug("List item has no date field, keys: %s", list(item.keys()))
+    elif data_section is not None:
+        _LOGGER.warning("Unexpected data type for energy data: %s", type(data_section))
+
+
+def iter_daily_values(
+    energy_data: dict, rc_key: str | None = None
+) -> Iterator[tuple[str, dict[str, float]]]:
+    """Iterate (YYYY-MM-DD, {flow: kWh}) for each entry of a month view response.
+
+    Flows missing from an entry are omitted from its dict.
+    """
+    for ts, values in iter_entries(energy_data.get("data"), rc_key):
+        if not isinstance(values, dict):
+            continue
+        flows = {}
+        for flow in FLOWS:
+            value = extract_value(values.get(flow))
+            if value is not None:
+                flows[flow] = value
+        yield str(ts).split("T")[0], flows
+
+
+class MonthSegment:
+    """Immutable parsed data of one month view response.
+
+    Segments are never modified after construction, so the same object can be
+    shared by consecutive coordinator snapshots while its month is unchanged.
+    Dates are interned and each flow is a float array aligned with them;
+    missing values are NaN.
+    """
+
+    __slots__ = ("month", "dates", "_values", "totals", "total_meta", "unit", "fingerprint")
+
+    def __init__(
+        self,
+        month: str,
+        dates: tuple[str, ...],
+        values: dict[str, array],
+        totals: dict[str, float | None],
+        total_meta: dict[str, dict],
+        unit: str,
+    ) -> None:
+        """Initialize the segment."""
+        self.month = month
+        self.dates = dates
+        self._values = values
+        self.totals = totals
+        self.total_meta = total_meta
+        self.unit = unit
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(repr((month, dates, sorted(totals.items()), unit)).encode())
+        for flow in FLOWS:
+            if flow in values:
+                digest.update(flow.encode())
+                digest.update(values[flow].tobytes())
+        self.fingerprint = digest.hexdigest()
+
+    @classmethod
+    def from_energy_data(
+        cls, month: str, energy_data: dict, total_key: str, rc_key: str | None = None
+    ) -> MonthSegment:
+        """Parse a month view response.
+
+        total_key selects the totals block ("total" for counter points, the
+        rc_number for communities).
+        """
+        days: dict[str, dict[str, float]] = {}
+        for day, flows in iter_daily_values(energy_data, rc_key):
+            days[day] = flows
+
+        dates = tuple(sys.intern(day) for day in sorted(days))
+        values = {}
+        for flow in FLOWS:
+            if any(flow in days[day] for day in dates):
+                values[flow] = array("d", (days[day].get(flow, math.nan) for day in dates))
+
+        total_section = energy_data.get("total")
+        total_data = {}
+        if isinstance(total_section, dict) and isinstance(total_section.get(total_key), dict):
+            total_data = total_section[total_key]
+        totals = {flow: extract_value(total_data.get(flow)) for flow in FLOWS}
+        total_meta = {
+            flow: {
+                "value_type": total_data[flow].get("value_type"),
+                "null_values": total_data[flow].get("null_values"),
+            }
+            for flow in FLOWS
+            if isinstance(total_data.get(flow), dict)
+        }
+        meta = energy_data.get("meta") or {}
+        unit = meta.get("unit", "kWh") if isinstance(meta, dict) else "kWh"
+        return cls(sys.intern(month), dates, values, totals, total_meta, sys.intern(unit))
+
+    def raw_value(self, flow: str, index: int) -> float:
+        """Return the value of a flow on the day at index (NaN if missing)."""
+        values = self._values.get(flow)
+        return math.nan if values is None else values[index]
+
+    def has_flow(self, flow: str) -> bool:
+        """Return True if any day reports the flow."""
+        return flow in self._values
+
+
+class EnergySeries:
+    """Read-only view over the month segments of one community or counter point.
+
+    Segments are ordered oldest first; on overlapping dates the newer segment
+    wins. Totals, totals metadata and unit come from the newest segment. The
+    merged date index is built lazily on first access, nothing is copied.
+    """
+
+    __slots__ = ("segments", "_dates", "_index")
+
+    def __init__(self, segments: tuple[MonthSegment, ...]) -> None:
+        """Initialize the view."""
+        self.segments = segments
+        self._dates: tuple[str, ...] | None = None
+        self._index: list[tuple[MonthSegment, int]] | None = None
+
+    def _build_index(self) -> None:
+        if len(self.segments) == 1:
+            segment = self.segments[0]
+            self._dates = segment.dates
+            self._index = [(segment, i) for i in range(len(segment.dates))]
+            return
+        located: dict[str, tuple[MonthSegment, int]] = {}
+        for segment in self.segments:
+            for i, day in enumerate(segment.dates):
+                located[day] = (segment, i)
+        self._dates = tuple(sorted(located))
+        self._index = [located[day] for day in self._dates]
+
+    @property
+    def dates(self) -> tuple[str, ...]:
+        """Return all dates, oldest first."""
+        if self._dates is None:
+            self._build_index()
+        return self._dates
+
+    @property
+    def totals(self) -> dict[str, float | None]:
+        """Return the totals of the newest month."""
+        return self.segments[-1].totals if self.segments else {}
+
+    @property
+    def total_meta(self) -> dict[str, dict]:
+        """Return value_type/null_values of the newest month's totals."""
+        return self.segments[-1].total_meta if self.segments else {}
+
+    @property
+    def unit(self) -> str:
+        """Return the unit of the newest month."""
+        return self.segments[-1].unit if self.segments else "kWh"
+
+    def __len__(self) -> int:
+        """Return the number of days."""
+        return len(self.dates)
+
+    def same_as(self, other: EnergySeries | None) -> bool:
+        """Return True if both views share exactly the same segments."""
+        return (
+            other is not None
+            and len(other.segments) == len(self.segments)
+            and all(a is b for a, b in zip(self.segments, other.segments))
+        )
+
+    def has_flow(self, flow: str) -> bool:
+        """Return True if any day reports the flow."""
+        return any(segment.has_flow(flow) for segment in self.segments)
+
+    def raw_value(self, flow: str, index: int) -> float:
+        """Return the value of a flow on the day at index (NaN if missing)."""
+        if self._index is None:
+            self._build_index()
+        segment, i = self._index[index]
+        return segment.raw_value(flow, i)
+
+    def value(self, flow: str, index: int) -> float:
+        """Return the value of a flow on the day at index, 0.0 if missing."""
+        value = self.raw_value(flow, index)
+        return 0.0 if math.isnan(value) else value
+
+    def daily(self, flow: str) -> dict[str, float]:
+        """Return {date: kWh} for days that report the flow."""
+        if self._index is None:
+            self._build_index()
+        result = {}
+        for day, (segment, i) in zip(self._dates, self._index):
+            value = segment.raw_value(flow, i)
+            if not math.isnan(value):
+                result[day] = value
+        return result
+
+
+class SegmentCache:
+    """Share unchanged month segments and series views across refreshes."""
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self._segments: dict[tuple, MonthSegment] = {}
+        self._series: dict[tuple, EnergySeries] = {}
+
+    def series(self, key: tuple, segments: list[MonthSegment]) -> EnergySeries:
+        """Return the view for an entity, reusing previous objects where unchanged.
+
+        A segment whose fingerprint matches the stored one for the same month
+        is replaced by the stored object. If all segments are reused, the
+        previous view itself is returned, so entities can detect "no change"
+        with an identity check.
+        """
+        shared = []
+        for segment in segments:
+            segment_key = (*key, segment.month)
+            previous = self._segments.get(segment_key)
+            if previous is not None and previous.fingerprint == segment.fingerprint:
+                segment = previous
+            else:
+                self._segments[segment_key] = segment
+            shared.append(segment)
+
+        series = EnergySeries(tuple(shared))
+        previous_series = self._series.get(key)
+        if series.same_as(previous_series):
+            return previous_series
+        self._series[key] = series
+        return series
+
+    def prune(self, keys: set[tuple], months: set[str]) -> None:
+        """Drop entries of entities or months no longer in use."""
+        self._segments = {
+            k: v for k, v in self._segments.items() if k[:-1] in keys and k[-1] in months
+        }
+        self._series = {k: v for k, v in self._series.items() if k in keys}
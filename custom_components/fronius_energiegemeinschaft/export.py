@@ -0,0 +1,190 @@
+"""Streaming export of energy history to CSV or Parquet files.
+
+Months are fetched one at a time and turned into rows by an async generator.
+Rows are written in chunks of EXPORT_CHUNK_ROWS from the executor, so memory
+use is bounded by one month per entity plus one chunk, and the event loop
+never waits on disk I/O.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import os
+from collections.abc import AsyncIterator
+from datetime import datetime
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import EXPORT_CHUNK_ROWS
+from .energy_data import FLOWS, iter_daily_values
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ("source", "id", "name", "date", *FLOWS)
+EXPORT_FORMATS = ("csv", "parquet")
+
+
+async def async_iter_history_rows(
+    client,
+    communities: list[dict],
+    counter_points: list[dict],
+    months: list[str],
+    skipped: list[str] | None = None,
+) -> AsyncIterator[tuple]:
+    """Yield one row per entity and day, fetching a single month at a time.
+
+    Months that cannot be fetched are logged, appended to ``skipped`` and left
+    out of the export.
+    """
+    targets = [
+        ("community", info["id"], info.get("name", ""), client.get_community_energy_data)
+        for info in communities
+    ] + [
+        (
+            "counter_point",
+            info["id"],
+            info.get("counter_number", str(info["id"])),
+            client.get_counter_point_energy_data,
+        )
+        for info in counter_points
+    ]
+
+    for source, target_id, name, fetch in targets:
+        for month_str in months:
+            try:
+                energy_data = await fetch(target_id, view="month", time=month_str)
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.warning(
+                    "Export: could not fetch %s %s month %s: %s",
+                    source, target_id, month_str, err,
+                )
+                if skipped is not None:
+                    skipped.append(f"{source}:{target_id}:{month_str}")
+                continue
+
+            days = sorted(
+                (day, flows)
+                for day, flows in iter_daily_values(energy_data)
+                if day.startswith(month_str)
+            )
+            for day, flows in days:
+                yield (source, str(target_id), name, day, *(flows.get(flow) for flow in FLOWS))
+
+
+class _CsvSink:
+    """Append rows to a CSV file, written to a temp file and renamed on close."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._tmp_path = path.with_name(f".{path.name}.tmp")
+        self._file = open(self._tmp_path, "w", newline="", encoding="utf-8")  # noqa: SIM115
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, rows: list[tuple]) -> None:
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class _ParquetSink:
+    """Append rows to a Parquet file as one row group per chunk."""
+
+    def __init__(self, path: Path) -> None:
+        try:
+            import pyarrow as pa  # noqa: PLC0415
+            import pyarrow.parquet as pq  # noqa: PLC0415
+        except ImportError as err:
+            raise HomeAssistantError(
+                "Parquet export requires the 'pyarrow' package; use format: csv instead"
+            ) from err
+
+        self._pa = pa
+        self._path = path
+        self._tmp_path = path.with_name(f".{path.name}.tmp")
+        self._schema = pa.schema(
+            [(column, pa.string()) for column in EXPORT_COLUMNS[:4]]
+            + [(flow, pa.float64()) for flow in FLOWS]
+        )
+        self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+
+    def write(self, rows: list[tuple]) -> None:
+        columns = list(zip(*rows))
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        self._writer.close()
+        os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        self._writer.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def _open_sink(fmt: str, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        return _ParquetSink(path)
+    return _CsvSink(path)
+
+
+def resolve_export_path(hass: HomeAssistant, filename: str | None, fmt: str) -> Path:
+    """Return the absolute export path, which must stay inside the config directory."""
+    if not filename:
+        filename = f"fronius_export_{datetime.now():%Y%m%d_%H%M%S}.{fmt}"
+    config_dir = Path(hass.config.path()).resolve()
+    path = Path(hass.config.path(filename)).resolve()
+    if config_dir not in path.parents:
+        raise HomeAssistantError(f"Export path must be inside {config_dir}: {filename}")
+    return path
+
+
+async def async_export_history(
+    hass: HomeAssistant,
+    client,
+    path: Path,
+    fmt: str,
+    communities: list[dict],
+    counter_points: list[dict],
+    months: list[str],
+) -> dict:
+    """Stream history for the given entities and months into a file."""
+    sink = await hass.async_add_executor_job(_open_sink, fmt, path)
+    skipped: list[str] = []
+    rows_written = 0
+    chunk: list[tuple] = []
+    try:
+        async for row in async_iter_history_rows(
+            client, communities, counter_points, months, skipped
+        ):
+            chunk.append(row)
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                await hass.async_add_executor_job(sink.write, chunk)
+                rows_written += len(chunk)
+                chunk = []
+        if chunk:
+            await hass.async_add_executor_job(sink.write, chunk)
+            rows_written += len(chunk)
+        await hass.async_add_executor_job(sink.close)
+    except BaseException:
+        await hass.async_add_executor_job(sink.abort)
+        raise
+
+    _LOGGER.info(
+        "Exported %d rows (%d months, %d entities) to %s",
+        rows_written, len(months), len(communities) + len(counter_points), path,
+    )
+    return {"path": str(path), "rows": rows_written, "skipped": skipped}
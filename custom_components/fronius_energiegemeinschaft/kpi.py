@@ -0,0 +1,201 @@
+"""Incrementally maintained KPIs (self-sufficiency, community shares).
+
+Each tracker keeps per-day flow values plus running sums for the rolling
+30-day window and the current month. A refresh only touches days of month
+segments that actually changed (identity check on the shared segments) and
+the days entering or leaving a window, never the full history.
+"""
+from __future__ import annotations
+
+import math
+from datetime import date, timedelta
+
+from .energy_data import FLOWS, EnergySeries
+
+ROLLING_DAYS = 30
+
+PERIOD_DAILY = "daily"
+PERIOD_MONTH = "month_to_date"
+PERIOD_ROLLING = "rolling_30_days"
+PERIODS = (PERIOD_DAILY, PERIOD_MONTH, PERIOD_ROLLING)
+
+KPI_SELF_SUFFICIENCY = "self_sufficiency"
+KPI_COMMUNITY_COVERAGE = "community_coverage"
+KPI_FEED_IN_SHARE = "feed_in_share"
+
+_CREC, _CGRID, _CTOTAL, _FREC, _FGRID, _FTOTAL = range(len(FLOWS))
+
+
+def _ratio(numerator: float, denominator: float) -> float | None:
+    if denominator <= 0:
+        return None
+    return round(numerator / denominator * 100, 1)
+
+
+def kpi_value(kpi: str, sums: list[float] | tuple[float, ...]) -> float | None:
+    """Return a KPI in percent from summed flows (None if undefined)."""
+    if kpi == KPI_SELF_SUFFICIENCY:
+        # Share of consumption not drawn from the grid
+        return _ratio(sums[_CTOTAL] - sums[_CGRID], sums[_CTOTAL])
+    if kpi == KPI_COMMUNITY_COVERAGE:
+        return _ratio(sums[_CREC], sums[_CTOTAL])
+    if kpi == KPI_FEED_IN_SHARE:
+        return _ratio(sums[_FREC], sums[_FTOTAL])
+    raise ValueError(f"Unknown KPI: {kpi}")
+
+
+class _Window:
+    """Running flow sums over a date range that ends at the latest day."""
+
+    __slots__ = ("start", "end", "sums")
+
+    def __init__(self) -> None:
+        self.start: date | None = None
+        self.end: date | None = None
+        self.sums = [0.0] * len(FLOWS)
+
+    def contains(self, day: date) -> bool:
+        return self.start is not None and self.start <= day <= self.end
+
+    def add(self, values: tuple[float, ...] | None, sign: int) -> None:
+        if values is not None:
+            for i, value in enumerate(values):
+                self.sums[i] += sign * value
+
+
+class KpiTracker:
+    """Running sums for one community or counter point."""
+
+    __slots__ = ("_days", "_segments", "_series", "_rolling", "_month", "latest")
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self._days: dict[date, tuple[float, ...]] = {}
+        self._segments: set[int] = set()
+        self._series: EnergySeries | None = None
+        self._rolling = _Window()
+        self._month = _Window()
+        self.latest: date | None = None
+
+    def update(self, series: EnergySeries) -> bool:
+        """Fold newly arrived or revised days into the running sums.
+
+        Returns True if any value changed.
+        """
+        if series is self._series:
+            return False
+        self._series = series
+
+        # Days before both windows were dropped and can never enter them again
+        horizon = self._horizon()
+        previous: dict[date, tuple[float, ...] | None] = {}
+        for segment in series.segments:
+            if id(segment) in self._segments:
+                continue
+            for index, day_str in enumerate(segment.dates):
+                day = date.fromisoformat(day_str)
+                if horizon is not None and day < horizon:
+                    continue
+                raw = (segment.raw_value(flow, index) for flow in FLOWS)
+                values = tuple(0.0 if math.isnan(v) else v for v in raw)
+                old = self._days.get(day)
+                if old != values:
+                    previous.setdefault(day, old)
+                    self._days[day] = values
+        self._segments = {id(segment) for segment in series.segments}
+
+        if not previous:
+            return False
+
+        latest = max(self._days)
+        self.latest = latest
+        self._slide(self._rolling, latest - timedelta(days=ROLLING_DAYS - 1), latest, previous)
+        self._slide(self._month, latest.replace(day=1), latest, previous)
+
+        # Days before both windows are no longer needed
+        horizon = self._horizon()
+        for day in [d for d in self._days if d < horizon]:
+            del self._days[day]
+        return True
+
+    def _horizon(self) -> date | None:
+        """Return the first day either window covers (None before the first update)."""
+        if self._rolling.start is None:
+            return None
+        return min(self._rolling.start, self._month.start)
+
+    def _slide(
+        self,
+        window: _Window,
+        start: date,
+        end: date,
+        previous: dict[date, tuple[float, ...] | None],
+    ) -> None:
+        """Move a window to [start, end] touching only changed, leaving and entering days."""
+        affected = set(previous)
+        if window.start is None or start > window.end or end < window.start:
+            # No overlap with the old window: rebuild from the stored days
+            window.sums = [0.0] * len(FLOWS)
+            window.start, window.end = start, end
+            for day, values in self._days.items():
+                if start <= day <= end:
+                    window.add(values, 1)
+            return
+
+        day = window.start
+        while day < start:  # leaving at the front
+            affected.add(day)
+            day += timedelta(days=1)
+        day = window.end + timedelta(days=1)
+        while day <= end:  # entering at the back
+            affected.add(day)
+            day += timedelta(days=1)
+
+        for day in affected:
+            old = previous[day] if day in previous else self._days.get(day)
+            if window.contains(day):
+                window.add(old, -1)
+            if start <= day <= end:
+                window.add(self._days.get(day), 1)
+        window.start, window.end = start, end
+
+    def value(self, kpi: str, period: str) -> float | None:
+        """Return a KPI in percent for a period."""
+        if self.latest is None:
+            return None
+        if period == PERIOD_DAILY:
+            return kpi_value(kpi, self._days[self.latest])
+        window = self._rolling if period == PERIOD_ROLLING else self._month
+        return kpi_value(kpi, window.sums)
+
+    def window(self, period: str) -> tuple[date, date] | None:
+        """Return the date range a period currently covers."""
+        if self.latest is None:
+            return None
+        if period == PERIOD_DAILY:
+            return self.latest, self.latest
+        window = self._rolling if period == PERIOD_ROLLING else self._month
+        return window.start, window.end
+
+
+class KpiManager:
+    """KPI trackers for all communities and counter points of an entry."""
+
+    def __init__(self) -> None:
+        """Initialize the manager."""
+        self.trackers: dict[tuple, KpiTracker] = {}
+
+    def update(self, data: dict) -> None:
+        """Update trackers from coordinator data and drop vanished entities.
+
+        Only the sections present in data are touched, so each coordinator
+        updates the trackers of its own section.
+        """
+        keys = set()
+        for section, items in data.items():
+            for item_id, item in items.items():
+                key = (section, item_id)
+                keys.add(key)
+                self.trackers.setdefault(key, KpiTracker()).update(item["energy"])
+        for key in [k for k in self.trackers if k[0] in data and k not in keys]:
+            del self.trackers[key]
@@ -0,0 +1,412 @@
+"""Quarter-hour load profiles for Fronius Energiegemeinschaft counter points.
+
+The portal records 15-minute values per counter point and serves them through
+the same ``energy_data`` endpoint with ``view=day``. Profiles are kept in a
+fixed-size ring buffer per counter point so memory stays bounded no matter how
+long Home Assistant runs, and persisted across restarts in the buffers' export
+format. Updates run as a background task at the sweep request priority, so a
+slow day view never holds up setup or the regular polling.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import math
+import sys
+import time
+from array import array
+from datetime import date, datetime, time as dt_time, timedelta, timezone, tzinfo
+
+import aiohttp
+
+from .api_client import (
+    PRIORITY_SWEEP,
+    PortalRequestError,
+    PortalUnavailableError,
+    request_priority,
+)
+from .const import (
+    DOMAIN,
+    LOAD_PROFILE_DAYS,
+    LOAD_PROFILE_RETRY,
+    LOAD_PROFILE_SETTLE_DAYS,
+    LOAD_PROFILE_SLOTS,
+)
+from .energy_data import FLOWS, extract_value, iter_entries
+
+_LOGGER = logging.getLogger(__name__)
+
+_NAN = float("nan")
+
+
+def parse_day_view(
+    energy_data: dict, day: str | None = None, tz: tzinfo | None = None
+) -> dict[str, list[float]]:
+    """Convert a day view response into 96 quarter-hour slots per flow.
+
+    Slots are indexed by local wall-clock time: timestamps with an offset
+    (including "Z") are converted to tz first, and with day given, entries
+    of other local days are skipped. On the DST fall-back day the repeated
+    hour is summed into the same slots; on spring-forward the skipped slots
+    stay NaN.
+    """
+    slots = {flow: [_NAN] * LOAD_PROFILE_SLOTS for flow in FLOWS}
+    if not isinstance(energy_data, dict):
+        _LOGGER.debug("Unexpected day view response type: %s", type(energy_data))
+        return slots
+    for ts, values in iter_entries(energy_data.get("data")):
+        try:
+            dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+        except ValueError:
+            _LOGGER.debug("Unparsable quarter-hour timestamp: %s", ts)
+            continue
+        if tz is not None and dt.tzinfo is not None:
+            dt = dt.astimezone(tz)
+        if day is not None and dt.date().isoformat() != day:
+            continue
+        index = (dt.hour * 60 + dt.minute) // 15
+        for flow in FLOWS:
+            value = extract_value(values.get(flow))
+            if value is None:
+                continue
+            current = slots[flow][index]
+            slots[flow][index] = value if math.isnan(current) else current + value
+    return slots
+
+
+def expected_slots(day: str, tz: tzinfo) -> int:
+    """Return the slots a complete day fills: 92 on spring-forward, 96 otherwise."""
+    start = date.fromisoformat(day)
+    begin = datetime.combine(start, dt_time(), tz).astimezone(timezone.utc)
+    end = datetime.combine(start + timedelta(days=1), dt_time(), tz).astimezone(timezone.utc)
+    return min(LOAD_PROFILE_SLOTS, int((end - begin).total_seconds()) // 900)
+
+
+def filled_slots(slots: dict[str, list[float]]) -> int:
+    """Return the number of slots any flow has a value for."""
+    columns = [values for values in slots.values() if len(values) == LOAD_PROFILE_SLOTS]
+    return sum(
+        1
+        for slot in range(LOAD_PROFILE_SLOTS)
+        if any(not math.isnan(values[slot]) for values in columns)
+    )
+
+
+class LoadProfileBuffer:
+    """Fixed-size ring buffer of quarter-hour values for one counter point.
+
+    All values live in a single preallocated ``array('d')`` laid out as
+    [day position][flow][slot]. Appending a day to a full buffer overwrites
+    the oldest day in place, so appends cost a fixed amount of work and the
+    footprint never grows.
+    """
+
+    __slots__ = ("_capacity", "_values", "_days", "_positions", "revision")
+
+    def __init__(self, capacity_days: int = LOAD_PROFILE_DAYS) -> None:
+        """Initialize the buffer."""
+        self._capacity = capacity_days
+        self._values = array("d", [_NAN]) * (
+            capacity_days * len(FLOWS) * LOAD_PROFILE_SLOTS
+        )
+        self._days: list[str | None] = [None] * capacity_days
+        self._positions: dict[str, int] = {}
+        # Incremented on every stored day, so readers can tell the buffer changed
+        self.revision = 0
+
+    def __contains__(self, day: str) -> bool:
+        """Return True if the day is stored."""
+        return day in self._positions
+
+    def __len__(self) -> int:
+        """Return the number of stored days."""
+        return len(self._positions)
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of days the buffer can hold."""
+        return self._capacity
+
+    def _offset(self, position: int, flow_index: int) -> int:
+        return (position * len(FLOWS) + flow_index) * LOAD_PROFILE_SLOTS
+
+    def append_day(self, day: str, slots: dict[str, list[float]]) -> None:
+        """Store one day of quarter-hour values, evicting the oldest day.
+
+        A day that is already stored is overwritten in place (portal revision).
+        A day older than everything in a full buffer is ignored.
+        """
+        position = self._positions.get(day)
+        if position is None:
+            if len(self._positions) < self._capacity:
+                position = self._days.index(None)
+            else:
+                oldest = min(self._positions)
+                if day < oldest:
+                    return
+                position = self._positions.pop(oldest)
+            self._days[position] = day
+            self._positions[day] = position
+
+        for flow_index, flow in enumerate(FLOWS):
+            start = self._offset(position, flow_index)
+            values = slots.get(flow)
+            if values is None or len(values) != LOAD_PROFILE_SLOTS:
+                values = [_NAN] * LOAD_PROFILE_SLOTS
+            self._values[start:start + LOAD_PROFILE_SLOTS] = array("d", values)
+        self.revision += 1
+
+    def days(self) -> list[str]:
+        """Return stored days, oldest first."""
+        return sorted(self._positions)
+
+    def get_day(self, day: str, flow: str) -> list[float]:
+        """Return the 96 quarter-hour values of one flow for a day."""
+        position = self._positions[day]
+        start = self._offset(position, FLOWS.index(flow))
+        return self._values[start:start + LOAD_PROFILE_SLOTS].tolist()
+
+    def peak(self, flow: str) -> tuple[str, int, float] | None:
+        """Return (day, slot, kWh) of the highest quarter-hour value of a flow."""
+        flow_index = FLOWS.index(flow)
+        best: tuple[str, int, float] | None = None
+        for day, position in self._positions.items():
+            start = self._offset(position, flow_index)
+            for slot in range(LOAD_PROFILE_SLOTS):
+                value = self._values[start + slot]
+                if not math.isnan(value) and (best is None or value > best[2]):
+                    best = (day, slot, value)
+        return best
+
+    def export(self) -> dict:
+        """Return a compact, JSON-serializable snapshot (oldest day first).
+
+        Values are the raw little-endian float64 array, base64 encoded, in the
+        order days × flows × slots. Missing slots are NaN.
+        """
+        days = self.days()
+        values = array("d")
+        block = len(FLOWS) * LOAD_PROFILE_SLOTS
+        for day in days:
+            start = self._positions[day] * block
+            values.extend(self._values[start:start + block])
+        if sys.byteorder == "big":
+            values.byteswap()
+        return {
+            "days": days,
+            "flows": list(FLOWS),
+            "slots": LOAD_PROFILE_SLOTS,
+            "values": base64.b64encode(values.tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_export(
+        cls, exported: dict, capacity_days: int = LOAD_PROFILE_DAYS
+    ) -> LoadProfileBuffer:
+        """Rebuild a buffer from export()."""
+        buffer = cls(capacity_days)
+        values = array("d")
+        values.frombytes(base64.b64decode(exported["values"]))
+        if sys.byteorder == "big":
+            values.byteswap()
+        flows = exported.get("flows", list(FLOWS))
+        slots = exported.get("slots", LOAD_PROFILE_SLOTS)
+        block = len(flows) * slots
+        for day_index, day in enumerate(exported.get("days", [])):
+            day_slots = {}
+            for flow_index, flow in enumerate(flows):
+                start = day_index * block + flow_index * slots
+                day_slots[flow] = values[start:start + slots].tolist()
+            buffer.append_day(day, day_slots)
+        return buffer
+
+
+class LoadProfileManager:
+    """Fetch quarter-hour profiles per counter point into ring buffers.
+
+    With a store (anything with ``async_load()``, ``async_save()`` and
+    ``async_delay_save()``, i.e. a Home Assistant Store), the buffers survive
+    restarts.
+    """
+
+    def __init__(
+        self,
+        client,
+        tz: tzinfo,
+        store=None,
+        capacity_days: int = LOAD_PROFILE_DAYS,
+    ) -> None:
+        """Initialize the manager."""
+        self._client = client
+        self._tz = tz
+        self._store = store
+        self._capacity_days = capacity_days
+        self.buffers: dict[int, LoadProfileBuffer] = {}
+        # (cp_id, day) -> monotonic time of the last attempt without complete data
+        self._attempts: dict[tuple[int, str], float] = {}
+        # Days stored by a round that ended in an outage, returned by the next one
+        self._unreported: list[tuple[int, str, dict[str, list[float]]]] = []
+        self._task: asyncio.Task | None = None
+
+    async def async_load(self) -> None:
+        """Restore the buffers from the store."""
+        if self._store is None:
+            return
+        stored = await self._store.async_load() or {}
+        self.buffers = {
+            int(cp_id): LoadProfileBuffer.from_export(exported, self._capacity_days)
+            for cp_id, exported in stored.get("buffers", {}).items()
+        }
+
+    async def async_save(self) -> None:
+        """Write the buffers immediately (on unload, instead of the delayed save)."""
+        if self._store is not None:
+            await self._store.async_save(self.export())
+
+    def async_start(self, hass, cp_ids: list[int], on_new_days) -> None:
+        """Update the buffers in a background task unless one is running.
+
+        on_new_days is awaited with the newly stored days, if any.
+        """
+        if self._task is not None and not self._task.done():
+            return
+        # The task copies the context, and with it the request priority
+        with request_priority(PRIORITY_SWEEP):
+            self._task = hass.async_create_background_task(
+                self._async_run(cp_ids, on_new_days), name=f"{DOMAIN} load profiles"
+            )
+
+    async def async_stop(self) -> None:
+        """Cancel a running update and write the buffers."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.async_save()
+
+    async def _async_run(self, cp_ids: list[int], on_new_days) -> None:
+        try:
+            new_days = await self.async_update(cp_ids)
+            if new_days:
+                await on_new_days(new_days)
+        except PortalUnavailableError as err:
+            # The outage is logged once by the breaker, not on every poll
+            _LOGGER.debug("Load profiles not updated: %s", err)
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.error("Failed to update load profiles: %s", err)
+
+    def export(self) -> dict:
+        """Return all buffers in their export format (the stored data)."""
+        return {"buffers": {str(cp_id): buffer.export() for cp_id, buffer in self.buffers.items()}}
+
+    def _due(self, cp_id: int, day: str, settle: str, now: float) -> bool:
+        """Return True if a day is missing, or recent and incomplete, and not tried lately."""
+        buffer = self.buffers[cp_id]
+        if day in buffer and (
+            day < settle
+            or filled_slots({flow: buffer.get_day(day, flow) for flow in FLOWS})
+            >= expected_slots(day, self._tz)
+        ):
+            return False
+        last_attempt = self._attempts.get((cp_id, day))
+        return last_attempt is None or now - last_attempt >= LOAD_PROFILE_RETRY
+
+    async def _async_fetch_day(self, cp_id: int, day: str) -> dict[str, list[float]] | None:
+        """Return the slots of one day, None if the portal rejected the request.
+
+        PortalUnavailableError propagates: an outage says nothing about the day.
+        """
+        try:
+            energy_data = await self._client.get_counter_point_energy_data(
+                cp_id, view="day", time=day
+            )
+        except (PortalRequestError, aiohttp.ClientError, ValueError) as err:
+            _LOGGER.debug(
+                "Could not fetch load profile for counter point %s day %s: %s",
+                cp_id, day, err,
+            )
+            return None
+        return parse_day_view(energy_data, day, self._tz)
+
+    async def async_update(
+        self, cp_ids: list[int], today: date | None = None
+    ) -> list[tuple[int, str, dict[str, list[float]]]]:
+        """Fetch days of the buffer window that are missing or still incomplete.
+
+        The window ends today. Days are fetched concurrently; the client's
+        scheduler bounds the load on the portal. Days without complete data
+        (the portal publishes with a delay of ~2 days) are retried at most
+        every LOAD_PROFILE_RETRY seconds, incomplete days only while they are
+        younger than LOAD_PROFILE_SETTLE_DAYS. Returns (cp_id, day, slots) of
+        the newly stored or changed days.
+
+        If the portal is unavailable, the days fetched so far are stored, no
+        retry delay is recorded for the others and PortalUnavailableError is
+        raised; the stored days are returned by the next successful round.
+        """
+        if today is None:
+            today = datetime.now(self._tz).date()
+        window = [
+            (today - timedelta(days=offset)).isoformat()
+            for offset in range(self._capacity_days - 1, -1, -1)
+        ]
+        settle = (today - timedelta(days=LOAD_PROFILE_SETTLE_DAYS - 1)).isoformat()
+        now = time.monotonic()
+
+        for cp_id in cp_ids:
+            self.buffers.setdefault(cp_id, LoadProfileBuffer(self._capacity_days))
+        due = [
+            (cp_id, day)
+            for cp_id in cp_ids
+            for day in window
+            if self._due(cp_id, day, settle, now)
+        ]
+        results = await asyncio.gather(
+            *(self._async_fetch_day(cp_id, day) for cp_id, day in due), return_exceptions=True
+        )
+
+        new_days = self._unreported
+        self._unreported = []
+        error: BaseException | None = None
+        for (cp_id, day), slots in zip(due, results):
+            if isinstance(slots, BaseException):
+                error = error or slots
+                continue
+            if slots is None or filled_slots(slots) < expected_slots(day, self._tz):
+                self._attempts[(cp_id, day)] = now
+            else:
+                self._attempts.pop((cp_id, day), None)
+            if slots is None or not filled_slots(slots):
+                continue
+            buffer = self.buffers[cp_id]
+            if day in buffer and all(
+                _same_values(buffer.get_day(day, flow), slots[flow]) for flow in FLOWS
+            ):
+                continue
+            buffer.append_day(day, slots)
+            new_days.append((cp_id, day, slots))
+
+        # Forget attempts that fell out of the window
+        oldest = window[0]
+        for key in [k for k in self._attempts if k[1] < oldest]:
+            del self._attempts[key]
+
+        removed = [c for c in self.buffers if c not in cp_ids]
+        for cp_id in removed:
+            del self.buffers[cp_id]
+        if self._store is not None and (new_days or removed):
+            self._store.async_delay_save(self.export, 10)
+        if error is not None:
+            self._unreported = [item for item in new_days if item[0] in self.buffers]
+            raise error
+        return new_days
+
+
+def _same_values(stored: list[float], values: list[float]) -> bool:
+    """Return True if both slot lists are equal, NaN matching NaN."""
+    return all(
+        a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(stored, values)
+    )
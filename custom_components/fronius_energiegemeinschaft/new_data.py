@@ -0,0 +1,141 @@
+"""Bus events for newly published and revised days.
+
+Every community and counter point series is diffed against the series of
+the previous refresh (the same SeriesDiffer the websocket subscriptions
+use), so a refresh that brings no new data fires nothing. A day counts as
+published once the portal reports at least one flow value for it; days
+after the newest one notified so far are "new", changed older days
+"revised". The newest notified day per entity is persisted, so days
+published while Home Assistant was stopped are announced after a restart.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, EVENT_NEW_DATA, STORAGE_VERSION
+from .energy_data import FLOWS
+from .websocket_api import SeriesDiffer
+
+CHANGE_NEW = "new"
+CHANGE_REVISED = "revised"
+
+# Coordinator data section -> entity kind in the event
+_KINDS = {"communities": "community", "counter_points": "counter_point"}
+
+
+class NewDataNotifier:
+    """Fire EVENT_NEW_DATA once per newly published or revised day."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, pricing: dict) -> None:
+        """Initialize the notifier."""
+        self._hass = hass
+        self._entry_id = entry_id
+        self._pricing = pricing
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.new_data")
+        # "<kind>_<id>" -> newest day already announced
+        self._latest: dict[str, str] = {}
+        self._differs: dict[tuple[str, Any], SeriesDiffer] = {}
+        # Events found before Home Assistant finished starting (automations not loaded yet)
+        self._pending: list[dict] = []
+
+    async def async_load(self) -> None:
+        """Load the newest announced day per entity."""
+        self._latest = (await self._store.async_load() or {}).get("latest", {})
+
+    async def async_save(self) -> None:
+        """Write the newest announced days immediately (on unload)."""
+        await self._store.async_save({"latest": self._latest})
+
+    def update(self, section: str, section_data: dict) -> None:
+        """Diff the series of one data section and fire events for changed days."""
+        kind = _KINDS[section]
+        latest_before = dict(self._latest)
+        events = []
+        for item_id, item in section_data.items():
+            differ = self._differs.get((kind, item_id))
+            first = differ is None
+            if first:
+                differ = self._differs[(kind, item_id)] = SeriesDiffer(
+                    FLOWS, self._pricing if kind == "counter_point" else None
+                )
+                days = differ.snapshot(item["energy"])["days"]
+            else:
+                delta = differ.delta(item["energy"])
+                days = delta["upsert"] if delta is not None else {}
+            events.extend(
+                self._changed_days(kind, item_id, item["info"], differ.columns, days, first)
+            )
+        for key in [key for key in self._differs if key[0] == kind and key[1] not in section_data]:
+            del self._differs[key]
+
+        if self._latest != latest_before:
+            self._store.async_delay_save(lambda: {"latest": self._latest}, 10)
+        if not events:
+            return
+        if self._hass.state is CoreState.running:
+            self._fire(events)
+            return
+        if not self._pending:
+            async_at_started(self._hass, self._async_fire_pending)
+        self._pending.extend(events)
+
+    def _changed_days(
+        self,
+        kind: str,
+        item_id,
+        info: dict,
+        columns: list[str],
+        days: dict[str, list],
+        first: bool,
+    ) -> list[dict]:
+        """Return event data for the published days among the changed ones.
+
+        On the first diff after start every day of the series is "changed";
+        only days after the persisted newest day are announced then.
+        """
+        storage_key = f"{kind}_{item_id}"
+        latest = self._latest.get(storage_key)
+        published = sorted(
+            day
+            for day, row in days.items()
+            if any(value is not None for value in row[: len(FLOWS)])
+            and (not first or latest is None or day > latest)
+        )
+        if not published:
+            return []
+        self._latest[storage_key] = max(published[-1], latest or "")
+        if latest is None:
+            # Entity never seen before: remember where it stands, announce nothing
+            return []
+
+        events = []
+        for day in published:
+            row = days[day]
+            data = {
+                "entry_id": self._entry_id,
+                "kind": kind,
+                "id": item_id,
+                "name": info.get("counter_number", info.get("name", str(item_id))),
+                "date": day,
+                "change": CHANGE_NEW if day > latest else CHANGE_REVISED,
+                "values": {
+                    flow: value for flow, value in zip(FLOWS, row) if value is not None
+                },
+            }
+            if "cost" in columns:
+                data["cost"] = row[columns.index("cost")]
+            events.append(data)
+        return events
+
+    def _fire(self, events: list[dict]) -> None:
+        for data in events:
+            self._hass.bus.async_fire(EVENT_NEW_DATA, data)
+
+    @callback
+    def _async_fire_pending(self, hass: HomeAssistant) -> None:
+        events, self._pending = self._pending, []
+        self._fire(events)
@@ -0,0 +1,200 @@
+"""On-demand profiling of one refresh of the coordinators.
+
+The refreshes plus one round of state writes of the entry's entities run under
+cProfile. At the same time a sampler thread records the event loop thread's
+stack (collapsed-stack format for flame graph tools) and a loop lag monitor
+measures how late the loop wakes up. cProfile only sees the event loop
+thread; executor jobs appear in the collapsed stacks of the loop only as the
+await that waits for them.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import math
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import async_get_platforms
+
+from .const import DOMAIN, PROFILE_LAG_INTERVAL, PROFILE_SAMPLE_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measure event loop lag: how much later than requested a sleep returns."""
+
+    def __init__(self, interval: float = PROFILE_LAG_INTERVAL) -> None:
+        """Initialize the monitor."""
+        self._interval = interval
+        self._handle: asyncio.TimerHandle | None = None
+        self._expected = 0.0
+        self.samples: list[float] = []
+
+    def start(self) -> None:
+        """Start measuring; the first probe is armed immediately."""
+        self.samples = []
+        self._schedule()
+
+    def stop(self) -> None:
+        """Stop measuring."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._expected = loop.time() + self._interval
+        self._handle = loop.call_later(self._interval, self._probe)
+
+    def _probe(self) -> None:
+        self.samples.append(max(0.0, asyncio.get_running_loop().time() - self._expected))
+        self._schedule()
+
+    def summary(self) -> dict:
+        """Return lag statistics in milliseconds."""
+        if not self.samples:
+            return {"samples": 0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+            "p95_ms": round(ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1),
+        }
+
+
+class StackSampler(threading.Thread):
+    """Sample another thread's Python stack into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        """Initialize the sampler."""
+        super().__init__(name=f"{DOMAIN}_stack_sampler", daemon=True)
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self.stacks: Counter[str] = Counter()
+
+    def run(self) -> None:
+        """Sample until stopped."""
+        while not self._stop_event.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)  # noqa: SLF001
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(
+                    f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the thread."""
+        self._stop_event.set()
+        self.join()
+
+
+def _entry_entities(hass: HomeAssistant, entry_id: str) -> list:
+    """Return the entities the entry has added to its platforms."""
+    return [
+        entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        if platform.config_entry is not None and platform.config_entry.entry_id == entry_id
+        for entity in platform.entities.values()
+    ]
+
+
+def _write_results(
+    profile: cProfile.Profile, stacks: Counter[str], pstats_path: Path, collapsed_path: Path
+) -> list[dict]:
+    """Write the pstats and collapsed-stack files, return the top functions."""
+    pstats_path.parent.mkdir(parents=True, exist_ok=True)
+    profile.dump_stats(pstats_path)
+    with open(collapsed_path, "w", encoding="utf-8") as file:
+        for stack, count in stacks.most_common():
+            file.write(f"{stack} {count}\n")
+
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    top = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in sorted(
+        stats.stats.items(), key=lambda item: item[1][3], reverse=True
+    )[:15]:
+        top.append(
+            {
+                "function": f"{name} ({Path(filename).name}:{line})",
+                "calls": calls,
+                "tottime_ms": round(tottime * 1000, 1),
+                "cumtime_ms": round(cumtime * 1000, 1),
+            }
+        )
+    return top
+
+
+def resolve_profile_paths(hass: HomeAssistant, filename: str | None) -> tuple[Path, Path]:
+    """Return the .pstats and .collapsed paths, which must stay inside the config directory."""
+    if not filename:
+        filename = f"fronius_profile_{datetime.now():%Y%m%d_%H%M%S}"
+    config_dir = Path(hass.config.path()).resolve()
+    base = Path(hass.config.path(filename)).resolve()
+    if config_dir not in base.parents:
+        raise HomeAssistantError(f"Profile path must be inside {config_dir}: {filename}")
+    if base.suffix in (".pstats", ".collapsed"):
+        base = base.with_suffix("")
+    return base.with_name(f"{base.name}.pstats"), base.with_name(f"{base.name}.collapsed")
+
+
+async def async_profile_refresh(
+    hass: HomeAssistant, entry_id: str, coordinators: dict, filename: str | None = None
+) -> dict:
+    """Profile one refresh of every coordinator plus one round of entity state writes."""
+    pstats_path, collapsed_path = resolve_profile_paths(hass, filename)
+    entities = _entry_entities(hass, entry_id)
+
+    lag = LoopLagMonitor()
+    sampler = StackSampler(threading.get_ident())
+    profile = cProfile.Profile()
+
+    lag.start()
+    sampler.start()
+    started = refreshed = time.perf_counter()
+    profile.enable()
+    try:
+        for coordinator in coordinators.values():
+            await coordinator.async_refresh()
+        refreshed = time.perf_counter()
+        for entity in entities:
+            entity.async_write_ha_state()
+    finally:
+        profile.disable()
+        finished = time.perf_counter()
+        sampler.stop()
+        lag.stop()
+
+    top = await hass.async_add_executor_job(
+        _write_results, profile, sampler.stacks, pstats_path, collapsed_path
+    )
+    _LOGGER.info("Refresh profile written to %s and %s", pstats_path, collapsed_path)
+
+    return {
+        "pstats": str(pstats_path),
+        "collapsed": str(collapsed_path),
+        "refresh_success": all(
+            coordinator.last_update_success for coordinator in coordinators.values()
+        ),
+        "refresh_ms": round((refreshed - started) * 1000, 1),
+        "state_writes_ms": round((finished - refreshed) * 1000, 1),
+        "entities": len(entities),
+        "loop_lag": lag.summary(),
+        "top_functions": top,
+    }
@@ -0,0 +1,372 @@
+"""Caching proxy serving the portal endpoints to several Home Assistant instances.
+
+One FroniusEnergyClient holds the authenticated portal session; responses
+are cached with TTLs that depend on the period they cover (a month that is
+still filling expires after minutes, a month that ended weeks ago after a
+day). Home Assistant instances point their portal address at the proxy and
+log in with the portal username and the proxy password (generated and logged
+at startup unless given), so the load on the portal stays that of a single
+instance however many use the proxy. While the portal is unavailable (its
+circuit breaker is open), expired responses are served instead of errors.
+
+Needs aiohttp only and is started through the command-line tool:
+
+    FRONIUS_USERNAME=... FRONIUS_PASSWORD=... FRONIUS_PROXY_PASSWORD=... \\
+        python custom_components/fronius_energiegemeinschaft/cli.py proxy --host 0.0.0.0
+
+It listens on 127.0.0.1 unless another address is given.
+"""
+from __future__ import annotations
+
+import argparse
+import calendar
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any
+
+from aiohttp import web
+
+from .api_client import (
+    VIEW_DAY,
+    VIEW_MONTH,
+    VIEW_YEAR,
+    FroniusEnergyClient,
+    PortalUnavailableError,
+)
+from .const import (
+    API_COMMUNITY,
+    API_COMMUNITY_ENERGY,
+    API_COUNTER_POINT,
+    API_COUNTER_POINT_ENERGY,
+    API_LOGIN,
+    BASE_URL,
+    PROXY_CACHE_ENTRIES,
+    PROXY_DEFAULT_PORT,
+    PROXY_MAX_SESSIONS,
+    PROXY_REVISION_DAYS,
+    PROXY_SESSION_TTL,
+    PROXY_SETTLE_DAYS,
+    PROXY_TTL_CLOSED,
+    PROXY_TTL_CURRENT,
+    PROXY_TTL_LIST,
+    PROXY_TTL_SETTLING,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SESSION_COOKIE = "fronius_proxy_session"
+
+# Typed application keys need aiohttp 3.9; Home Assistant 2023.7 ships 3.8
+if hasattr(web, "AppKey"):
+    _CLIENT = web.AppKey("client", FroniusEnergyClient)
+    _PROXY = web.AppKey("proxy", "CachingProxy")
+else:
+    _CLIENT = "fronius_client"
+    _PROXY = "fronius_proxy"
+
+
+def period_end(view: str | None, period: str | None) -> date | None:
+    """Return the last day an energy_data request covers, None if unknown."""
+    try:
+        if view == VIEW_DAY:
+            return date.fromisoformat(period)
+        if view == VIEW_MONTH:
+            year, month = (int(part) for part in period.split("-"))
+            return date(year, month, calendar.monthrange(year, month)[1])
+        if view == VIEW_YEAR:
+            return date(int(period), 12, 31)
+    except (AttributeError, TypeError, ValueError):
+        pass
+    return None
+
+
+def cache_ttl(params: dict[str, str], today: date) -> int:
+    """Return the seconds a response may be served from cache.
+
+    Lists (no view) are cached for PROXY_TTL_LIST. Energy data of a period
+    that ended less than PROXY_SETTLE_DAYS ago is still filling in, one that
+    ended within PROXY_REVISION_DAYS may still be corrected by the portal;
+    anything older changes rarely. Requests without a parseable period (the
+    portal's default, the current month) count as current.
+    """
+    if "view" not in params:
+        return PROXY_TTL_LIST
+    end = period_end(params["view"], params.get("time"))
+    if end is None:
+        return PROXY_TTL_CURRENT
+    age = (today - end).days
+    if age < PROXY_SETTLE_DAYS:
+        return PROXY_TTL_CURRENT
+    if age < PROXY_REVISION_DAYS:
+        return PROXY_TTL_SETTLING
+    return PROXY_TTL_CLOSED
+
+
+class CachingProxy:
+    """LRU response cache in front of one portal session."""
+
+    def __init__(
+        self,
+        client: FroniusEnergyClient,
+        password: str,
+        max_entries: int = PROXY_CACHE_ENTRIES,
+        max_sessions: int = PROXY_MAX_SESSIONS,
+        session_ttl: float = PROXY_SESSION_TTL,
+    ) -> None:
+        """Initialize the proxy."""
+        self.client = client
+        self._password = password
+        self._max_entries = max_entries
+        self._max_sessions = max_sessions
+        self._session_ttl = session_ttl
+        # (path, params) -> (expiry on the monotonic clock, encoded JSON body)
+        self._cache: OrderedDict[tuple, tuple[float, bytes]] = OrderedDict()
+        # Session token -> expiry on the monotonic clock, oldest first
+        self._sessions: OrderedDict[str, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.errors = 0
+
+    def check_login(self, username: str, password: str) -> bool:
+        """Return True for the portal username with the proxy password."""
+        return hmac.compare_digest(
+            username.encode(), self.client.username.encode()
+        ) and hmac.compare_digest(password.encode(), self._password.encode())
+
+    def open_session(self) -> str:
+        """Return a new session token for a logged-in instance.
+
+        Expired sessions are dropped, and the oldest ones beyond max_sessions.
+        """
+        now = time.monotonic()
+        while self._sessions and (
+            next(iter(self._sessions.values())) <= now
+            or len(self._sessions) >= self._max_sessions
+        ):
+            self._sessions.popitem(last=False)
+        token = secrets.token_urlsafe(32)
+        self._sessions[token] = now + self._session_ttl
+        return token
+
+    def has_session(self, token: str | None) -> bool:
+        """Return True for an unexpired token handed out by open_session."""
+        if token is None or token not in self._sessions:
+            return False
+        if self._sessions[token] <= time.monotonic():
+            del self._sessions[token]
+            return False
+        return True
+
+    async def fetch(self, path: str, params: dict[str, str], loader) -> bytes:
+        """Return the cached body of a request, loading it on a miss or expiry.
+
+        Concurrent misses of one request share a download through the
+        client's single-flight; failures are not cached. An expired body is
+        served when the portal is unavailable.
+        """
+        key = (path, tuple(sorted(params.items())))
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        try:
+            data = await loader()
+        except PortalUnavailableError:
+            if cached is None:
+                raise
+            self._cache.move_to_end(key)
+            self.stale += 1
+            return cached[1]
+        body = json.dumps(data).encode()
+        expires = time.monotonic() + cache_ttl(params, date.today())
+        self._cache[key] = (expires, body)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+        return body
+
+    def status(self) -> dict[str, Any]:
+        """Return cache counters for the status endpoint."""
+        return {
+            "upstream": self.client.base_url,
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "upstream_circuit": self.client.breaker.state,
+            "upstream_errors": self.errors,
+            "sessions": len(self._sessions),
+        }
+
+
+def _energy_params(request: web.Request) -> dict[str, str]:
+    """Return the view/time query parameters the portal understands."""
+    return {key: request.query[key] for key in ("view", "time") if key in request.query}
+
+
+@web.middleware
+async def _auth_middleware(request: web.Request, handler):
+    """Answer data endpoints with 401 unless the instance logged in."""
+    proxy = request.app[_PROXY]
+    if request.path.startswith("/vis/") and not proxy.has_session(
+        request.cookies.get(SESSION_COOKIE)
+    ):
+        return web.json_response({"message": "Unauthenticated."}, status=401)
+    return await handler(request)
+
+
+async def _login_page(request: web.Request) -> web.Response:
+    """Hand out the XSRF-TOKEN cookie the client expects before logging in."""
+    response = web.Response(status=200)
+    response.set_cookie("XSRF-TOKEN", secrets.token_urlsafe(32))
+    return response
+
+
+async def _login(request: web.Request) -> web.Response:
+    """Open a proxy session for the portal username and the proxy password."""
+    proxy = request.app[_PROXY]
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        data = {}
+    if not proxy.check_login(str(data.get("email", "")), str(data.get("password", ""))):
+        _LOGGER.warning("Rejected login from %s", request.remote)
+        return web.json_response({"message": "Invalid credentials."}, status=422)
+    response = web.Response(status=204)
+    response.set_cookie(SESSION_COOKIE, proxy.open_session(), httponly=True)
+    return response
+
+
+async def _serve(request: web.Request, params: dict[str, str], loader) -> web.Response:
+    """Serve a request from cache or upstream."""
+    proxy = request.app[_PROXY]
+    try:
+        body = await proxy.fetch(request.path, params, loader)
+    except Exception as err:  # pylint: disable=broad-except
+        proxy.errors += 1
+        _LOGGER.warning("Upstream request %s failed: %s", request.path_qs, err)
+        return web.json_response({"message": "Upstream request failed."}, status=502)
+    return web.Response(body=body, content_type="application/json")
+
+
+async def _communities(request: web.Request) -> web.Response:
+    """Serve the community list."""
+    client = request.app[_CLIENT]
+    return await _serve(request, {}, client.get_communities)
+
+
+async def _counter_points(request: web.Request) -> web.Response:
+    """Serve the counter point list."""
+    client = request.app[_CLIENT]
+    return await _serve(request, {}, client.get_counter_points)
+
+
+async def _community_energy(request: web.Request) -> web.Response:
+    """Serve energy data of a community."""
+    client = request.app[_CLIENT]
+    community_id = int(request.match_info["community_id"])
+    params = _energy_params(request)
+    return await _serve(
+        request, params, lambda: client.get_community_energy_data(community_id, **params)
+    )
+
+
+async def _counter_point_energy(request: web.Request) -> web.Response:
+    """Serve energy data of a counter point."""
+    client = request.app[_CLIENT]
+    counter_point_id = int(request.match_info["counter_point_id"])
+    params = _energy_params(request)
+    return await _serve(
+        request,
+        params,
+        lambda: client.get_counter_point_energy_data(counter_point_id, **params),
+    )
+
+
+async def _status(request: web.Request) -> web.Response:
+    """Serve the cache counters."""
+    return web.json_response(request.app[_PROXY].status())
+
+
+def create_app(client: FroniusEnergyClient, password: str) -> web.Application:
+    """Return the proxy application for a (not yet logged-in) portal client."""
+    app = web.Application(middlewares=[_auth_middleware])
+    app[_CLIENT] = client
+    app[_PROXY] = CachingProxy(client, password)
+    app.router.add_get(API_LOGIN, _login_page)
+    app.router.add_post(API_LOGIN, _login)
+    app.router.add_get(API_COMMUNITY, _communities)
+    app.router.add_get(API_COUNTER_POINT, _counter_points)
+    app.router.add_get(
+        API_COMMUNITY_ENERGY.format(community_id=r"{community_id:\d+}"), _community_energy
+    )
+    app.router.add_get(
+        API_COUNTER_POINT_ENERGY.format(counter_point_id=r"{counter_point_id:\d+}"),
+        _counter_point_energy,
+    )
+    app.router.add_get("/proxy/status", _status)
+
+    async def _startup(app: web.Application) -> None:
+        await client.login()
+
+    async def _cleanup(app: web.Application) -> None:
+        await client.close()
+
+    app.on_startup.append(_startup)
+    app.on_cleanup.append(_cleanup)
+    return app
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the proxy until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--username", default=os.environ.get("FRONIUS_USERNAME"))
+    parser.add_argument("--password", default=os.environ.get("FRONIUS_PASSWORD"))
+    parser.add_argument(
+        "--proxy-password",
+        default=os.environ.get("FRONIUS_PROXY_PASSWORD"),
+        help="password instances log in with (default: generated and logged at startup)",
+    )
+    parser.add_argument("--upstream", default=BASE_URL)
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address to listen on (0.0.0.0 to serve other machines)",
+    )
+    parser.add_argument("--port", type=int, default=PROXY_DEFAULT_PORT)
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args(argv)
+    if not args.username or not args.password:
+        parser.error("portal credentials missing (--username/--password or FRONIUS_* variables)")
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    proxy_password = args.proxy_password
+    if not proxy_password:
+        # Never fall back to the portal password: instances would store it in their config
+        proxy_password = secrets.token_urlsafe(16)
+        _LOGGER.warning("No proxy password given, instances log in with: %s", proxy_password)
+    client = FroniusEnergyClient(args.username, args.password, base_url=args.upstream)
+    web.run_app(
+        create_app(client, proxy_password),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,44 +10,303 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy
+from homeassistant.const import PERCENTAGE, UnitOfEnergy, UnitOfPower
 
 # Try to import CURRENCY_EURO, fallback to string for older HA versions
 try:
     from homeassistant.const import CURRENCY_EURO
 except ImportError:
     CURRENCY_EURO = "€"
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
 
-from .const import DATA_COORDINATOR, DATA_PRICING, DOMAIN
+from .backfill import BackfillJob
+from .const import (
+    ATTR_STALE_SINCE,
+    DATA_BACKFILL,
+    DATA_COORDINATORS,
+    DATA_KPI,
+    DATA_LOAD_PROFILES,
+    DATA_PRICING,
+    DOMAIN,
+    ENTITY_REMOVAL_GRACE,
+    SIGNAL_BACKFILL_PROGRESS,
+)
+from .coordinator import COORDINATOR_COMMUNITIES, COORDINATOR_COUNTER_POINTS
+from .energy_data import FLOWS, EnergySeries
+from .kpi import (
+    KPI_COMMUNITY_COVERAGE,
+    KPI_FEED_IN_SHARE,
+    KPI_SELF_SUFFICIENCY,
+    PERIODS,
+    KpiManager,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Chart series are derived from the other attributes; kept out of the recorder
+CHART_ATTRIBUTES = frozenset({"chart"})
+
+
+# Fingerprint parts compared by value; anything else is compared by identity
+_VALUE_TYPES = (str, int, float, tuple, type(None))
 
-def _iter_daily_data(raw_data):
-    """Iterate daily data entries, handling both dict and list API formats.
 
-    Old format: {"2026-02-01T00:00:00Z": {"crec": {...}, ...}, ...}
-    New format: [{"date": "2026-02-01T00:00:00Z", "crec": {...}, ...}, ...]
+class SkipUnchangedMixin:
+    """Write the state only when the data behind the entity changed.
+
+    _fingerprint() returns the objects and values the state is derived from.
+    Series and prepared attributes are reused by the coordinator while their
+    data is unchanged, so they are compared by identity; plain values by
+    equality. Attributes come from _state_attributes(), plus stale_since
+    while the coordinator keeps data from before a portal outage. Listed
+    before CoordinatorEntity in the bases.
+
+    Without overrides the state is written on every refresh (the coordinator
+    data is a new object each time) and has no attributes besides stale_since.
     """
-    if isinstance(raw_data, dict):
-        yield from raw_data.items()
-    elif isinstance(raw_data, list):
-        _LOGGER.debug("API returned list format for daily data (new format detected)")
-        for item in raw_data:
-            if isinstance(item, dict):
-                date_str = item.get("date", item.get("datetime", item.get("date_time", "")))
-                if date_str:
-                    yield date_str, item
-                else:
-                    _LOGGER.debug("List item has no date field, keys: %s", list(item.keys()))
-    else:
-        _LOGGER.warning("Unexpected data type for daily data: %s", type(raw_data))
+
+    _written_fingerprint: tuple | None = None
+
+    def _fingerprint(self) -> tuple:
+        """Return what the state is derived from (default: the whole coordinator data)."""
+        return (self.coordinator.data,)
+
+    def _state_attributes(self) -> dict[str, any]:
+        """Return the entity's own state attributes."""
+        return {}
+
+    def _full_fingerprint(self) -> tuple:
+        return (self.available, self.coordinator.stale_since, *self._fingerprint())
+
+    def _unchanged(self, fingerprint: tuple) -> bool:
+        written = self._written_fingerprint
+        return written is not None and len(written) == len(fingerprint) and all(
+            old is new or (isinstance(old, _VALUE_TYPES) and old == new)
+            for old, new in zip(written, fingerprint)
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, any]:
+        """Return the state attributes."""
+        attributes = self._state_attributes()
+        stale_since = self.coordinator.stale_since
+        if stale_since is None:
+            return attributes
+        return {**attributes, ATTR_STALE_SINCE: stale_since.isoformat()}
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the data of the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._written_fingerprint = self._full_fingerprint()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the fingerprint differs from the last written one."""
+        fingerprint = self._full_fingerprint()
+        if self._unchanged(fingerprint):
+            return
+        self._written_fingerprint = fingerprint
+        self.async_write_ha_state()
+
+
+def _get_series(coordinator: DataUpdateCoordinator, section: str, key) -> EnergySeries | None:
+    """Return the parsed series of a community or counter point, if available."""
+    if not coordinator.data:
+        return None
+    item = coordinator.data.get(section, {}).get(key)
+    if item is None:
+        return None
+    return item.get("energy")
+
+
+def _get_attributes(coordinator: DataUpdateCoordinator, section: str, key) -> dict | None:
+    """Return the prepared attributes of a community or counter point, if available."""
+    if not coordinator.data:
+        return None
+    item = coordinator.data.get(section, {}).get(key)
+    if item is None:
+        return None
+    return item.get("attributes")
+
+
+class CommunityRef:
+    """Identity of a community, shared by all of its sensors."""
+
+    __slots__ = ("community_id", "community_name", "rc_number")
+
+    def __init__(self, community_id: int, community_name: str, rc_number: str) -> None:
+        """Initialize the reference."""
+        self.community_id = community_id
+        self.community_name = community_name
+        self.rc_number = rc_number
+
+
+class CounterPointRef:
+    """Identity of a counter point, shared by all of its sensors."""
+
+    __slots__ = ("cp_id", "cp_number", "energy_direction")
+
+    def __init__(self, cp_id: int, cp_number: str, energy_direction: str) -> None:
+        """Initialize the reference."""
+        self.cp_id = cp_id
+        self.cp_number = cp_number
+        self.energy_direction = energy_direction
+
+
+def _community_entities(
+    coordinator: DataUpdateCoordinator, kpis: KpiManager, community_id, community_data: dict
+) -> list[SensorEntity]:
+    """Create all sensors of one community."""
+    community_info = community_data["info"]
+    community = CommunityRef(
+        community_id,
+        community_info["name"],
+        community_info.get("rc_number", ""),
+    )
+
+    # Create sensors for community totals
+    entities: list[SensorEntity] = [
+        FroniusCommunitySensor(coordinator, community, data_key, sensor_name)
+        for data_key, sensor_name in COMMUNITY_SENSORS
+    ]
+
+    # KPI sensors
+    entities.extend(
+        KpiSensor(
+            coordinator,
+            kpis,
+            ("communities", community_id),
+            community.community_name,
+            f"fronius_community_{community_id}",
+            kpi,
+            period,
+        )
+        for kpi in (KPI_SELF_SUFFICIENCY, KPI_COMMUNITY_COVERAGE, KPI_FEED_IN_SHARE)
+        for period in PERIODS
+    )
+    return entities
+
+
+def _counter_point_entities(
+    coordinator: DataUpdateCoordinator,
+    kpis: KpiManager,
+    pricing: dict,
+    load_profiles,
+    cp_id,
+    cp_data: dict,
+) -> list[SensorEntity]:
+    """Create all sensors of one counter point."""
+    cp_info = cp_data["info"]
+    counter_point = CounterPointRef(
+        cp_id,
+        cp_info.get("counter_number", str(cp_id)),
+        "Producer" if cp_info.get("energy_direction") == "1" else "Consumer",
+    )
+
+    # Energy sensor
+    entities: list[SensorEntity] = [FroniusCounterPointSensor(coordinator, counter_point)]
+
+    # Cost sensors
+    entities.extend([
+        DailyCostSensor(coordinator, counter_point, pricing),
+        MonthlyCostSensor(coordinator, counter_point, pricing),
+        YearlyCostSensor(coordinator, counter_point, pricing),
+    ])
+
+    # Quarter-hour peak from the load profile ring buffer
+    entities.append(QuarterHourPeakSensor(coordinator, counter_point, load_profiles))
+
+    # KPI sensors (consumption shares for consumers, feed-in share for producers)
+    cp_kpis = (
+        (KPI_FEED_IN_SHARE,)
+        if counter_point.energy_direction == "Producer"
+        else (KPI_SELF_SUFFICIENCY, KPI_COMMUNITY_COVERAGE)
+    )
+    entities.extend(
+        KpiSensor(
+            coordinator,
+            kpis,
+            ("counter_points", cp_id),
+            f"Counter Point {counter_point.cp_number}",
+            f"fronius_counter_point_{cp_id}",
+            kpi,
+            period,
+        )
+        for kpi in cp_kpis
+        for period in PERIODS
+    )
+    return entities
+
+
+class EntityDiscovery:
+    """Add and remove sensors as communities and counter points come and go.
+
+    The sets in the coordinator data are diffed on every refresh, so a
+    change in the portal only costs the new entities, not a reload. An item
+    must be missing for ENTITY_REMOVAL_GRACE refreshes before its sensors are
+    removed, so a single incomplete response does not drop customizations.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: DataUpdateCoordinator,
+        async_add_entities: AddEntitiesCallback,
+        create: dict,
+    ) -> None:
+        """Initialize the discovery."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._async_add_entities = async_add_entities
+        self._create = create
+        self._entities: dict[tuple, list[SensorEntity]] = {}
+        self._missing: dict[tuple, int] = {}
+        self._initialized = False
+
+    @callback
+    def async_update(self) -> None:
+        """Diff the coordinator data against the known items."""
+        data = self._coordinator.data or {}
+        current = {
+            (section, item_id): item
+            for section in self._create
+            for item_id, item in data.get(section, {}).items()
+        }
+
+        new_entities: list[SensorEntity] = []
+        for key, item in current.items():
+            self._missing.pop(key, None)
+            if key not in self._entities:
+                section, item_id = key
+                entities = self._create[section](item_id, item)
+                self._entities[key] = entities
+                new_entities.extend(entities)
+        if new_entities:
+            if self._initialized:
+                _LOGGER.info("Discovered %d new sensors", len(new_entities))
+            self._async_add_entities(new_entities)
+        self._initialized = True
+
+        for key in [key for key in self._entities if key not in current]:
+            self._missing[key] = self._missing.get(key, 0) + 1
+            if self._missing[key] < ENTITY_REMOVAL_GRACE:
+                continue
+            del self._missing[key]
+            _LOGGER.info("%s %s no longer exists in the portal, removing its sensors", *key)
+            registry = er.async_get(self._hass)
+            for entity in self._entities.pop(key):
+                if entity.registry_entry is not None:
+                    registry.async_remove(entity.entity_id)
+                elif entity.hass is not None:
+                    self._hass.async_create_task(entity.async_remove())
 
 
 async def async_setup_entry(
@@ -56,729 +315,507 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the sensor platform."""
-    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    coordinators = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATORS]
+    community_coordinator = coordinators[COORDINATOR_COMMUNITIES]
+    counter_point_coordinator = coordinators[COORDINATOR_COUNTER_POINTS]
     pricing = hass.data[DOMAIN][config_entry.entry_id][DATA_PRICING]
-
-    entities: list[SensorEntity] = []
-
-    # Create sensors for each community
-    if coordinator.data and "communities" in coordinator.data:
-        for community_id, community_data in coordinator.data["communities"].items():
-            community_info = community_data["info"]
-            community_name = community_info["name"]
-            rc_number = community_info.get("rc_number", "")
-
-            # Total values from energy data
-            energy_data = community_data.get("energy", {})
-            total_data = energy_data.get("total", {}).get(rc_number, {})
-
-            # Create sensors for community totals
-            entities.extend([
-                FroniusCommunitySensor(
-                    coordinator,
-                    community_id,
-                    community_name,
-                    rc_number,
-                    "crec",
-                    "Community Received",
-                    total_data.get("crec", {}).get("value", "0"),
-                ),
-                FroniusCommunitySensor(
-                    coordinator,
-                    community_id,
-                    community_name,
-                    rc_number,
-                    "cgrid",
-                    "Grid Consumption",
-                    total_data.get("cgrid", {}).get("value", "0"),
-                ),
-                FroniusCommunitySensor(
-                    coordinator,
-                    community_id,
-                    community_name,
-                    rc_number,
-                    "ctotal",
-                    "Total Consumption",
-                    total_data.get("ctotal", {}).get("value", "0"),
-                ),
-                FroniusCommunitySensor(
-                    coordinator,
-                    community_id,
-                    community_name,
-                    rc_number,
-                    "frec",
-                    "Community Feed-in",
-                    total_data.get("frec", {}).get("value", "0"),
-                ),
-                FroniusCommunitySensor(
-                    coordinator,
-                    community_id,
-                    community_name,
-                    rc_number,
-                    "fgrid",
-                    "Grid Feed-in",
-                    total_data.get("fgrid", {}).get("value", "0"),
-                ),
-                FroniusCommunitySensor(
-                    coordinator,
-                    community_id,
-                    community_name,
-                    rc_number,
-                    "ftotal",
-                    "Total Feed-in",
-                    total_data.get("ftotal", {}).get("value", "0"),
-                ),
-            ])
-
-    # Create sensors for each counter point
-    if coordinator.data and "counter_points" in coordinator.data:
-        for cp_id, cp_data in coordinator.data["counter_points"].items():
-            cp_info = cp_data["info"]
-            cp_number = cp_info.get("counter_number", str(cp_id))
-            energy_direction = "Producer" if cp_info.get("energy_direction") == "1" else "Consumer"
-
-            # Energy sensor
-            entities.append(
-                FroniusCounterPointSensor(
-                    coordinator,
-                    cp_id,
-                    cp_number,
-                    energy_direction,
-                    cp_data.get("energy", {}),
-                )
-            )
-
-            # Cost sensors
-            entities.extend([
-                DailyCostSensor(coordinator, cp_id, cp_number, energy_direction, pricing),
-                MonthlyCostSensor(coordinator, cp_id, cp_number, energy_direction, pricing),
-                YearlyCostSensor(coordinator, cp_id, cp_number, energy_direction, pricing),
-            ])
-
-    async_add_entities(entities)
+    load_profiles = hass.data[DOMAIN][config_entry.entry_id][DATA_LOAD_PROFILES]
+    kpis = hass.data[DOMAIN][config_entry.entry_id][DATA_KPI]
+
+    # Community and counter point sensors follow the portal on every refresh
+    # of their coordinator
+    community_discovery = EntityDiscovery(
+        hass,
+        community_coordinator,
+        async_add_entities,
+        {
+            "communities": lambda item_id, item: _community_entities(
+                community_coordinator, kpis, item_id, item
+            ),
+        },
+    )
+    counter_point_discovery = EntityDiscovery(
+        hass,
+        counter_point_coordinator,
+        async_add_entities,
+        {
+            "counter_points": lambda item_id, item: _counter_point_entities(
+                counter_point_coordinator, kpis, pricing, load_profiles, item_id, item
+            ),
+        },
+    )
+    for discovery, coordinator in (
+        (community_discovery, community_coordinator),
+        (counter_point_discovery, counter_point_coordinator),
+    ):
+        discovery.async_update()
+        config_entry.async_on_unload(coordinator.async_add_listener(discovery.async_update))
+
+    # Progress of the background statistics backfill
+    async_add_entities([
+        BackfillProgressSensor(
+            hass.data[DOMAIN][config_entry.entry_id][DATA_BACKFILL], config_entry.entry_id
+        )
+    ])
+
+
+KPI_NAMES = {
+    KPI_SELF_SUFFICIENCY: "Self-Sufficiency",
+    KPI_COMMUNITY_COVERAGE: "Community Coverage",
+    KPI_FEED_IN_SHARE: "Community Feed-in Share",
+}
+
+PERIOD_NAMES = {
+    "daily": "Daily",
+    "month_to_date": "Month to Date",
+    "rolling_30_days": "30 Days",
+}
+
+COMMUNITY_SENSORS = (
+    ("crec", "Community Received"),
+    ("cgrid", "Grid Consumption"),
+    ("ctotal", "Total Consumption"),
+    ("frec", "Community Feed-in"),
+    ("fgrid", "Grid Feed-in"),
+    ("ftotal", "Total Feed-in"),
+)
 
 
-class FroniusCommunitySensor(CoordinatorEntity, SensorEntity):
+class FroniusCommunitySensor(SkipUnchangedMixin, CoordinatorEntity, SensorEntity):
     """Representation of a Fronius Community Sensor."""
 
+    _unrecorded_attributes = CHART_ATTRIBUTES
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
-        community_id: int,
-        community_name: str,
-        rc_number: str,
+        community: CommunityRef,
         data_key: str,
         sensor_name: str,
-        initial_value: str,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._community_id = community_id
-        self._community_name = community_name
-        self._rc_number = rc_number
+        self._community = community
         self._data_key = data_key
-        self._sensor_name = sensor_name
-        self._attr_name = f"{community_name} {sensor_name}"
-        self._attr_unique_id = f"fronius_community_{community_id}_{data_key}"
+        self._attr_name = f"{community.community_name} {sensor_name}"
+        self._attr_unique_id = f"fronius_community_{community.community_id}_{data_key}"
         self._attr_device_class = SensorDeviceClass.ENERGY
         self._attr_state_class = SensorStateClass.TOTAL_INCREASING
         self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
 
+    def _series(self) -> EnergySeries | None:
+        return _get_series(self.coordinator, "communities", self._community.community_id)
+
+    def _fingerprint(self) -> tuple:
+        return (
+            self._series(),
+            _get_attributes(self.coordinator, "communities", self._community.community_id),
+        )
+
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        try:
-            community_data = self.coordinator.data["communities"].get(self._community_id, {})
-            total_data = community_data.get("energy", {}).get("total", {}).get(self._rc_number, {})
-            value_str = total_data.get(self._data_key, {}).get("value", "0")
-            return float(value_str)
-        except (KeyError, ValueError, TypeError):
-            return None
+        series = self._series()
+        if series is None:
+            return 0.0
+        value = series.totals.get(self._data_key)
+        return 0.0 if value is None else value
 
-    @property
-    def extra_state_attributes(self) -> dict[str, any]:
+    def _state_attributes(self) -> dict[str, any]:
         """Return the state attributes."""
-        try:
-            community_data = self.coordinator.data["communities"].get(self._community_id, {})
-            energy_data = community_data.get("energy", {})
-            total_data = energy_data.get("total", {}).get(self._rc_number, {})
-
-            data_point = total_data.get(self._data_key, {})
-
-            # Get daily data from the energy_data
-            daily_data = {}
-            raw_data = energy_data.get("data", {}).get(self._rc_number, {})
-            for date_str, values in _iter_daily_data(raw_data):
-                if self._data_key in values:
-                    # Extract just the date part (YYYY-MM-DD)
-                    date_only = date_str.split("T")[0]
-                    val = values[self._data_key]
-                    value = val.get("value", "0") if isinstance(val, dict) else str(val)
-                    try:
-                        daily_data[date_only] = float(value)
-                    except (ValueError, TypeError):
-                        pass
-
-            return {
-                "community_id": self._community_id,
-                "community_name": self._community_name,
-                "rc_number": self._rc_number,
-                "value_type": data_point.get("value_type"),
-                "null_values": data_point.get("null_values"),
-                "unit": energy_data.get("meta", {}).get("unit", "kWh"),
-                "daily_data": daily_data,
-                "last_30_days": list(daily_data.values())[-30:] if daily_data else [],
-            }
-        except (KeyError, TypeError, AttributeError):
+        series = self._series()
+        if series is None:
             return {}
 
-
-class FroniusCounterPointSensor(CoordinatorEntity, SensorEntity):
+        data_point = series.total_meta.get(self._data_key, {})
+        prepared = _get_attributes(
+            self.coordinator, "communities", self._community.community_id
+        )[self._data_key]
+        return {
+            "community_id": self._community.community_id,
+            "community_name": self._community.community_name,
+            "rc_number": self._community.rc_number,
+            "value_type": data_point.get("value_type"),
+            "null_values": data_point.get("null_values"),
+            "unit": series.unit,
+            "daily_data": prepared["daily_data"],
+            "last_30_days": prepared["last_30_days"],
+            "chart": prepared["chart"],
+        }
+
+
+class FroniusCounterPointSensor(SkipUnchangedMixin, CoordinatorEntity, SensorEntity):
     """Representation of a Fronius Counter Point Sensor."""
 
+    _unrecorded_attributes = CHART_ATTRIBUTES
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
-        cp_id: int,
-        cp_number: str,
-        energy_direction: str,
-        energy_data: dict,
+        counter_point: CounterPointRef,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._cp_id = cp_id
-        self._cp_number = cp_number
-        self._energy_direction = energy_direction
-        self._attr_name = f"Counter Point {cp_number} ({energy_direction})"
-        self._attr_unique_id = f"fronius_counter_point_{cp_id}"
+        self._cp = counter_point
+        self._attr_name = (
+            f"Counter Point {counter_point.cp_number} ({counter_point.energy_direction})"
+        )
+        self._attr_unique_id = f"fronius_counter_point_{counter_point.cp_id}"
         self._attr_device_class = SensorDeviceClass.ENERGY
         self._attr_state_class = SensorStateClass.TOTAL_INCREASING
         self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
 
+    def _fingerprint(self) -> tuple:
+        item = (self.coordinator.data or {}).get("counter_points", {}).get(self._cp.cp_id)
+        if item is None:
+            return (None,)
+        return (
+            item.get("energy"),
+            item.get("attributes"),
+            item.get("info", {}).get("counter_point_number"),
+        )
+
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        try:
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            energy_data = cp_data.get("energy", {})
-            total_data = energy_data.get("total", {}).get("total", {})
-
-            # For producers, use ftotal, for consumers use ctotal
-            if self._energy_direction == "Producer":
-                value_str = total_data.get("ftotal", "0")
-            else:
-                value_str = total_data.get("ctotal", "0")
-
-            return float(value_str)
-        except (KeyError, ValueError, TypeError):
+        series = _get_series(self.coordinator, "counter_points", self._cp.cp_id)
+        if series is None:
             return None
 
-    @property
-    def extra_state_attributes(self) -> dict[str, any]:
+        # For producers, use ftotal, for consumers use ctotal
+        flow = "ftotal" if self._cp.energy_direction == "Producer" else "ctotal"
+        value = series.totals.get(flow)
+        return 0.0 if value is None else value
+
+    def _state_attributes(self) -> dict[str, any]:
         """Return the state attributes."""
-        try:
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            cp_info = cp_data.get("info", {})
-            energy_data = cp_data.get("energy", {})
-            total_data = energy_data.get("total", {}).get("total", {})
-
-            # Get daily data from the energy_data
-            daily_data_crec = {}
-            daily_data_cgrid = {}
-            daily_data_ctotal = {}
-            daily_data_frec = {}
-            daily_data_fgrid = {}
-            daily_data_ftotal = {}
-
-            # Counter points return data as a list; communities return a dict with rc_key
-            data_section = energy_data.get("data")
-            if isinstance(data_section, list):
-                raw_data = data_section  # list of {"date": "...", "crec": ..., ...}
-            elif isinstance(data_section, dict) and data_section:
-                rc_key = list(data_section.keys())[0]
-                raw_data = data_section.get(rc_key, {})
-            else:
-                raw_data = {}
-            if raw_data:
-
-                for date_str, values in _iter_daily_data(raw_data):
-                    # Extract just the date part (YYYY-MM-DD)
-                    date_only = date_str.split("T")[0]
-
-                    # Extract all data keys
-                    for key, daily_dict in [
-                        ("crec", daily_data_crec),
-                        ("cgrid", daily_data_cgrid),
-                        ("ctotal", daily_data_ctotal),
-                        ("frec", daily_data_frec),
-                        ("fgrid", daily_data_fgrid),
-                        ("ftotal", daily_data_ftotal),
-                    ]:
-                        if key in values:
-                            try:
-                                val = values[key]
-                                daily_dict[date_only] = float(
-                                    val.get("value", "0") if isinstance(val, dict) else val
-                                )
-                            except (ValueError, TypeError, AttributeError):
-                                pass
-
-            return {
-                "counter_point_id": self._cp_id,
-                "counter_number": self._cp_number,
-                "counter_point_number": cp_info.get("counter_point_number"),
-                "energy_direction": self._energy_direction,
-                "crec": total_data.get("crec"),
-                "cgrid": total_data.get("cgrid"),
-                "ctotal": total_data.get("ctotal"),
-                "frec": total_data.get("frec"),
-                "fgrid": total_data.get("fgrid"),
-                "ftotal": total_data.get("ftotal"),
-                "unit": energy_data.get("meta", {}).get("unit", "kWh"),
-                "daily_data_crec": daily_data_crec,
-                "daily_data_cgrid": daily_data_cgrid,
-                "daily_data_ctotal": daily_data_ctotal,
-                "daily_data_frec": daily_data_frec,
-                "daily_data_fgrid": daily_data_fgrid,
-                "daily_data_ftotal": daily_data_ftotal,
-                "last_30_days_crec": list(daily_data_crec.values())[-30:] if daily_data_crec else [],
-                "last_30_days_cgrid": list(daily_data_cgrid.values())[-30:] if daily_data_cgrid else [],
-                "last_30_days_ctotal": list(daily_data_ctotal.values())[-30:] if daily_data_ctotal else [],
-                "last_30_days_frec": list(daily_data_frec.values())[-30:] if daily_data_frec else [],
-                "last_30_days_fgrid": list(daily_data_fgrid.values())[-30:] if daily_data_fgrid else [],
-                "last_30_days_ftotal": list(daily_data_ftotal.values())[-30:] if daily_data_ftotal else [],
-            }
-        except (KeyError, TypeError, AttributeError):
+        series = _get_series(self.coordinator, "counter_points", self._cp.cp_id)
+        if series is None:
             return {}
-
-
-class DailyCostSensor(CoordinatorEntity, SensorEntity):
+        cp_info = self.coordinator.data["counter_points"][self._cp.cp_id].get("info", {})
+
+        attributes = {
+            "counter_point_id": self._cp.cp_id,
+            "counter_number": self._cp.cp_number,
+            "counter_point_number": cp_info.get("counter_point_number"),
+            "energy_direction": self._cp.energy_direction,
+        }
+        for flow in FLOWS:
+            attributes[flow] = series.totals.get(flow)
+        attributes["unit"] = series.unit
+        prepared = _get_attributes(self.coordinator, "counter_points", self._cp.cp_id)
+        for flow in FLOWS:
+            attributes[f"daily_data_{flow}"] = prepared["daily"][flow]
+        for flow in FLOWS:
+            attributes[f"last_30_days_{flow}"] = prepared["last_30_days"][flow]
+        attributes["chart"] = prepared["chart"]
+        return attributes
+
+
+class DailyCostSensor(SkipUnchangedMixin, CoordinatorEntity, SensorEntity):
     """Representation of a Daily Cost Sensor."""
 
+    _unrecorded_attributes = CHART_ATTRIBUTES
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
-        cp_id: int,
-        cp_number: str,
-        energy_direction: str,
+        counter_point: CounterPointRef,
         pricing: dict,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._cp_id = cp_id
-        self._cp_number = cp_number
-        self._energy_direction = energy_direction
+        self._cp = counter_point
         self._pricing = pricing
-        self._attr_name = f"Counter Point {cp_number} Daily Cost"
-        self._attr_unique_id = f"fronius_counter_point_{cp_id}_daily_cost"
+        self._attr_name = f"Counter Point {counter_point.cp_number} Daily Cost"
+        self._attr_unique_id = f"fronius_counter_point_{counter_point.cp_id}_daily_cost"
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_native_unit_of_measurement = CURRENCY_EURO
         self._attr_state_class = None  # Daily cost is not cumulative
 
+    def _prepared(self) -> dict | None:
+        return _get_attributes(self.coordinator, "counter_points", self._cp.cp_id)
+
+    def _fingerprint(self) -> tuple:
+        return (self._prepared(),)
+
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor (most recent daily cost)."""
-        try:
-            daily_costs = self._calculate_daily_costs()
-            if daily_costs:
-                # Return the most recent day's cost
-                return round(list(daily_costs.values())[-1], 2)
-            return None
-        except (KeyError, ValueError, TypeError):
-            return None
-
-    def _calculate_daily_costs(self) -> dict[str, float]:
-        """Calculate daily costs from energy data."""
-        try:
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            energy_data = cp_data.get("energy", {})
-            data_section = energy_data.get("data")
-            if isinstance(data_section, list):
-                raw_data = data_section
-            elif isinstance(data_section, dict) and data_section:
-                rc_key = list(data_section.keys())[0]
-                raw_data = data_section.get(rc_key, {})
-            else:
-                return {}
-
-            if not raw_data:
-                return {}
-
-            daily_costs = {}
-            for date_str, values in _iter_daily_data(raw_data):
-                date_only = date_str.split("T")[0]
-
-                def _get_val(key):
-                    v = values.get(key, {})
-                    return float(v.get("value", "0") if isinstance(v, dict) else v or 0)
-
-                # Consumption costs
-                cgrid = _get_val("cgrid")
-                crec = _get_val("crec")
-                consumption_cost = (
-                    cgrid * self._pricing["grid_consumption"]
-                    + crec * self._pricing["community_consumption"]
-                )
-
-                # Feed-in revenue (negative cost)
-                fgrid = _get_val("fgrid")
-                frec = _get_val("frec")
-                feed_in_revenue = (
-                    fgrid * self._pricing["grid_feed_in"]
-                    + frec * self._pricing["community_feed_in"]
-                )
-
-                # Net cost
-                net_cost = consumption_cost - feed_in_revenue
-                daily_costs[date_only] = net_cost
-
-            return daily_costs
-        except (KeyError, ValueError, TypeError, AttributeError):
-            return {}
+        prepared = self._prepared()
+        return prepared["daily_cost"] if prepared is not None else None
 
-    @property
-    def extra_state_attributes(self) -> dict[str, any]:
+    def _state_attributes(self) -> dict[str, any]:
         """Return the state attributes."""
-        try:
-            daily_costs = self._calculate_daily_costs()
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            energy_data = cp_data.get("energy", {})
-            data_dict = energy_data.get("data", {})
-
-            if not data_dict:
-                return {}
-
-            rc_key = list(data_dict.keys())[0]
-            raw_data = data_dict.get(rc_key, {})
-
-            # Calculate breakdown
-            daily_breakdown = {}
-            for date_str, values in raw_data.items():
-                date_only = date_str.split("T")[0]
-
-                cgrid = float(values.get("cgrid", {}).get("value", "0"))
-                crec = float(values.get("crec", {}).get("value", "0"))
-                fgrid = float(values.get("fgrid", {}).get("value", "0"))
-                frec = float(values.get("frec", {}).get("value", "0"))
-
-                daily_breakdown[date_only] = {
-                    "grid_consumption_cost": round(
-                        cgrid * self._pricing["grid_consumption"], 2
-                    ),
-                    "community_consumption_cost": round(
-                        crec * self._pricing["community_consumption"], 2
-                    ),
-                    "grid_feed_in_revenue": round(
-                        fgrid * self._pricing["grid_feed_in"], 2
-                    ),
-                    "community_feed_in_revenue": round(
-                        frec * self._pricing["community_feed_in"], 2
-                    ),
-                }
-
-            return {
-                "counter_point_id": self._cp_id,
-                "counter_number": self._cp_number,
-                "energy_direction": self._energy_direction,
-                "pricing": self._pricing,
-                "daily_costs": {k: round(v, 2) for k, v in daily_costs.items()},
-                "daily_costs_breakdown": daily_breakdown,
-                "last_30_days_costs": [
-                    round(v, 2) for v in list(daily_costs.values())[-30:]
-                ]
-                if daily_costs
-                else [],
-            }
-        except (KeyError, TypeError):
+        prepared = self._prepared()
+        if prepared is None or not prepared["daily_costs"]:
             return {}
 
+        return {
+            "counter_point_id": self._cp.cp_id,
+            "counter_number": self._cp.cp_number,
+            "energy_direction": self._cp.energy_direction,
+            "pricing": self._pricing,
+            "daily_costs": prepared["daily_costs"],
+            "daily_costs_breakdown": prepared["daily_costs_breakdown"],
+            "last_30_days_costs": prepared["last_30_days_costs"],
+            "chart": prepared["daily_costs_chart"],
+        }
+
 
-class MonthlyCostSensor(CoordinatorEntity, SensorEntity):
+class MonthlyCostSensor(SkipUnchangedMixin, CoordinatorEntity, SensorEntity):
     """Representation of a Monthly Cost Sensor."""
 
+    _unrecorded_attributes = CHART_ATTRIBUTES
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
-        cp_id: int,
-        cp_number: str,
-        energy_direction: str,
+        counter_point: CounterPointRef,
         pricing: dict,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._cp_id = cp_id
-        self._cp_number = cp_number
-        self._energy_direction = energy_direction
+        self._cp = counter_point
         self._pricing = pricing
-        self._attr_name = f"Counter Point {cp_number} Monthly Cost"
-        self._attr_unique_id = f"fronius_counter_point_{cp_id}_monthly_cost"
+        self._attr_name = f"Counter Point {counter_point.cp_number} Monthly Cost"
+        self._attr_unique_id = f"fronius_counter_point_{counter_point.cp_id}_monthly_cost"
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_native_unit_of_measurement = CURRENCY_EURO
         self._attr_state_class = SensorStateClass.TOTAL
 
+    def _prepared(self) -> dict | None:
+        return _get_attributes(self.coordinator, "counter_points", self._cp.cp_id)
+
+    def _fingerprint(self) -> tuple:
+        return (self._prepared(),)
+
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor (current month cost)."""
-        try:
-            monthly_costs = self._calculate_monthly_costs()
-            if monthly_costs:
-                # Return the most recent month's cost
-                return round(list(monthly_costs.values())[-1], 2)
-            return None
-        except (KeyError, ValueError, TypeError):
-            return None
-
-    def _calculate_monthly_costs(self) -> dict[str, float]:
-        """Calculate monthly costs from energy data."""
-        try:
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            energy_data = cp_data.get("energy", {})
-            data_dict = energy_data.get("data", {})
-
-            if not data_dict:
-                return {}
-
-            rc_key = list(data_dict.keys())[0]
-            raw_data = data_dict.get(rc_key, {})
-
-            monthly_totals = {}
-            for date_str, values in raw_data.items():
-                date_only = date_str.split("T")[0]
-                month_key = date_only[:7]  # YYYY-MM
-
-                # Consumption costs
-                cgrid = float(values.get("cgrid", {}).get("value", "0"))
-                crec = float(values.get("crec", {}).get("value", "0"))
-                consumption_cost = (
-                    cgrid * self._pricing["grid_consumption"]
-                    + crec * self._pricing["community_consumption"]
-                )
-
-                # Feed-in revenue
-                fgrid = float(values.get("fgrid", {}).get("value", "0"))
-                frec = float(values.get("frec", {}).get("value", "0"))
-                feed_in_revenue = (
-                    fgrid * self._pricing["grid_feed_in"]
-                    + frec * self._pricing["community_feed_in"]
-                )
-
-                net_cost = consumption_cost - feed_in_revenue
-
-                if month_key not in monthly_totals:
-                    monthly_totals[month_key] = 0
-                monthly_totals[month_key] += net_cost
-
-            return monthly_totals
-        except (KeyError, ValueError, TypeError):
-            return {}
+        prepared = self._prepared()
+        return prepared["monthly_cost"] if prepared is not None else None
 
-    @property
-    def extra_state_attributes(self) -> dict[str, any]:
+    def _state_attributes(self) -> dict[str, any]:
         """Return the state attributes."""
-        try:
-            monthly_costs = self._calculate_monthly_costs()
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            energy_data = cp_data.get("energy", {})
-            data_dict = energy_data.get("data", {})
-
-            if not data_dict:
-                return {}
-
-            rc_key = list(data_dict.keys())[0]
-            raw_data = data_dict.get(rc_key, {})
-
-            # Calculate monthly breakdown
-            monthly_breakdown = {}
-            for date_str, values in raw_data.items():
-                date_only = date_str.split("T")[0]
-                month_key = date_only[:7]
-
-                cgrid = float(values.get("cgrid", {}).get("value", "0"))
-                crec = float(values.get("crec", {}).get("value", "0"))
-                fgrid = float(values.get("fgrid", {}).get("value", "0"))
-                frec = float(values.get("frec", {}).get("value", "0"))
-
-                if month_key not in monthly_breakdown:
-                    monthly_breakdown[month_key] = {
-                        "grid_consumption_cost": 0,
-                        "community_consumption_cost": 0,
-                        "grid_feed_in_revenue": 0,
-                        "community_feed_in_revenue": 0,
-                        "days_count": 0,
-                    }
-
-                monthly_breakdown[month_key]["grid_consumption_cost"] += (
-                    cgrid * self._pricing["grid_consumption"]
-                )
-                monthly_breakdown[month_key]["community_consumption_cost"] += (
-                    crec * self._pricing["community_consumption"]
-                )
-                monthly_breakdown[month_key]["grid_feed_in_revenue"] += (
-                    fgrid * self._pricing["grid_feed_in"]
-                )
-                monthly_breakdown[month_key]["community_feed_in_revenue"] += (
-                    frec * self._pricing["community_feed_in"]
-                )
-                monthly_breakdown[month_key]["days_count"] += 1
-
-            # Round all values
-            for month in monthly_breakdown:
-                for key in monthly_breakdown[month]:
-                    if key != "days_count":
-                        monthly_breakdown[month][key] = round(
-                            monthly_breakdown[month][key], 2
-                        )
-
-            return {
-                "counter_point_id": self._cp_id,
-                "counter_number": self._cp_number,
-                "energy_direction": self._energy_direction,
-                "pricing": self._pricing,
-                "monthly_costs": {k: round(v, 2) for k, v in monthly_costs.items()},
-                "monthly_costs_breakdown": monthly_breakdown,
-            }
-        except (KeyError, TypeError):
+        prepared = self._prepared()
+        if prepared is None or not prepared["monthly_costs"]:
             return {}
 
+        return {
+            "counter_point_id": self._cp.cp_id,
+            "counter_number": self._cp.cp_number,
+            "energy_direction": self._cp.energy_direction,
+            "pricing": self._pricing,
+            "monthly_costs": prepared["monthly_costs"],
+            "monthly_costs_breakdown": prepared["monthly_costs_breakdown"],
+            "chart": prepared["monthly_costs_chart"],
+        }
+
 
-class YearlyCostSensor(CoordinatorEntity, SensorEntity):
+class YearlyCostSensor(SkipUnchangedMixin, CoordinatorEntity, SensorEntity):
     """Representation of a Yearly Cost Sensor."""
 
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
-        cp_id: int,
-        cp_number: str,
-        energy_direction: str,
+        counter_point: CounterPointRef,
         pricing: dict,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._cp_id = cp_id
-        self._cp_number = cp_number
-        self._energy_direction = energy_direction
+        self._cp = counter_point
         self._pricing = pricing
-        self._attr_name = f"Counter Point {cp_number} Yearly Cost"
-        self._attr_unique_id = f"fronius_counter_point_{cp_id}_yearly_cost"
+        self._attr_name = f"Counter Point {counter_point.cp_number} Yearly Cost"
+        self._attr_unique_id = f"fronius_counter_point_{counter_point.cp_id}_yearly_cost"
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_native_unit_of_measurement = CURRENCY_EURO
         self._attr_state_class = SensorStateClass.TOTAL
 
+    def _prepared(self) -> dict | None:
+        return _get_attributes(self.coordinator, "counter_points", self._cp.cp_id)
+
+    def _fingerprint(self) -> tuple:
+        return (self._prepared(),)
+
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor (current year cost)."""
-        try:
-            yearly_costs = self._calculate_yearly_costs()
-            if yearly_costs:
-                # Return the most recent year's cost
-                return round(list(yearly_costs.values())[-1], 2)
+        prepared = self._prepared()
+        return prepared["yearly_cost"] if prepared is not None else None
+
+    def _state_attributes(self) -> dict[str, any]:
+        """Return the state attributes."""
+        prepared = self._prepared()
+        if prepared is None or not prepared["yearly_costs"]:
+            return {}
+
+        return {
+            "counter_point_id": self._cp.cp_id,
+            "counter_number": self._cp.cp_number,
+            "energy_direction": self._cp.energy_direction,
+            "pricing": self._pricing,
+            "yearly_costs": prepared["yearly_costs"],
+            "yearly_cost_breakdown": prepared["yearly_cost_breakdown"],
+        }
+
+
+class QuarterHourPeakSensor(SkipUnchangedMixin, CoordinatorEntity, SensorEntity):
+    """Highest quarter-hour load of a counter point over the buffered days."""
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        counter_point: CounterPointRef,
+        load_profiles,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._cp = counter_point
+        self._load_profiles = load_profiles
+        self._flow = "ftotal" if counter_point.energy_direction == "Producer" else "ctotal"
+        self._attr_name = f"Counter Point {counter_point.cp_number} Quarter Hour Peak"
+        self._attr_unique_id = (
+            f"fronius_counter_point_{counter_point.cp_id}_quarter_hour_peak"
+        )
+        self._attr_device_class = SensorDeviceClass.POWER
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+
+    def _peak(self) -> tuple[str, int, float] | None:
+        buffer = self._load_profiles.buffers.get(self._cp.cp_id)
+        if buffer is None:
+            return None
+        return buffer.peak(self._flow)
+
+    def _fingerprint(self) -> tuple:
+        buffer = self._load_profiles.buffers.get(self._cp.cp_id)
+        return (buffer, buffer.revision if buffer is not None else None)
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the peak average power of a quarter hour (kWh × 4)."""
+        peak = self._peak()
+        if peak is None:
             return None
-        except (KeyError, ValueError, TypeError):
+        return round(peak[2] * 4, 3)
+
+    def _state_attributes(self) -> dict[str, any]:
+        """Return the state attributes."""
+        buffer = self._load_profiles.buffers.get(self._cp.cp_id)
+        peak = self._peak()
+        attributes = {
+            "counter_point_id": self._cp.cp_id,
+            "counter_number": self._cp.cp_number,
+            "energy_direction": self._cp.energy_direction,
+            "flow": self._flow,
+            "days_available": buffer.days() if buffer is not None else [],
+        }
+        if peak is not None:
+            day, slot, energy = peak
+            attributes.update({
+                "peak_date": day,
+                "peak_time": f"{slot // 4:02d}:{(slot % 4) * 15:02d}",
+                "peak_energy_kwh": round(energy, 3),
+            })
+        return attributes
+
+
+class KpiSensor(SkipUnchangedMixin, CoordinatorEntity, SensorEntity):
+    """Self-sufficiency or community share over a period, in percent.
+
+    Values come from running sums in the KpiManager, which the coordinator
+    updates with new days only.
+    """
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        kpis: KpiManager,
+        key: tuple,
+        name_prefix: str,
+        unique_id_prefix: str,
+        kpi: str,
+        period: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._kpis = kpis
+        self._key = key
+        self._kpi = kpi
+        self._period = period
+        self._attr_name = f"{name_prefix} {KPI_NAMES[kpi]} ({PERIOD_NAMES[period]})"
+        self._attr_unique_id = f"{unique_id_prefix}_{kpi}_{period}"
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_icon = "mdi:percent-circle"
+
+    def _fingerprint(self) -> tuple:
+        tracker = self._kpis.trackers.get(self._key)
+        if tracker is None:
+            return (None,)
+        return (tracker.value(self._kpi, self._period), tracker.window(self._period))
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the KPI in percent."""
+        tracker = self._kpis.trackers.get(self._key)
+        if tracker is None:
             return None
+        return tracker.value(self._kpi, self._period)
+
+    def _state_attributes(self) -> dict[str, any]:
+        """Return the state attributes."""
+        tracker = self._kpis.trackers.get(self._key)
+        window = tracker.window(self._period) if tracker is not None else None
+        return {
+            "kpi": self._kpi,
+            "period": self._period,
+            "period_start": window[0].isoformat() if window else None,
+            "period_end": window[1].isoformat() if window else None,
+        }
 
-    def _calculate_yearly_costs(self) -> dict[str, float]:
-        """Calculate yearly costs from energy data."""
-        try:
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            energy_data = cp_data.get("energy", {})
-            data_dict = energy_data.get("data", {})
-
-            if not data_dict:
-                return {}
-
-            rc_key = list(data_dict.keys())[0]
-            raw_data = data_dict.get(rc_key, {})
-
-            yearly_totals = {}
-            for date_str, values in raw_data.items():
-                date_only = date_str.split("T")[0]
-                year_key = date_only[:4]  # YYYY
-
-                # Consumption costs
-                cgrid = float(values.get("cgrid", {}).get("value", "0"))
-                crec = float(values.get("crec", {}).get("value", "0"))
-                consumption_cost = (
-                    cgrid * self._pricing["grid_consumption"]
-                    + crec * self._pricing["community_consumption"]
-                )
-
-                # Feed-in revenue
-                fgrid = float(values.get("fgrid", {}).get("value", "0"))
-                frec = float(values.get("frec", {}).get("value", "0"))
-                feed_in_revenue = (
-                    fgrid * self._pricing["grid_feed_in"]
-                    + frec * self._pricing["community_feed_in"]
-                )
-
-                net_cost = consumption_cost - feed_in_revenue
-
-                if year_key not in yearly_totals:
-                    yearly_totals[year_key] = 0
-                yearly_totals[year_key] += net_cost
-
-            return yearly_totals
-        except (KeyError, ValueError, TypeError):
-            return {}
+
+class BackfillProgressSensor(SensorEntity):
+    """Progress of the background statistics backfill (diagnostic)."""
+
+    _attr_should_poll = False
+
+    def __init__(self, backfill: BackfillJob, entry_id: str) -> None:
+        """Initialize the sensor."""
+        self._backfill = backfill
+        self._entry_id = entry_id
+        self._attr_name = "Fronius Energiegemeinschaft Statistics Backfill"
+        self._attr_unique_id = f"fronius_{entry_id}_statistics_backfill"
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_icon = "mdi:database-clock"
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to progress updates."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_BACKFILL_PROGRESS.format(self._entry_id),
+                self._handle_progress,
+            )
+        )
+
+    @callback
+    def _handle_progress(self) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> float:
+        """Return the share of fetched months in percent."""
+        return self._backfill.progress
 
     @property
     def extra_state_attributes(self) -> dict[str, any]:
         """Return the state attributes."""
-        try:
-            yearly_costs = self._calculate_yearly_costs()
-            cp_data = self.coordinator.data["counter_points"].get(self._cp_id, {})
-            energy_data = cp_data.get("energy", {})
-            data_dict = energy_data.get("data", {})
-
-            if not data_dict:
-                return {}
-
-            rc_key = list(data_dict.keys())[0]
-            raw_data = data_dict.get(rc_key, {})
-
-            # Calculate yearly breakdown
-            yearly_breakdown = {}
-            for date_str, values in raw_data.items():
-                date_only = date_str.split("T")[0]
-                year_key = date_only[:4]
-
-                cgrid = float(values.get("cgrid", {}).get("value", "0"))
-                crec = float(values.get("crec", {}).get("value", "0"))
-                fgrid = float(values.get("fgrid", {}).get("value", "0"))
-                frec = float(values.get("frec", {}).get("value", "0"))
-
-                if year_key not in yearly_breakdown:
-                    yearly_breakdown[year_key] = {
-                        "grid_consumption_cost": 0,
-                        "community_consumption_cost": 0,
-                        "grid_feed_in_revenue": 0,
-                        "community_feed_in_revenue": 0,
-                    }
-
-                yearly_breakdown[year_key]["grid_consumption_cost"] += (
-                    cgrid * self._pricing["grid_consumption"]
-                )
-                yearly_breakdown[year_key]["community_consumption_cost"] += (
-                    crec * self._pricing["community_consumption"]
-                )
-                yearly_breakdown[year_key]["grid_feed_in_revenue"] += (
-                    fgrid * self._pricing["grid_feed_in"]
-                )
-                yearly_breakdown[year_key]["community_feed_in_revenue"] += (
-                    frec * self._pricing["community_feed_in"]
-                )
-
-            # Round all values
-            for year in yearly_breakdown:
-                for key in yearly_breakdown[year]:
-                    yearly_breakdown[year][key] = round(yearly_breakdown[year][key], 2)
-
-            return {
-                "counter_point_id": self._cp_id,
-                "counter_number": self._cp_number,
-                "energy_direction": self._energy_direction,
-                "pricing": self._pricing,
-                "yearly_costs": {k: round(v, 2) for k, v in yearly_costs.items()},
-                "yearly_cost_breakdown": yearly_breakdown,
-            }
-        except (KeyError, TypeError):
-            return {}
+        return {
+            "state": self._backfill.state,
+            "months_done": self._backfill.done,
+            "months_total": self._backfill.total,
+            "failed_requests": self._backfill.failed,
+        }
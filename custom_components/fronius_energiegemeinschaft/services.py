@@ -0,0 +1,429 @@
+"""Services for the Fronius Energiegemeinschaft integration."""
+from __future__ import annotations
+
+import logging
+import calendar
+from datetime import date, datetime, timedelta
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    DOMAIN,
+    DATA_ARCHIVE,
+    DATA_CLIENT,
+    DATA_COORDINATORS,
+    DATA_PRICING,
+    BATTERY_MAX_CONFIGURATIONS,
+    BATTERY_MAX_MONTHS,
+    DEFAULT_BATTERY_EFFICIENCY,
+    EXPORT_DEFAULT_MONTHS,
+    SERVICE_COMPARE_TARIFFS,
+    SERVICE_EXPORT_HISTORY,
+    SERVICE_PROFILE_REFRESH,
+    SERVICE_SIMULATE_BATTERY,
+)
+from .api_client import PRIORITY_BACKFILL, request_priority
+from .battery import simulate_battery
+from .coordinator import COORDINATOR_COUNTER_POINTS, merged_data
+from .energy_data import month_range
+from .export import EXPORT_FORMATS, async_export_history, resolve_export_path
+from .profiler import async_profile_refresh
+from .tariffs import PRICE_KEYS, archive_coverage, compare_tariffs
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_FORMAT = "format"
+ATTR_FILENAME = "filename"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_INCLUDE = "include"
+ATTR_SCENARIOS = "scenarios"
+ATTR_COUNTER_POINT_ID = "counter_point_id"
+ATTR_TIME_OF_USE = "time_of_use"
+ATTR_CAPACITIES = "capacities"
+ATTR_POWERS = "powers"
+ATTR_EFFICIENCY = "efficiency"
+ATTR_RESOLUTION = "resolution"
+ATTR_ALLOW_PARTIAL = "allow_partial"
+
+CURRENT_SCENARIO = "current"
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+EXPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FORMAT, default="csv"): vol.In(EXPORT_FORMATS),
+        vol.Optional(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_START): vol.Match(MONTH_PATTERN),
+        vol.Optional(ATTR_END): vol.Match(MONTH_PATTERN),
+        vol.Optional(ATTR_INCLUDE, default="all"): vol.In(
+            ["all", "communities", "counter_points"]
+        ),
+    }
+)
+
+TIME_PATTERN = r"^([01]\d|2[0-3]):[0-5]\d$|^24:00$"
+
+TIME_OF_USE_SCHEMA = vol.Schema(
+    {
+        vol.Required("start"): vol.Match(TIME_PATTERN),
+        vol.Required("end"): vol.Match(TIME_PATTERN),
+        vol.Optional("weekdays"): vol.All(
+            cv.ensure_list, [vol.All(vol.Coerce(int), vol.Range(min=0, max=6))]
+        ),
+        **{vol.Optional(key): vol.Coerce(float) for key in PRICE_KEYS},
+    }
+)
+
+SCENARIO_SCHEMA = vol.Schema(
+    {
+        vol.Required("name"): cv.string,
+        **{vol.Required(key): vol.Coerce(float) for key in PRICE_KEYS},
+        vol.Optional(ATTR_TIME_OF_USE, default=list): [TIME_OF_USE_SCHEMA],
+    }
+)
+
+COMPARE_TARIFFS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_SCENARIOS): vol.All(cv.ensure_list, [SCENARIO_SCHEMA], vol.Length(min=1)),
+        vol.Optional(ATTR_START): vol.Match(MONTH_PATTERN),
+        vol.Optional(ATTR_END): vol.Match(MONTH_PATTERN),
+        vol.Optional(ATTR_COUNTER_POINT_ID): vol.Coerce(int),
+        vol.Optional(ATTR_ALLOW_PARTIAL, default=False): cv.boolean,
+    }
+)
+
+def _battery_size(data: dict) -> dict:
+    """Bound the work of a simulation: configurations times months of timeline."""
+    powers = data.get(ATTR_POWERS)
+    configurations = len(data[ATTR_CAPACITIES]) * (len(powers) if powers else 1)
+    if configurations > BATTERY_MAX_CONFIGURATIONS:
+        raise vol.Invalid(
+            f"{configurations} configurations requested, at most "
+            f"{BATTERY_MAX_CONFIGURATIONS} are supported"
+        )
+    if ATTR_START in data:
+        end = data.get(ATTR_END, datetime.now().strftime("%Y-%m"))
+        months = len(month_range(data[ATTR_START], end))
+        if months > BATTERY_MAX_MONTHS:
+            raise vol.Invalid(
+                f"{months} months requested, at most {BATTERY_MAX_MONTHS} are simulated per call"
+            )
+    return data
+
+
+SIMULATE_BATTERY_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Required(ATTR_CAPACITIES): vol.All(
+                cv.ensure_list,
+                [vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1000))],
+                vol.Length(min=1, max=BATTERY_MAX_CONFIGURATIONS),
+            ),
+            vol.Optional(ATTR_POWERS): vol.All(
+                cv.ensure_list,
+                [vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1000))],
+                vol.Length(min=1, max=BATTERY_MAX_CONFIGURATIONS),
+            ),
+            vol.Optional(ATTR_EFFICIENCY, default=DEFAULT_BATTERY_EFFICIENCY): vol.All(
+                vol.Coerce(float), vol.Range(min=0.5, max=1.0)
+            ),
+            vol.Optional(ATTR_RESOLUTION, default="auto"): vol.In(["auto", "day"]),
+            vol.Optional(ATTR_START): vol.Match(MONTH_PATTERN),
+            vol.Optional(ATTR_END): vol.Match(MONTH_PATTERN),
+            vol.Optional(ATTR_COUNTER_POINT_ID): vol.Coerce(int),
+            vol.Optional(ATTR_ALLOW_PARTIAL, default=False): cv.boolean,
+        }
+    ),
+    _battery_size,
+)
+
+PROFILE_REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FILENAME): cv.string,
+    }
+)
+
+
+def _get_entry_id(hass: HomeAssistant, call: ServiceCall) -> str:
+    """Return the targeted config entry id.
+
+    The entry may be omitted when only one entry is loaded.
+    """
+    entries = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id:
+        if entry_id not in entries:
+            raise HomeAssistantError(f"Config entry {entry_id} is not loaded")
+        return entry_id
+    if len(entries) != 1:
+        raise HomeAssistantError(
+            f"{len(entries)} entries are loaded; specify {ATTR_CONFIG_ENTRY_ID}"
+        )
+    return next(iter(entries))
+
+
+def _get_entry_data(hass: HomeAssistant, call: ServiceCall) -> dict:
+    """Return hass.data for the targeted config entry."""
+    return hass.data[DOMAIN][_get_entry_id(hass, call)]
+
+
+def _month_bounds(call: ServiceCall) -> tuple[str, str]:
+    """Return the (start, end) YYYY-MM months of a call, defaulting to the last 12 months."""
+    now = datetime.now()
+    end = call.data.get(ATTR_END, now.strftime("%Y-%m"))
+    start = call.data.get(ATTR_START)
+    if start is None:
+        start_dt = now.replace(day=1)
+        for _ in range(EXPORT_DEFAULT_MONTHS - 1):
+            start_dt = (start_dt - timedelta(days=1)).replace(day=1)
+        start = start_dt.strftime("%Y-%m")
+    if start > end:
+        raise HomeAssistantError(f"start ({start}) must not be after end ({end})")
+    return start, end
+
+
+def _day_bounds(start: str, end: str) -> tuple[date, date]:
+    """Return the first day of the start month and the last day of the end month."""
+    end_year, end_month = (int(part) for part in end.split("-"))
+    return (
+        date.fromisoformat(f"{start}-01"),
+        date(end_year, end_month, calendar.monthrange(end_year, end_month)[1]),
+    )
+
+
+def _archive_bounds(start: str, end: str) -> tuple[date, date]:
+    """Return the day bounds of the months, ending yesterday at the latest.
+
+    The portal publishes a day after it ended, so later days cannot be archived.
+    """
+    first, last = _day_bounds(start, end)
+    last = min(last, date.today() - timedelta(days=1))
+    if first > last:
+        raise ServiceValidationError(f"{start} has no completed day yet")
+    return first, last
+
+
+async def _async_coverage(
+    hass: HomeAssistant,
+    entry_data: dict,
+    cp_ids: list,
+    call: ServiceCall,
+    first: date,
+    last: date,
+) -> dict:
+    """Return the archive coverage of the range; raise if incomplete unless allowed."""
+    coverage = await hass.async_add_executor_job(
+        archive_coverage, entry_data[DATA_ARCHIVE], cp_ids, first, last
+    )
+    if coverage["missing_days"] and not call.data[ATTR_ALLOW_PARTIAL]:
+        gaps = ", ".join(
+            first_day if first_day == last_day else f"{first_day}..{last_day}"
+            for first_day, last_day in coverage["missing_ranges"][:3]
+        )
+        more = len(coverage["missing_ranges"]) - 3
+        raise ServiceValidationError(
+            f"The archive covers {coverage['days_covered']} of "
+            f"{coverage['days_requested']} days from {first} to {last} (missing: {gaps}"
+            f"{f' and {more} more gaps' if more > 0 else ''}); enable archiving of the "
+            f"statistics history in the options, narrow start/end or set {ATTR_ALLOW_PARTIAL}"
+        )
+    return coverage
+
+
+def _counter_point_ids(entry_data: dict, call: ServiceCall) -> list:
+    """Return the requested counter point, or all counter points of the entry."""
+    counter_points = merged_data(entry_data[DATA_COORDINATORS])[COORDINATOR_COUNTER_POINTS]
+    cp_id = call.data.get(ATTR_COUNTER_POINT_ID)
+    if cp_id is None:
+        return list(counter_points)
+    if cp_id not in counter_points:
+        raise HomeAssistantError(f"Unknown counter point {cp_id}")
+    return [cp_id]
+
+
+async def _async_export_history(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle the export_history service."""
+    entry_data = _get_entry_data(hass, call)
+    data = merged_data(entry_data[DATA_COORDINATORS])
+
+    start, end = _month_bounds(call)
+
+    include = call.data[ATTR_INCLUDE]
+    communities = (
+        [item["info"] for item in data.get("communities", {}).values()]
+        if include in ("all", "communities")
+        else []
+    )
+    counter_points = (
+        [item["info"] for item in data.get("counter_points", {}).values()]
+        if include in ("all", "counter_points")
+        else []
+    )
+
+    fmt = call.data[ATTR_FORMAT]
+    path = resolve_export_path(hass, call.data.get(ATTR_FILENAME), fmt)
+    # A bulk download of whole months: queued like the backfill, so polling keeps its slots
+    with request_priority(PRIORITY_BACKFILL):
+        return await async_export_history(
+            hass,
+            entry_data[DATA_CLIENT],
+            path,
+            fmt,
+            communities,
+            counter_points,
+            month_range(start, end),
+        )
+
+
+async def _async_compare_tariffs(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle the compare_tariffs service."""
+    entry_data = _get_entry_data(hass, call)
+    cp_ids = _counter_point_ids(entry_data, call)
+
+    # The configured prices are always evaluated as baseline
+    scenarios = {CURRENT_SCENARIO: dict(entry_data[DATA_PRICING])}
+    for scenario in call.data[ATTR_SCENARIOS]:
+        name = scenario["name"]
+        if name in scenarios:
+            raise HomeAssistantError(f"Duplicate scenario name '{name}'")
+        scenarios[name] = {key: value for key, value in scenario.items() if key != "name"}
+
+    start, end = _month_bounds(call)
+    first, last = _archive_bounds(start, end)
+    coverage = await _async_coverage(hass, entry_data, cp_ids, call, first, last)
+    result = await hass.async_add_executor_job(
+        compare_tariffs,
+        entry_data[DATA_ARCHIVE],
+        cp_ids,
+        scenarios,
+        first,
+        last,
+    )
+    return {
+        "start": start,
+        "end": end,
+        "first_day": first.isoformat(),
+        "last_day": last.isoformat(),
+        **coverage,
+        **result,
+    }
+
+
+async def _async_simulate_battery(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle the simulate_battery service."""
+    entry_data = _get_entry_data(hass, call)
+    cp_ids = _counter_point_ids(entry_data, call)
+
+    capacities = call.data[ATTR_CAPACITIES]
+    powers = call.data.get(ATTR_POWERS)
+    # Without powers every capacity is simulated at 1C
+    configurations = (
+        [(capacity, power) for capacity in capacities for power in powers]
+        if powers
+        else [(capacity, capacity) for capacity in capacities]
+    )
+
+    start, end = _month_bounds(call)
+    first, last = _archive_bounds(start, end)
+    coverage = await _async_coverage(hass, entry_data, cp_ids, call, first, last)
+    result = await hass.async_add_executor_job(
+        simulate_battery,
+        entry_data[DATA_ARCHIVE],
+        cp_ids,
+        configurations,
+        dict(entry_data[DATA_PRICING]),
+        first,
+        last,
+        call.data[ATTR_EFFICIENCY],
+        call.data[ATTR_RESOLUTION] == "auto",
+    )
+    return {
+        "start": start,
+        "end": end,
+        "first_day": first.isoformat(),
+        "last_day": last.isoformat(),
+        "efficiency": call.data[ATTR_EFFICIENCY],
+        **coverage,
+        **result,
+    }
+
+
+async def _async_profile_refresh(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle the profile_refresh service."""
+    entry_id = _get_entry_id(hass, call)
+    return await async_profile_refresh(
+        hass,
+        entry_id,
+        hass.data[DOMAIN][entry_id][DATA_COORDINATORS],
+        call.data.get(ATTR_FILENAME),
+    )
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register integration services (once for all entries)."""
+    if hass.services.has_service(DOMAIN, SERVICE_EXPORT_HISTORY):
+        return
+
+    async def export_history(call: ServiceCall) -> ServiceResponse:
+        return await _async_export_history(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        export_history,
+        schema=EXPORT_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def compare_tariffs_service(call: ServiceCall) -> ServiceResponse:
+        return await _async_compare_tariffs(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_COMPARE_TARIFFS,
+        compare_tariffs_service,
+        schema=COMPARE_TARIFFS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def simulate_battery_service(call: ServiceCall) -> ServiceResponse:
+        return await _async_simulate_battery(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SIMULATE_BATTERY,
+        simulate_battery_service,
+        schema=SIMULATE_BATTERY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def profile_refresh(call: ServiceCall) -> ServiceResponse:
+        return await _async_profile_refresh(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE_REFRESH,
+        profile_refresh,
+        schema=PROFILE_REFRESH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove integration services when the last entry is unloaded."""
+    if hass.data.get(DOMAIN):
+        return
+    hass.services.async_remove(DOMAIN, SERVICE_EXPORT_HISTORY)
+    hass.services.async_remove(DOMAIN, SERVICE_PROFILE_REFRESH)
+    hass.services.async_remove(DOMAIN, SERVICE_COMPARE_TARIFFS)
+    hass.services.async_remove(DOMAIN, SERVICE_SIMULATE_BATTERY)
@@ -0,0 +1,192 @@
+"""Batch comparison of tariff scenarios over archived history.
+
+All scenarios are evaluated in one vectorized pass: daily flows of the
+selected counter points form a (days × 4) matrix that is multiplied with a
+(4 × scenarios) price matrix, using the same formula as the cost statistics
+(consumption costs minus feed-in revenue). Scenarios with time-of-use
+schedules are priced per quarter hour on days the quarter-hour archive
+covers; other days use the scenario's base prices.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+
+from .archive import ArchiveManager, ArchiveSlice
+from .const import LOAD_PROFILE_SLOTS
+from .cost_statistics import COST_FLOWS
+from .energy_data import FLOWS
+
+# Price keys in COST_FLOWS order (cgrid, crec, fgrid, frec) and their sign
+PRICE_KEYS = ("grid_consumption", "community_consumption", "grid_feed_in", "community_feed_in")
+PRICE_SIGNS = np.array([1.0, 1.0, -1.0, -1.0])
+
+_FLOW_COLUMNS = [FLOWS.index(flow) for flow in COST_FLOWS]
+
+
+def _slot(value: str) -> int:
+    """Return the quarter-hour slot of HH:MM (24:00 is the end of the day)."""
+    hours, minutes = (int(part) for part in value.split(":"))
+    return (hours * 60 + minutes) // 15
+
+
+def slot_prices(scenario: dict) -> np.ndarray:
+    """Return signed prices per weekday, flow and quarter hour (7 × 4 × 96)."""
+    base = np.array([scenario[key] for key in PRICE_KEYS], dtype=float)
+    prices = np.broadcast_to(base[None, :, None], (7, 4, LOAD_PROFILE_SLOTS)).copy()
+    for window in scenario.get("time_of_use", []):
+        start, end = _slot(window["start"]), _slot(window["end"])
+        slots = (
+            np.arange(start, end)
+            if start < end
+            else np.r_[np.arange(start, LOAD_PROFILE_SLOTS), np.arange(0, end)]
+        )
+        weekdays = window.get("weekdays", range(7))
+        for flow_index, key in enumerate(PRICE_KEYS):
+            if key in window:
+                for weekday in weekdays:
+                    prices[weekday, flow_index, slots] = window[key]
+    return prices * PRICE_SIGNS[None, :, None]
+
+
+def daily_matrix(history: ArchiveSlice) -> tuple[np.ndarray, np.ndarray]:
+    """Return day ordinals and the (days × 4) flows in COST_FLOWS order, zero-copy read."""
+    records = np.frombuffer(history.flat, dtype=float).reshape(-1, len(FLOWS) + 1)
+    flows = np.nan_to_num(records[:, [column + 1 for column in _FLOW_COLUMNS]])
+    return records[:, 0].astype(np.int64), flows
+
+
+def quarter_hour_tensor(history: ArchiveSlice) -> tuple[np.ndarray, np.ndarray]:
+    """Return day ordinals and the (days × 4 × 96) flows of a quarter-hour archive slice."""
+    records = np.frombuffer(history.flat, dtype=float).reshape(
+        -1, len(FLOWS) * LOAD_PROFILE_SLOTS + 1
+    )
+    slots = records[:, 1:].reshape(len(history), len(FLOWS), LOAD_PROFILE_SLOTS)
+    return records[:, 0].astype(np.int64), np.nan_to_num(slots[:, _FLOW_COLUMNS, :])
+
+
+def archive_coverage(archive: ArchiveManager, cp_ids: list, start: date, end: date) -> dict:
+    """Return how many days of start..end the daily archive has for all counter points.
+
+    A day counts as covered only if every selected counter point has it.
+    Missing days are also returned as [first, last] ranges. Blocking, run in
+    the executor.
+    """
+    covered: set[int] | None = None
+    for cp_id in cp_ids:
+        daily_archive = archive.daily("counter_point", cp_id)
+        ordinals = (
+            set(daily_matrix(daily_archive.slice(start, end))[0].tolist())
+            if daily_archive is not None
+            else set()
+        )
+        covered = ordinals if covered is None else covered & ordinals
+    covered = covered or set()
+
+    missing_ranges = []
+    first_missing = None
+    for ordinal in range(start.toordinal(), end.toordinal() + 2):
+        if ordinal <= end.toordinal() and ordinal not in covered:
+            first_missing = ordinal if first_missing is None else first_missing
+        elif first_missing is not None:
+            missing_ranges.append(
+                [
+                    date.fromordinal(first_missing).isoformat(),
+                    date.fromordinal(ordinal - 1).isoformat(),
+                ]
+            )
+            first_missing = None
+
+    days_requested = end.toordinal() - start.toordinal() + 1
+    return {
+        "days_requested": days_requested,
+        "days_covered": len(covered),
+        "missing_days": days_requested - len(covered),
+        "missing_ranges": missing_ranges,
+    }
+
+
+def compare_tariffs(
+    archive: ArchiveManager,
+    cp_ids: list[int],
+    scenarios: dict[str, dict],
+    start: date,
+    end: date,
+) -> dict:
+    """Return monthly and total costs per scenario (blocking, run in the executor)."""
+    names = list(scenarios)
+    base_prices = np.array(
+        [[scenarios[name][key] for name in names] for key in PRICE_KEYS], dtype=float
+    ) * PRICE_SIGNS[:, None]
+    tou = [i for i, name in enumerate(names) if scenarios[name].get("time_of_use")]
+    tou_prices = np.stack([slot_prices(scenarios[names[i]]) for i in tou]) if tou else None
+
+    month_keys: dict[int, str] = {}
+    totals: dict[int, np.ndarray] = {}
+    per_counter_point = {}
+    days_total = days_tou = 0
+
+    for cp_id in cp_ids:
+        daily_archive = archive.daily("counter_point", cp_id)
+        if daily_archive is None:
+            continue
+        ordinals, flows = daily_matrix(daily_archive.slice(start, end))
+        if not len(ordinals):
+            continue
+        costs = flows @ base_prices  # days × scenarios
+
+        if tou:
+            quarter_hours = archive.quarter_hour_archive(cp_id)
+            if quarter_hours is not None:
+                qh_ordinals, qh_flows = quarter_hour_tensor(quarter_hours.slice(start, end))
+                rows = np.searchsorted(ordinals, qh_ordinals)
+                valid = (rows < len(ordinals)) & (
+                    ordinals[np.minimum(rows, len(ordinals) - 1)] == qh_ordinals
+                )
+                rows, qh_ordinals, qh_flows = rows[valid], qh_ordinals[valid], qh_flows[valid]
+                # Ordinal 1 (0001-01-01) was a Monday, matching date.weekday()
+                weekdays = (qh_ordinals - 1) % 7
+                for weekday in range(7):
+                    mask = weekdays == weekday
+                    if mask.any():
+                        costs[np.ix_(rows[mask], tou)] = np.einsum(
+                            "dfk,sfk->ds", qh_flows[mask], tou_prices[:, weekday]
+                        )
+                days_tou += len(rows)
+        days_total += len(ordinals)
+
+        # Group days by month with one bincount per scenario
+        months = np.array(
+            [(d.year * 12 + d.month - 1) for d in map(date.fromordinal, ordinals.tolist())]
+        )
+        unique_months, month_index = np.unique(months, return_inverse=True)
+        monthly = np.stack(
+            [
+                np.bincount(month_index, weights=costs[:, s], minlength=len(unique_months))
+                for s in range(len(names))
+            ],
+            axis=1,
+        )
+        for month, row in zip(unique_months.tolist(), monthly):
+            month_keys[month] = f"{month // 12:04d}-{month % 12 + 1:02d}"
+            totals[month] = totals.get(month, 0) + row
+        per_counter_point[cp_id] = {
+            name: round(float(monthly[:, s].sum()), 2) for s, name in enumerate(names)
+        }
+
+    result = {}
+    for s, name in enumerate(names):
+        monthly_costs = {
+            month_keys[month]: round(float(totals[month][s]), 2) for month in sorted(totals)
+        }
+        result[name] = {
+            "total": round(sum(float(totals[month][s]) for month in totals), 2),
+            "monthly_costs": monthly_costs,
+        }
+    return {
+        "scenarios": result,
+        "counter_points": per_counter_point,
+        "days": days_total,
+        "time_of_use_days": days_tou,
+    }
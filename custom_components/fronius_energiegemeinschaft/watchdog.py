@@ -0,0 +1,55 @@
+"""Watchdog for stages that run synchronously on the event loop.
+
+Each stage between two awaits is wrapped in ``watchdog.blocking(name)``;
+if it holds the loop longer than the configured threshold a warning names
+the stage, so a slow refresh can be attributed without a profiler.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """Time synchronous stages and warn about those blocking the loop too long."""
+
+    def __init__(self, threshold_ms: float) -> None:
+        """Initialize the watchdog."""
+        self.threshold = threshold_ms / 1000
+        # Longest observed duration per stage in seconds, for diagnostics
+        self.max_durations: dict[str, float] = {}
+        self.warnings = 0
+
+    @contextmanager
+    def blocking(self, phase: str) -> Iterator[None]:
+        """Measure a stage that runs on the event loop without awaiting."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            if duration > self.max_durations.get(phase, 0.0):
+                self.max_durations[phase] = duration
+            if duration > self.threshold:
+                self.warnings += 1
+                _LOGGER.warning(
+                    "Stage '%s' blocked the event loop for %.0f ms (threshold %.0f ms)",
+                    phase,
+                    duration * 1000,
+                    self.threshold * 1000,
+                )
+
+    def as_dict(self) -> dict:
+        """Return threshold, warning count and longest stage durations in ms."""
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "warnings": self.warnings,
+            "max_stage_ms": {
+                phase: round(duration * 1000, 1)
+                for phase, duration in sorted(self.max_durations.items())
+            },
+        }
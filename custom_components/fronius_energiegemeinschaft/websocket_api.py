@@ -0,0 +1,167 @@
+"""Websocket subscriptions pushing delta-encoded series to dashboards.
+
+A subscriber gets one full snapshot of a community or counter point series,
+then only the days that were appended, revised or dropped on each
+coordinator update. Rows are columnar: one list of values per day in the
+order of the announced columns, so flow names are not repeated per day.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_COORDINATORS, DATA_PRICING, DOMAIN
+from .cost_statistics import COST_FLOWS, net_cost
+from .energy_data import FLOWS, EnergySeries
+
+TYPE_SUBSCRIBE_SERIES = f"{DOMAIN}/subscribe_series"
+
+SECTIONS = {"community": "communities", "counter_point": "counter_points"}
+
+
+class SeriesDiffer:
+    """Encode an entity's series as snapshot once, then as deltas.
+
+    Only days of month segments that were not part of the previously sent
+    series are compared, so an update costs the size of the change.
+    """
+
+    def __init__(self, flows: tuple[str, ...], pricing: dict | None) -> None:
+        """Initialize the differ."""
+        self.columns = [*flows, "cost"] if pricing is not None else list(flows)
+        self._flows = flows
+        self._pricing = pricing
+        self._series: EnergySeries | None = None
+        self._segments: set[int] = set()
+        self._rows: dict[str, list[float | None]] = {}
+
+    def _row(self, segment, index: int) -> list[float | None]:
+        row = []
+        for flow in self._flows:
+            value = segment.raw_value(flow, index)
+            row.append(None if math.isnan(value) else round(value, 3))
+        if self._pricing is not None:
+            totals = [segment.raw_value(flow, index) for flow in COST_FLOWS]
+            totals = [0.0 if math.isnan(value) else value for value in totals]
+            row.append(round(net_cost(totals, self._pricing), 4))
+        return row
+
+    def snapshot(self, series: EnergySeries | None) -> dict[str, Any]:
+        """Return the full series and remember it as sent."""
+        self._series = series
+        self._rows = {}
+        self._segments = set()
+        if series is not None:
+            self._collect(series, self._rows)
+            self._segments = {id(segment) for segment in series.segments}
+        return {
+            "type": "snapshot",
+            "columns": self.columns,
+            "unit": series.unit if series is not None else None,
+            "days": dict(self._rows),
+        }
+
+    def delta(self, series: EnergySeries | None) -> dict[str, Any] | None:
+        """Return the changes since the last sent series, None if nothing changed."""
+        if series is self._series:
+            return None
+        self._series = series
+        if series is None:
+            removed = sorted(self._rows)
+            self._rows, self._segments = {}, set()
+            return {"type": "delta", "upsert": {}, "remove": removed} if removed else None
+
+        fresh: dict[str, list[float | None]] = {}
+        self._collect(series, fresh, skip=self._segments)
+        self._segments = {id(segment) for segment in series.segments}
+
+        upsert = {day: row for day, row in fresh.items() if self._rows.get(day) != row}
+        live = set(series.dates)
+        remove = sorted(day for day in self._rows if day not in live)
+        for day in remove:
+            del self._rows[day]
+        self._rows.update(upsert)
+        if not upsert and not remove:
+            return None
+        return {"type": "delta", "upsert": upsert, "remove": remove}
+
+    def _collect(
+        self,
+        series: EnergySeries,
+        rows: dict[str, list[float | None]],
+        skip: set[int] | frozenset[int] = frozenset(),
+    ) -> None:
+        """Fill rows with the days of segments not in skip (newer segments win)."""
+        for segment in series.segments:
+            if id(segment) in skip:
+                # An unchanged newer segment still wins over changed older ones
+                for day in segment.dates:
+                    rows.pop(day, None)
+                continue
+            for index, day in enumerate(segment.dates):
+                rows[day] = self._row(segment, index)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): TYPE_SUBSCRIBE_SERIES,
+        vol.Optional("entry_id"): str,
+        vol.Required("kind"): vol.In(list(SECTIONS)),
+        vol.Required("item_id"): vol.Coerce(int),
+        vol.Optional("flows"): vol.All([vol.In(FLOWS)], vol.Length(min=1)),
+    }
+)
+@callback
+def websocket_subscribe_series(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Subscribe to a community or counter point series."""
+    entries = hass.data.get(DOMAIN, {})
+    entry_id = msg.get("entry_id")
+    if entry_id is None and len(entries) == 1:
+        entry_id = next(iter(entries))
+    if entry_id not in entries:
+        connection.send_error(
+            msg["id"], "entry_not_found", "Config entry not loaded or ambiguous"
+        )
+        return
+
+    entry_data = entries[entry_id]
+    section = SECTIONS[msg["kind"]]
+    coordinator = entry_data[DATA_COORDINATORS][section]
+    item_id = msg["item_id"]
+
+    def current_series() -> EnergySeries | None:
+        item = (coordinator.data or {}).get(section, {}).get(item_id)
+        return item["energy"] if item is not None else None
+
+    if current_series() is None:
+        connection.send_error(msg["id"], "not_found", f"Unknown {msg['kind']} {item_id}")
+        return
+
+    differ = SeriesDiffer(
+        tuple(msg.get("flows", FLOWS)),
+        entry_data[DATA_PRICING] if msg["kind"] == "counter_point" else None,
+    )
+
+    @callback
+    def forward_update() -> None:
+        if (delta := differ.delta(current_series())) is not None:
+            connection.send_message(websocket_api.event_message(msg["id"], delta))
+
+    connection.subscriptions[msg["id"]] = coordinator.async_add_listener(forward_update)
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(msg["id"], differ.snapshot(current_series()))
+    )
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_subscribe_series)
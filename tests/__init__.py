@@ -0,0 +1 @@
+"""Tests for the Fronius Energiegemeinschaft integration."""
@@ -0,0 +1,13 @@
+"""Shared fixtures for the Fronius Energiegemeinschaft tests."""
+from __future__ import annotations
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+
+@pytest.fixture
+async def hass(tmp_path):
+    """Return a bare Home Assistant instance with its config dir in tmp_path."""
+    instance = HomeAssistant(str(tmp_path))
+    yield instance
+    await instance.async_stop(force=True)
@@ -0,0 +1,124 @@
+"""Tests for the streaming anomaly detection."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from custom_components.fronius_energiegemeinschaft.anomaly import (
+    ANOMALY_FLATLINE,
+    ANOMALY_OUTLIER,
+    AnomalyManager,
+    AnomalyTracker,
+)
+from custom_components.fronius_energiegemeinschaft.const import (
+    ANOMALY_FLATLINE_DAYS,
+    ANOMALY_MIN_SAMPLES,
+)
+from custom_components.fronius_energiegemeinschaft.energy_data import (
+    EnergySeries,
+    MonthSegment,
+)
+
+START = date(2025, 1, 6)  # a Monday
+WARM_UP = 7 * ANOMALY_MIN_SAMPLES
+
+
+def _normal(offset: int) -> float:
+    """Return a slightly varying grid consumption, never equal on consecutive days."""
+    return 10.0 + (offset % 5) * 0.5
+
+
+def _series(cgrid: list[float | None]) -> EnergySeries:
+    """Build a series of cgrid values from START on; None leaves a day without values."""
+    months: dict[str, list[dict]] = {}
+    for offset, value in enumerate(cgrid):
+        day = START + timedelta(days=offset)
+        entry = {"date": f"{day.isoformat()}T00:00:00+01:00"}
+        if value is not None:
+            entry["cgrid"] = value
+        months.setdefault(day.isoformat()[:7], []).append(entry)
+    return EnergySeries(
+        tuple(
+            MonthSegment.from_energy_data(month, {"data": entries}, "total")
+            for month, entries in sorted(months.items())
+        )
+    )
+
+
+def test_outlier_after_warm_up():
+    """Deviating days are reported only once every weekday has enough samples."""
+    tracker = AnomalyTracker()
+    values = [_normal(i) for i in range(WARM_UP - 1)]
+    assert tracker.update(_series(values)) == []
+    assert tracker.warming_up
+
+    # The last weekday still has too few samples to score this day
+    values.append(40.0)
+    assert tracker.update(_series(values)) == []
+    assert not tracker.warming_up
+
+    tracker = AnomalyTracker()
+    values[-1] = _normal(WARM_UP - 1)
+    assert tracker.update(_series(values)) == []
+
+    values.append(40.0)
+    found = tracker.update(_series(values))
+    assert [(a["type"], a["flow"], a["value"]) for a in found] == [
+        (ANOMALY_OUTLIER, "cgrid", 40.0)
+    ]
+    assert found[0]["date"] == (START + timedelta(days=WARM_UP)).isoformat()
+    assert tracker.outliers == found
+
+    # The next regular day clears the outliers of the last scored day
+    values.append(_normal(WARM_UP + 1))
+    assert tracker.update(_series(values)) == []
+    assert tracker.outliers == []
+
+
+def test_flatline_reported_once_until_values_change():
+    """Identical values over ANOMALY_FLATLINE_DAYS start one flatline that ends on change."""
+    tracker = AnomalyTracker()
+    values = [_normal(i) for i in range(10)]
+    tracker.update(_series(values))
+
+    values += [7.0] * (ANOMALY_FLATLINE_DAYS - 1)
+    assert tracker.update(_series(values)) == []
+    values.append(7.0)
+    found = tracker.update(_series(values))
+    assert [(a["type"], a["flow"]) for a in found] == [(ANOMALY_FLATLINE, "cgrid")]
+    assert found[0]["since"] == (START + timedelta(days=10)).isoformat()
+
+    values.append(7.0)
+    assert tracker.update(_series(values)) == []
+    last = START + timedelta(days=len(values) - 1)
+    assert tracker.flatlines["cgrid"]["date"] == last.isoformat()
+
+    values.append(8.0)
+    tracker.update(_series(values))
+    assert tracker.flatlines == {}
+
+
+def test_scoring_waits_for_missing_days():
+    """Scoring stops at a day without values and resumes there once it arrives."""
+    tracker = AnomalyTracker()
+    values = [_normal(i) for i in range(WARM_UP)]
+    tracker.update(_series(values + [None, _normal(WARM_UP + 1)]))
+    assert tracker.last_day == START + timedelta(days=WARM_UP - 1)
+
+    found = tracker.update(_series(values + [40.0, _normal(WARM_UP + 1)]))
+    assert [a["date"] for a in found] == [(START + timedelta(days=WARM_UP)).isoformat()]
+    assert tracker.last_day == START + timedelta(days=WARM_UP + 1)
+
+    # Already scored days are not scored again, even if revised
+    assert tracker.update(_series(values + [50.0, _normal(WARM_UP + 1)])) == []
+
+
+def test_manager_reports_only_the_newest_day_on_first_update():
+    """Replayed history is not reported; vanished counter points are dropped."""
+    values = [_normal(i) for i in range(WARM_UP)] + [40.0, _normal(WARM_UP + 1), 40.0]
+    manager = AnomalyManager()
+    found = manager.update({7: {"energy": _series(values), "info": {"counter_number": "AT01"}}})
+    assert [(a["counter_point_id"], a["counter_number"], a["date"]) for a in found] == [
+        (7, "AT01", (START + timedelta(days=len(values) - 1)).isoformat())
+    ]
+    assert manager.update({}) == []
+    assert manager.trackers == {}
@@ -0,0 +1,272 @@
+"""Tests for the portal client's outage handling and request scheduling."""
+from __future__ import annotations
+
+import asyncio
+
+import aiohttp
+import pytest
+
+from custom_components.fronius_energiegemeinschaft import api_client
+from custom_components.fronius_energiegemeinschaft.api_client import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    PRIORITY_BACKFILL,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_POLLING,
+    PRIORITY_SWEEP,
+    VIEW_MONTH,
+    VIEW_YEAR,
+    CircuitBreaker,
+    FroniusEnergyClient,
+    PortalUnavailableError,
+    RequestScheduler,
+    ViewRequest,
+    plan_history_requests,
+    request_priority,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(api_client.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_threshold_and_probes(clock):
+    """Consecutive failures open the circuit; one probe is let through after the timeout."""
+    breaker = CircuitBreaker("portal", threshold=3, reset_timeout=60, max_reset_timeout=200)
+    for _ in range(2):
+        assert breaker.acquire() is False
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(3):
+        breaker.acquire()
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.trips == 1
+    with pytest.raises(PortalUnavailableError):
+        breaker.acquire()
+
+    clock[0] += 60
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.acquire() is True
+    # Only one probe at a time
+    with pytest.raises(PortalUnavailableError):
+        breaker.acquire()
+    breaker.record_failure()
+
+    # A failed probe doubles the timeout, capped at max_reset_timeout
+    clock[0] += 119
+    assert breaker.state == CIRCUIT_OPEN
+    clock[0] += 1
+    assert breaker.acquire() is True
+    breaker.record_failure()
+    clock[0] += 199
+    assert breaker.state == CIRCUIT_OPEN
+    clock[0] += 1
+    assert breaker.acquire() is True
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.failures == 0
+
+
+def test_breaker_cancelled_probe_is_released(clock):
+    """A probe without result lets the next request probe."""
+    breaker = CircuitBreaker("portal", threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.acquire() is True
+    breaker.release()
+    assert breaker.acquire() is True
+
+
+@pytest.mark.parametrize(
+    ("error", "counted"),
+    [
+        (aiohttp.ServerDisconnectedError(), True),
+        (aiohttp.ClientConnectionError("refused"), True),
+        (asyncio.TimeoutError(), True),
+        (aiohttp.ContentTypeError(None, ()), False),
+        (ValueError("Expecting value"), False),
+    ],
+)
+async def test_guarded_counts_only_outages(error, counted):
+    """Connection errors and timeouts open the circuit; a broken 200 body does not."""
+    client = FroniusEnergyClient("user", "secret")
+    expected = PortalUnavailableError if counted else type(error)
+    with pytest.raises(expected):
+        async with client._guarded():
+            raise error
+    assert client.breaker.failures == int(counted)
+
+
+def test_record_status_counts_gateway_errors():
+    """502-504 are outages; other answers show the portal is reachable."""
+    client = FroniusEnergyClient("user", "secret")
+    with pytest.raises(PortalUnavailableError):
+        client._record_status(503)
+    assert client.breaker.failures == 1
+    client._record_status(500)
+    assert client.breaker.failures == 0
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class Recorder:
+    """Runs tasks through a scheduler and records the order they got a slot."""
+
+    def __init__(self, scheduler: RequestScheduler) -> None:
+        self.scheduler = scheduler
+        self.started: list[str] = []
+        self.release = asyncio.Event()
+
+    def spawn(self, name: str, priority: int, owner: str = "a") -> asyncio.Task:
+        async def run() -> None:
+            async with self.scheduler.slot(owner):
+                self.started.append(name)
+                await self.release.wait()
+
+        with request_priority(priority):
+            return asyncio.ensure_future(run())
+
+
+async def test_scheduler_starts_waiting_requests_by_priority():
+    """Queued requests start by class, not by arrival."""
+    recorder = Recorder(RequestScheduler(concurrency=1, foreground_reserve=0))
+    tasks = [recorder.spawn("blocker", PRIORITY_POLLING)]
+    await _settle()
+    for name, priority in (
+        ("backfill", PRIORITY_BACKFILL),
+        ("sweep", PRIORITY_SWEEP),
+        ("polling", PRIORITY_POLLING),
+        ("interactive", PRIORITY_INTERACTIVE),
+    ):
+        tasks.append(recorder.spawn(name, priority))
+    await _settle()
+    assert recorder.scheduler.as_dict()["priorities"]["backfill"]["waiting"] == 1
+
+    recorder.release.set()
+    await asyncio.gather(*tasks)
+    assert recorder.started == ["blocker", "interactive", "polling", "sweep", "backfill"]
+    stats = recorder.scheduler.as_dict()
+    assert stats["active"] == 0
+    assert stats["priorities"]["backfill"]["queued"] == 1
+
+
+async def test_scheduler_round_robin_across_owners():
+    """One owner's queue does not starve another owner of the same class."""
+    recorder = Recorder(RequestScheduler(concurrency=1, foreground_reserve=0))
+    tasks = [recorder.spawn("blocker", PRIORITY_POLLING)]
+    await _settle()
+    tasks += [recorder.spawn(f"a{i}", PRIORITY_BACKFILL, "a") for i in range(3)]
+    tasks += [recorder.spawn(f"b{i}", PRIORITY_BACKFILL, "b") for i in range(2)]
+    await _settle()
+
+    recorder.release.set()
+    await asyncio.gather(*tasks)
+    assert recorder.started == ["blocker", "a0", "b0", "a1", "b1", "a2"]
+
+
+async def test_scheduler_keeps_foreground_reserve():
+    """Background requests never hold the reserved slot."""
+    recorder = Recorder(RequestScheduler(concurrency=2, foreground_reserve=1))
+    tasks = [recorder.spawn(f"backfill{i}", PRIORITY_BACKFILL) for i in range(2)]
+    await _settle()
+    assert recorder.started == ["backfill0"]
+
+    tasks.append(recorder.spawn("polling", PRIORITY_POLLING))
+    await _settle()
+    assert recorder.started == ["backfill0", "polling"]
+
+    recorder.release.set()
+    await asyncio.gather(*tasks)
+    assert recorder.scheduler.as_dict()["active"] == 0
+
+
+async def test_scheduler_cancelled_waiter_leaves_queue():
+    """A cancelled waiting request gives up its place without leaking a slot."""
+    recorder = Recorder(RequestScheduler(concurrency=1, foreground_reserve=0))
+    blocker = recorder.spawn("blocker", PRIORITY_POLLING)
+    await _settle()
+    waiting = recorder.spawn("waiting", PRIORITY_POLLING)
+    await _settle()
+    waiting.cancel()
+    await _settle()
+    assert recorder.scheduler.as_dict()["priorities"]["polling"]["waiting"] == 0
+
+    recorder.release.set()
+    await blocker
+    after = recorder.spawn("after", PRIORITY_POLLING)
+    await after
+    assert recorder.started == ["blocker", "after"]
+
+
+class FakePortalClient(FroniusEnergyClient):
+    """Client whose requests are answered in memory."""
+
+    def __init__(self, scheduler: RequestScheduler) -> None:
+        super().__init__("user", "secret", scheduler=scheduler, owner="entry")
+        self.downloads: list[str] = []
+
+    async def _make_request(self, method, endpoint, **kwargs):
+        self.downloads.append(endpoint)
+        return {"endpoint": endpoint}
+
+
+async def test_single_flight_raises_priority_of_queued_request():
+    """An urgent caller joining a queued backfill download does not wait behind polling."""
+    scheduler = RequestScheduler(concurrency=1, foreground_reserve=0)
+    client = FakePortalClient(scheduler)
+    recorder = Recorder(scheduler)
+    blocker = recorder.spawn("blocker", PRIORITY_POLLING)
+    await _settle()
+
+    with request_priority(PRIORITY_BACKFILL):
+        backfill = asyncio.ensure_future(client._get("shared"))
+    with request_priority(PRIORITY_POLLING):
+        polling = asyncio.ensure_future(client._get("polling"))
+    await _settle()
+    with request_priority(PRIORITY_INTERACTIVE):
+        urgent = asyncio.ensure_future(client._get("shared"))
+    await _settle()
+
+    recorder.release.set()
+    results = await asyncio.gather(blocker, backfill, polling, urgent)
+    assert client.downloads == ["shared", "polling"]
+    assert results[1] is results[3]
+    assert scheduler.as_dict()["priorities"]["interactive"]["queued"] == 1
+
+
+def test_plan_uses_year_views_for_several_months_of_a_year():
+    """A year view replaces two or more month views; a lone month keeps its view."""
+    plan = plan_history_requests(
+        ["2025-03", "2024-11", "2024-12", "2025-01", "2025-02", "2024-12"],
+        "month",
+        {VIEW_MONTH, VIEW_YEAR},
+    )
+    assert plan == [
+        ViewRequest(VIEW_YEAR, "2024", ("2024-11", "2024-12")),
+        ViewRequest(VIEW_YEAR, "2025", ("2025-01", "2025-02", "2025-03")),
+    ]
+    assert plan_history_requests(["2023-05", "2024-01", "2024-02"], "month", {VIEW_YEAR}) == [
+        ViewRequest(VIEW_MONTH, "2023-05", ("2023-05",)),
+        ViewRequest(VIEW_YEAR, "2024", ("2024-01", "2024-02")),
+    ]
+
+
+def test_plan_falls_back_to_month_views():
+    """Daily resolution or an unsupported year view needs one month view per month."""
+    expected = [
+        ViewRequest(VIEW_MONTH, "2024-01", ("2024-01",)),
+        ViewRequest(VIEW_MONTH, "2024-02", ("2024-02",)),
+    ]
+    assert plan_history_requests(["2024-02", "2024-01"], "day", {VIEW_YEAR}) == expected
+    assert plan_history_requests(["2024-02", "2024-01"], "month", {VIEW_MONTH}) == expected
+    assert plan_history_requests([], "month", {VIEW_YEAR}) == []
+    with pytest.raises(ValueError):
+        plan_history_requests(["2024-01"], "quarter_hour", {VIEW_YEAR})
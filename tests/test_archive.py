@@ -0,0 +1,88 @@
+"""Tests for the binary archive."""
+from __future__ import annotations
+
+import math
+from datetime import date, timedelta
+
+from custom_components.fronius_energiegemeinschaft import archive as archive_module
+from custom_components.fronius_energiegemeinschaft.archive import HEADER_SIZE, SeriesArchive
+
+COLUMNS = ("crec", "cgrid")
+START = date(2025, 1, 1)
+
+
+def _day(offset: int) -> date:
+    return START + timedelta(days=offset)
+
+
+def _values(archive_slice) -> list[tuple[str, float, float]]:
+    return [
+        (day, archive_slice.value("crec", i), archive_slice.value("cgrid", i))
+        for i, day in enumerate(archive_slice.dates)
+    ]
+
+
+def test_append_extends_sorted_records(tmp_path):
+    """New days in order stay in the sorted part; unchanged days are not rewritten."""
+    archive = SeriesArchive(tmp_path / "a.bin", COLUMNS)
+    assert archive.upsert((_day(i), [i, 10.0]) for i in range(5)) == 5
+    assert archive.upsert((_day(i), [i, 10.0]) for i in range(5)) == 0
+    assert archive.upsert([(_day(5), [5, float("nan")])]) == 1
+    assert archive.count == archive.sorted_count == 6
+
+    history = archive.slice(_day(1), _day(5))
+    assert history.dates[0] == "2025-01-02"
+    assert len(history) == 5
+    assert math.isnan(history.column("cgrid")[-1])
+    assert history.value("cgrid", 4) == 0.0
+    assert archive.months() == {"2025-01"}
+
+
+def test_slice_merges_tail_without_compacting(tmp_path):
+    """Revisions and late days are read from the tail, the file stays as is."""
+    archive = SeriesArchive(tmp_path / "a.bin", COLUMNS)
+    archive.upsert((_day(i), [i, 10.0]) for i in (0, 1, 2, 4))
+    archive.upsert([(_day(1), [1, 11.0]), (_day(3), [3, 10.0])])
+    archive.upsert([(_day(1), [1, 12.0])])
+    assert (archive.count, archive.sorted_count) == (7, 4)
+
+    assert _values(archive.slice(_day(0), _day(4))) == [
+        ("2025-01-01", 0, 10.0),
+        ("2025-01-02", 1, 12.0),
+        ("2025-01-03", 2, 10.0),
+        ("2025-01-04", 3, 10.0),
+        ("2025-01-05", 4, 10.0),
+    ]
+    assert _values(archive.slice(_day(4), _day(9))) == [("2025-01-05", 4, 10.0)]
+    assert (archive.count, archive.sorted_count) == (7, 4)
+
+    # The newest revision survives reopening
+    reopened = SeriesArchive(tmp_path / "a.bin", COLUMNS)
+    assert _values(reopened.slice(_day(1), _day(1))) == [("2025-01-02", 1, 12.0)]
+
+
+def test_upsert_compacts_long_tail(tmp_path, monkeypatch):
+    """The tail is merged into a new file once it exceeds ARCHIVE_COMPACT_TAIL."""
+    monkeypatch.setattr(archive_module, "ARCHIVE_COMPACT_TAIL", 2)
+    archive = SeriesArchive(tmp_path / "a.bin", COLUMNS)
+    archive.upsert((_day(i), [i, 10.0]) for i in range(4))
+    archive.upsert([(_day(0), [0, 20.0]), (_day(1), [1, 20.0])])
+    assert (archive.count, archive.sorted_count) == (6, 4)
+
+    archive.upsert([(_day(2), [2, 20.0])])
+    assert archive.count == archive.sorted_count == 4
+    assert archive.size() == (tmp_path / "a.bin").stat().st_size
+    assert [row[2] for row in _values(archive.slice(_day(0), _day(3)))] == [20, 20, 20, 10]
+
+
+def test_torn_write_is_dropped_on_open(tmp_path):
+    """Records beyond the committed count are truncated."""
+    path = tmp_path / "a.bin"
+    SeriesArchive(path, COLUMNS).upsert((_day(i), [i, 1.0]) for i in range(3))
+    size = path.stat().st_size
+    with open(path, "ab") as file:
+        file.write(b"\0" * 20)
+
+    archive = SeriesArchive(path, COLUMNS)
+    assert archive.count == 3
+    assert path.stat().st_size == size == HEADER_SIZE + 3 * 3 * 8
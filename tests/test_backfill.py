@@ -0,0 +1,154 @@
+"""Tests for the statistics backfill."""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from custom_components.fronius_energiegemeinschaft import backfill as backfill_module
+from custom_components.fronius_energiegemeinschaft.api_client import (
+    VIEW_MONTH,
+    VIEW_YEAR,
+    plan_history_requests,
+)
+from custom_components.fronius_energiegemeinschaft.archive import ArchiveManager
+from custom_components.fronius_energiegemeinschaft.backfill import (
+    STATE_DONE,
+    BackfillJob,
+    MonthTotalsStore,
+)
+
+CP_ID = 5
+
+
+def _month_days(month: str) -> list[str]:
+    year, number = (int(part) for part in month.split("-"))
+    days = []
+    day = date(year, number, 1)
+    while day.month == number:
+        days.append(day.isoformat())
+        day = date.fromordinal(day.toordinal() + 1)
+    return days
+
+
+class FakeClient:
+    """Portal answering month and year views of one counter point."""
+
+    def __init__(self) -> None:
+        self.views = {VIEW_MONTH, VIEW_YEAR}
+        self.requests: list[tuple[str, str]] = []
+
+    def plan_history(self, months, resolution="month"):
+        return plan_history_requests(months, resolution, self.views)
+
+    def mark_view_unsupported(self, view):
+        self.views.discard(view)
+
+    async def get_counter_point_energy_data(self, cp_id, view="month", time=None):
+        self.requests.append((view, time))
+        if view == VIEW_YEAR:
+            return {
+                "data": [
+                    {"date": f"{time}-{month:02d}-01", "cgrid": 30.0, "crec": 10.0}
+                    for month in range(1, 13)
+                ]
+            }
+        return {
+            "data": [{"date": day, "cgrid": 1.0, "crec": 0.5} for day in _month_days(time)],
+            "total": {"total": {"cgrid": 30.0, "crec": 15.0}},
+        }
+
+
+@pytest.fixture(autouse=True)
+def _no_recorder(monkeypatch):
+    monkeypatch.setattr(backfill_module, "async_write_cost_statistics", lambda *a, **k: None)
+
+
+async def _run_backfill(
+    hass, tmp_path, client, month_totals=None, years=2, archive_history=False
+):
+    archive = ArchiveManager(tmp_path / "archive")
+    if month_totals is None:
+        month_totals = MonthTotalsStore(hass, "entry")
+    job = BackfillJob(
+        hass,
+        "entry",
+        client,
+        month_totals,
+        {"grid_consumption": 0.3, "community_consumption": 0.2,
+         "grid_feed_in": 0.1, "community_feed_in": 0.15},
+        years=years,
+        concurrency=4,
+        rate=0,
+        archive=archive,
+        archive_history=archive_history,
+    )
+    job.async_start({CP_ID: "AT5"})
+    await job._task
+    return job, archive
+
+
+async def test_integration_job_fetches_one_year_view_per_year(hass, tmp_path):
+    """With the archive the integration always creates, totals still come from year views."""
+    client = FakeClient()
+    job, archive = await _run_backfill(hass, tmp_path, client)
+
+    months = job._months()
+    assert len(months) == 23
+    assert job.state == STATE_DONE
+    plan = plan_history_requests(months, "month", {VIEW_MONTH, VIEW_YEAR})
+    assert sorted(client.requests) == sorted((request.view, request.time) for request in plan)
+    assert len(client.requests) <= len({month[:4] for month in months})
+    assert all(job._month_totals.has(CP_ID, month) for month in months)
+
+    # Months checkpointed from year views are not fetched again
+    client.requests.clear()
+    await _run_backfill(hass, tmp_path, client, job._month_totals)
+    assert client.requests == []
+
+
+async def test_month_views_archive_their_days(hass, tmp_path):
+    """Without year views every month is fetched as a month view and archived."""
+    client = FakeClient()
+    client.views = {VIEW_MONTH}
+    job, archive = await _run_backfill(hass, tmp_path, client)
+
+    months = job._months()
+    assert sorted(time for _, time in client.requests) == months
+    daily = archive.daily("counter_point", CP_ID)
+    assert daily.months() == set(months)
+    first, last = _month_days(months[0])[0], _month_days(months[-1])[-1]
+    archived = daily.slice(date.fromisoformat(first), date.fromisoformat(last))
+    assert archived.dates[0] == first
+    assert archived.dates[-1] == last
+    assert len(archived) == (
+        date.fromisoformat(last).toordinal() - date.fromisoformat(first).toordinal() + 1
+    )
+
+
+async def test_archive_history_fetches_missing_days_after_totals(hass, tmp_path):
+    """With archive_history, months with totals but no archived days get month views."""
+    client = FakeClient()
+    month_totals = MonthTotalsStore(hass, "entry")
+    probe = BackfillJob(hass, "entry", client, month_totals, {}, 2, 1, 0)
+    months = probe._months()
+    for month in months:
+        month_totals.set(CP_ID, month, [30.0, 10.0, 0.0, 0.0])
+    # A month without portal data has nothing to archive
+    month_totals.months(CP_ID)[months[0]] = None
+
+    # Off by default: the totals are complete, nothing is fetched
+    await _run_backfill(hass, tmp_path, client, month_totals)
+    assert client.requests == []
+
+    job, archive = await _run_backfill(hass, tmp_path, client, month_totals, archive_history=True)
+    assert job.state == STATE_DONE
+    assert client.requests == [(VIEW_MONTH, month) for month in months[1:]]
+    assert archive.daily("counter_point", CP_ID).months() == set(months[1:])
+    # The month view totals replace those of the year view
+    assert month_totals.months(CP_ID)[months[1]] == [30.0, 15.0, 0.0, 0.0]
+
+    # Nothing left to fetch on the next run
+    client.requests.clear()
+    await _run_backfill(hass, tmp_path, client, month_totals, archive_history=True)
+    assert client.requests == []
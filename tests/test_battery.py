@@ -0,0 +1,147 @@
+"""Tests for the home battery simulation."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+import voluptuous as vol
+
+from custom_components.fronius_energiegemeinschaft import battery as battery_module
+from custom_components.fronius_energiegemeinschaft.archive import ArchiveManager
+from custom_components.fronius_energiegemeinschaft.battery import simulate_battery
+from custom_components.fronius_energiegemeinschaft.const import LOAD_PROFILE_SLOTS
+from custom_components.fronius_energiegemeinschaft.energy_data import FLOWS
+from custom_components.fronius_energiegemeinschaft.services import SIMULATE_BATTERY_SCHEMA
+
+PRICING = {
+    "grid_consumption": 0.3,
+    "community_consumption": 0.2,
+    "grid_feed_in": 0.1,
+    "community_feed_in": 0.1,
+}
+CONSUMER, PRODUCER = 1, 2
+DAY = date(2025, 6, 2)
+
+
+def _store_day(archive: ArchiveManager, cp_id: int, day: date, **values) -> None:
+    archive.daily("counter_point", cp_id).upsert(
+        [(day, [values.get(flow, 0.0) for flow in FLOWS])]
+    )
+
+
+def _store_slots(archive: ArchiveManager, cp_id: int, day: date, **slot_values) -> None:
+    slots = {flow: [0.0] * LOAD_PROFILE_SLOTS for flow in FLOWS}
+    for flow, values in slot_values.items():
+        for slot, value in values.items():
+            slots[flow][slot] = value
+    archive.store_quarter_hours(cp_id, day.isoformat(), slots)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ArchiveManager(tmp_path, quarter_hour=True)
+
+
+def test_one_battery_shifts_feed_in_to_consumption_across_counter_points(archive):
+    """Feed-in of the producer meter covers consumption of the consumer meter."""
+    for offset in range(2):
+        _store_day(archive, CONSUMER, DAY + timedelta(days=offset), cgrid=6.0)
+        _store_day(archive, PRODUCER, DAY + timedelta(days=offset), fgrid=10.0)
+
+    result = simulate_battery(
+        archive,
+        [CONSUMER, PRODUCER],
+        [(5.0, 5.0), (20.0, 20.0)],
+        PRICING,
+        DAY,
+        DAY + timedelta(days=1),
+        efficiency=1.0,
+    )
+
+    assert result["baseline"] == {"grid_consumption_kwh": 12.0, "grid_feed_in_kwh": 20.0}
+    small, large = result["configurations"]
+    assert small["charged_kwh"] == 10.0
+    assert small["discharged_kwh"] == 10.0
+    assert small["full_cycles"] == 2.0
+    assert small["savings"] == pytest.approx(10 * 0.3 - 10 * 0.1)
+    # A larger battery cannot shift more than the household consumes
+    assert large["discharged_kwh"] == 12.0
+    assert large["grid_consumption_kwh"] == 0.0
+    assert result["days"] == 2
+    assert result["counter_points"] == [CONSUMER, PRODUCER]
+
+
+def test_quarter_hours_only_when_every_counter_point_has_them(archive):
+    """Consumption before the surplus cannot be covered on quarter-hour days."""
+    _store_day(archive, CONSUMER, DAY, cgrid=3.0)
+    _store_day(archive, PRODUCER, DAY, fgrid=4.0)
+    _store_slots(archive, CONSUMER, DAY, cgrid={10: 3.0})
+    configurations = [(10.0, 40.0)]
+
+    # The producer has no quarter hours: the day is simulated from daily totals
+    mixed = simulate_battery(
+        archive, [CONSUMER, PRODUCER], configurations, PRICING, DAY, DAY, efficiency=1.0
+    )
+    assert mixed["quarter_hour_days"] == 0
+    assert mixed["configurations"][0]["discharged_kwh"] == 3.0
+
+    _store_slots(archive, PRODUCER, DAY, fgrid={50: 4.0})
+    sliced = simulate_battery(
+        archive, [CONSUMER, PRODUCER], configurations, PRICING, DAY, DAY, efficiency=1.0
+    )
+    assert sliced["quarter_hour_days"] == 1
+    assert sliced["configurations"][0]["charged_kwh"] == 4.0
+    assert sliced["configurations"][0]["discharged_kwh"] == 0.0
+
+    daily_only = simulate_battery(
+        archive,
+        [CONSUMER, PRODUCER],
+        configurations,
+        PRICING,
+        DAY,
+        DAY,
+        efficiency=1.0,
+        quarter_hours=False,
+    )
+    assert daily_only["configurations"][0]["discharged_kwh"] == 3.0
+
+
+def test_efficiency_losses_and_empty_history(archive):
+    """Round-trip losses are split between charging and discharging."""
+    _store_day(archive, CONSUMER, DAY, cgrid=10.0, fgrid=10.0)
+
+    result = simulate_battery(archive, [CONSUMER], [(5.0, 5.0)], PRICING, DAY, DAY, 0.81)
+    configuration = result["configurations"][0]
+    assert configuration["charged_kwh"] == pytest.approx(5 / 0.9, abs=0.01)
+    assert configuration["discharged_kwh"] == pytest.approx(4.5)
+
+    empty = simulate_battery(archive, [PRODUCER], [(5.0, 5.0)], PRICING, DAY, DAY)
+    assert empty["days"] == 0
+    assert empty["configurations"][0]["discharged_kwh"] == 0.0
+
+
+def test_chunks_carry_the_state_of_charge(archive, monkeypatch):
+    """Splitting the timeline into chunks does not change the result."""
+    for offset in range(6):
+        day = DAY + timedelta(days=offset)
+        _store_day(archive, CONSUMER, day, cgrid=2.0 + offset)
+        _store_day(archive, PRODUCER, day, fgrid=5.0 if offset % 2 else 0.0)
+    args = (
+        archive, [CONSUMER, PRODUCER], [(4.0, 2.0), (10.0, 10.0)], PRICING, DAY,
+        DAY + timedelta(days=5),
+    )
+
+    whole = simulate_battery(*args)
+    monkeypatch.setattr(battery_module, "BATTERY_CHUNK_STEPS", 2)
+    assert simulate_battery(*args) == whole
+    assert whole["configurations"][1]["discharged_kwh"] == pytest.approx(3 * 5.0 * 0.9)
+
+
+def test_schema_bounds_the_simulation_size():
+    """Too many configurations or months are rejected before any work is done."""
+    SIMULATE_BATTERY_SCHEMA({"capacities": list(range(1, 21)), "powers": list(range(1, 11))})
+    with pytest.raises(vol.Invalid, match="configurations"):
+        SIMULATE_BATTERY_SCHEMA({"capacities": list(range(1, 21)), "powers": list(range(1, 12))})
+    SIMULATE_BATTERY_SCHEMA({"capacities": [5], "start": "2022-01", "end": "2024-12"})
+    with pytest.raises(vol.Invalid, match="months"):
+        SIMULATE_BATTERY_SCHEMA({"capacities": [5], "start": "2021-12", "end": "2024-12"})
@@ -0,0 +1,133 @@
+"""Tests for the history pull of the command-line tool."""
+from __future__ import annotations
+
+import asyncio
+import csv
+
+import pytest
+
+from custom_components.fronius_energiegemeinschaft import cli
+from custom_components.fronius_energiegemeinschaft.api_client import (
+    VIEW_MONTH,
+    VIEW_YEAR,
+    PortalRequestError,
+    PortalUnavailableError,
+    plan_history_requests,
+)
+
+MONTHS = ["2023-01", "2023-02", "2023-03"]
+
+
+class FakeClient:
+    """Portal with one counter point; errors are scripted per (view, time)."""
+
+    def __init__(self, errors: dict | None = None) -> None:
+        self.views = {VIEW_MONTH, VIEW_YEAR}
+        self.requests: list[tuple[str, str]] = []
+        self.errors = {key: list(value) for key, value in (errors or {}).items()}
+
+    def plan_history(self, months, resolution="month"):
+        return plan_history_requests(months, resolution, self.views)
+
+    def mark_view_unsupported(self, view):
+        self.views.discard(view)
+
+    async def get_counter_points(self):
+        return [{"id": 5, "counter_number": "AT0001"}]
+
+    async def get_counter_point_energy_data(self, cp_id, view="month", time=None):
+        self.requests.append((view, time))
+        errors = self.errors.get((view, time))
+        if errors:
+            raise errors.pop(0)
+        if view == VIEW_YEAR:
+            return {"data": [{"date": f"{month}-01", "cgrid": 30.0} for month in MONTHS]}
+        return {"data": [{"date": f"{time}-01", "cgrid": 1.0}]}
+
+
+@pytest.fixture(autouse=True)
+def _no_retry_delay(monkeypatch):
+    monkeypatch.setattr(cli, "CLI_RETRY_DELAY", 0)
+
+
+async def _pull(client, tmp_path):
+    return await asyncio.wait_for(
+        cli.pull_history(
+            client, tmp_path, MONTHS, resolution="month", rate=0, communities=False
+        ),
+        timeout=5,
+    )
+
+
+def _csv_dates(tmp_path) -> list[str]:
+    with open(tmp_path / "monthly.csv", encoding="utf-8") as csv_file:
+        return [row["date"] for row in csv.DictReader(csv_file)]
+
+
+async def test_transient_year_error_is_retried(tmp_path):
+    """An outage is retried; the year view stays planned."""
+    client = FakeClient({(VIEW_YEAR, "2023"): [PortalUnavailableError("down")]})
+
+    stats = await _pull(client, tmp_path)
+
+    assert client.requests == [(VIEW_YEAR, "2023"), (VIEW_YEAR, "2023")]
+    assert VIEW_YEAR in client.views
+    assert stats.failed == 0
+    assert _csv_dates(tmp_path) == ["2023-01-01", "2023-02-01", "2023-03-01"]
+
+
+async def test_rejected_year_view_falls_back_to_month_views(tmp_path):
+    """A 404 on the year view marks it unsupported and fetches month views instead."""
+    client = FakeClient({(VIEW_YEAR, "2023"): [PortalRequestError("not found", 404)]})
+
+    stats = await _pull(client, tmp_path)
+
+    assert VIEW_YEAR not in client.views
+    assert sorted(client.requests[1:]) == [(VIEW_MONTH, month) for month in MONTHS]
+    assert stats.failed == 0
+
+
+async def test_persistent_month_error_is_counted(tmp_path):
+    """A month view failing beyond the retries is counted as failure, not retried forever."""
+    client = FakeClient({(VIEW_YEAR, "2023"): [PortalRequestError("bad", 400)]})
+    client.errors[(VIEW_MONTH, "2023-02")] = [
+        PortalRequestError("error", 500) for _ in range(cli.CLI_RETRIES + 1)
+    ]
+
+    stats = await _pull(client, tmp_path)
+
+    assert client.requests.count((VIEW_MONTH, "2023-02")) == cli.CLI_RETRIES + 1
+    assert stats.failed == 1
+    assert stats.failures == ["counter_point:5:2023-02"]
+
+
+async def test_write_error_is_counted(tmp_path, monkeypatch):
+    """A failing write is counted; the run still finishes."""
+    client = FakeClient()
+    write_json = cli._HistoryWriter._write_json
+
+    def failing_write_json(self, relative, body):
+        if relative.startswith("counter_point/"):
+            raise OSError("disk full")
+        write_json(self, relative, body)
+
+    monkeypatch.setattr(cli._HistoryWriter, "_write_json", failing_write_json)
+    stats = await _pull(client, tmp_path)
+
+    assert stats.failed == 1
+    assert stats.failures == ["counter_point:5:2023"]
+    assert _csv_dates(tmp_path) == []
+
+
+async def test_worker_crash_fails_the_run(tmp_path, monkeypatch):
+    """An unexpected error in a worker ends the run instead of hanging on the queue."""
+
+    def broken(energy_data):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(cli, "iter_daily_values", broken)
+    with pytest.raises(RuntimeError, match="bug"):
+        await cli.pull_history(
+            FakeClient(), tmp_path, MONTHS, resolution="month", rate=0, concurrency=1,
+            communities=False,
+        )
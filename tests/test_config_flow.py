@@ -0,0 +1,83 @@
+"""Tests for the options flow."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+from custom_components.fronius_energiegemeinschaft import config_flow
+from custom_components.fronius_energiegemeinschaft.config_flow import (
+    InvalidAuth,
+    OptionsFlowHandler,
+)
+from custom_components.fronius_energiegemeinschaft.const import BASE_URL, CONF_BASE_URL
+
+PROXY_URL = "http://proxy.local:8780"
+
+
+@pytest.fixture
+def validated(monkeypatch):
+    """Record validate_input calls; they fail with `error` if set."""
+    validation = SimpleNamespace(calls=[], error=None)
+
+    async def validate_input(hass, data):
+        validation.calls.append(data)
+        if validation.error is not None:
+            raise validation.error
+
+    monkeypatch.setattr(config_flow, "validate_input", validate_input)
+    return validation
+
+
+def _flow(hass, monkeypatch) -> OptionsFlowHandler:
+    entry = SimpleNamespace(
+        data={CONF_USERNAME: "me@example.com", CONF_PASSWORD: "secret"}, options={}
+    )
+    monkeypatch.setattr(OptionsFlowHandler, "config_entry", entry, raising=False)
+    flow = OptionsFlowHandler()
+    flow.hass = hass
+    flow.handler = "entry"
+    flow.flow_id = "flow"
+    return flow
+
+
+async def _user_input(flow: OptionsFlowHandler, base_url: str) -> dict:
+    form = await flow.async_step_init()
+    user_input = form["data_schema"]({})
+    user_input[CONF_BASE_URL] = base_url
+    return user_input
+
+
+async def test_unchanged_address_saves_without_login(hass, monkeypatch, validated):
+    """Changing other options does not log in again."""
+    flow = _flow(hass, monkeypatch)
+
+    result = await flow.async_step_init(await _user_input(flow, BASE_URL))
+
+    assert result["type"] == "create_entry"
+    assert validated.calls == []
+
+
+async def test_new_address_is_checked_before_saving(hass, monkeypatch, validated):
+    """A new portal address is saved only after a login through it succeeded."""
+    flow = _flow(hass, monkeypatch)
+
+    result = await flow.async_step_init(await _user_input(flow, PROXY_URL))
+
+    assert result["type"] == "create_entry"
+    assert validated.calls == [
+        {CONF_USERNAME: "me@example.com", CONF_PASSWORD: "secret", CONF_BASE_URL: PROXY_URL}
+    ]
+
+
+async def test_failing_address_shows_cannot_connect(hass, monkeypatch, validated):
+    """A failing login keeps the form open with the entered values."""
+    flow = _flow(hass, monkeypatch)
+    validated.error = InvalidAuth()
+
+    result = await flow.async_step_init(await _user_input(flow, PROXY_URL))
+
+    assert result["type"] == "form"
+    assert result["errors"] == {"base": "cannot_connect"}
+    assert result["data_schema"]({})[CONF_BASE_URL] == PROXY_URL
@@ -0,0 +1,85 @@
+"""Tests for the staggered update coordinators."""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+import pytest
+
+from custom_components.fronius_energiegemeinschaft.api_client import PortalUnavailableError
+from custom_components.fronius_energiegemeinschaft.const import COORDINATOR_JITTER
+from custom_components.fronius_energiegemeinschaft.coordinator import (
+    FroniusDataUpdateCoordinator,
+    phase_offset,
+)
+from custom_components.fronius_energiegemeinschaft.watchdog import LoopWatchdog
+
+INTERVAL = timedelta(minutes=5)
+
+
+def test_phase_offset_is_stable_and_within_interval():
+    """The offset depends on entry and resource only."""
+    offset = phase_offset("entry", "counter_points", INTERVAL)
+    assert offset == phase_offset("entry", "counter_points", INTERVAL)
+    assert offset != phase_offset("other", "counter_points", INTERVAL)
+    assert timedelta(0) <= offset < INTERVAL
+
+
+async def test_next_refresh_adds_phase_once_and_jitter(hass):
+    """Interval + phase + jitter after the first refresh, interval + jitter later."""
+    answers = [{"value": 1}, PortalUnavailableError("down"), {"value": 2}]
+
+    async def update():
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    phase = timedelta(seconds=100)
+    coordinator = FroniusDataUpdateCoordinator(
+        hass,
+        logging.getLogger(__name__),
+        LoopWatchdog(1.0),
+        resource="counter_points",
+        update_method=update,
+        update_interval=INTERVAL,
+        phase=phase,
+    )
+    jitter = INTERVAL * COORDINATOR_JITTER
+
+    await coordinator.async_refresh()
+    assert coordinator.data == {"value": 1}
+    assert INTERVAL + phase - jitter <= coordinator.update_interval <= INTERVAL + phase + jitter
+
+    # An outage keeps the data and marks it stale
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data == {"value": 1}
+    assert coordinator.stale_since is not None
+    assert INTERVAL - jitter <= coordinator.update_interval <= INTERVAL + jitter
+
+    await coordinator.async_refresh()
+    assert coordinator.data == {"value": 2}
+    assert coordinator.stale_since is None
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.parametrize("data", [None])
+async def test_outage_without_data_fails(hass, data):
+    """Without earlier data the outage fails the refresh."""
+
+    async def update():
+        raise PortalUnavailableError("down")
+
+    coordinator = FroniusDataUpdateCoordinator(
+        hass,
+        logging.getLogger(__name__),
+        LoopWatchdog(1.0),
+        resource="communities",
+        update_method=update,
+        update_interval=INTERVAL,
+    )
+    await coordinator.async_refresh()
+    assert coordinator.data is data
+    assert not coordinator.last_update_success
+    await coordinator.async_shutdown()
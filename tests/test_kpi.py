@@ -0,0 +1,115 @@
+"""Tests for the incrementally maintained KPIs."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from custom_components.fronius_energiegemeinschaft.energy_data import (
+    FLOWS,
+    EnergySeries,
+    MonthSegment,
+)
+from custom_components.fronius_energiegemeinschaft.kpi import (
+    KPI_COMMUNITY_COVERAGE,
+    KPI_SELF_SUFFICIENCY,
+    PERIOD_DAILY,
+    PERIOD_MONTH,
+    PERIOD_ROLLING,
+    ROLLING_DAYS,
+    KpiTracker,
+    kpi_value,
+)
+
+
+def _consumption(day: date) -> dict[str, float]:
+    """Return distinct flows per day so a wrongly summed day shows up."""
+    ctotal = 10.0 + day.day
+    return {"crec": day.day / 4, "cgrid": ctotal / 2, "ctotal": ctotal}
+
+
+def _history(start: date, count: int) -> dict[date, dict[str, float]]:
+    days = (start + timedelta(days=offset) for offset in range(count))
+    return {day: _consumption(day) for day in days}
+
+
+def _segment(month: str, days: dict[date, dict[str, float]]) -> MonthSegment:
+    energy_data = {
+        "data": [
+            {"date": f"{day.isoformat()}T00:00:00+01:00", **flows}
+            for day, flows in days.items()
+            if day.isoformat().startswith(month)
+        ]
+    }
+    return MonthSegment.from_energy_data(month, energy_data, "total")
+
+
+def _series(days: dict[date, dict[str, float]]) -> EnergySeries:
+    months = sorted({day.isoformat()[:7] for day in days})
+    return EnergySeries(tuple(_segment(month, days) for month in months))
+
+
+def _expected(days: dict[date, dict[str, float]], kpi: str, start: date, end: date):
+    sums = [0.0] * len(FLOWS)
+    for day, flows in days.items():
+        if start <= day <= end:
+            for i, flow in enumerate(FLOWS):
+                sums[i] += flows.get(flow, 0.0)
+    return kpi_value(kpi, sums)
+
+
+def _assert_windows(tracker: KpiTracker, days: dict[date, dict[str, float]]) -> None:
+    latest = max(days)
+    rolling_start = latest - timedelta(days=ROLLING_DAYS - 1)
+    assert tracker.window(PERIOD_ROLLING) == (rolling_start, latest)
+    assert tracker.window(PERIOD_MONTH) == (latest.replace(day=1), latest)
+    for kpi in (KPI_SELF_SUFFICIENCY, KPI_COMMUNITY_COVERAGE):
+        assert tracker.value(kpi, PERIOD_ROLLING) == _expected(days, kpi, rolling_start, latest)
+        assert tracker.value(kpi, PERIOD_MONTH) == _expected(
+            days, kpi, latest.replace(day=1), latest
+        )
+        assert tracker.value(kpi, PERIOD_DAILY) == _expected(days, kpi, latest, latest)
+
+
+def test_windows_slide_across_months():
+    """Daily growth over a month boundary matches a full recomputation every step."""
+    tracker = KpiTracker()
+    days = _history(date(2025, 1, 1), 20)
+    assert tracker.update(_series(days))
+    _assert_windows(tracker, days)
+
+    for _ in range(45):
+        day = max(days) + timedelta(days=1)
+        days[day] = _consumption(day)
+        assert tracker.update(_series(days))
+        _assert_windows(tracker, days)
+
+
+def test_revisions_and_unchanged_refreshes():
+    """A revised day inside the windows is swapped out; unchanged data reports no change."""
+    tracker = KpiTracker()
+    days = _history(date(2025, 3, 1), 40)
+    series = _series(days)
+    assert tracker.update(series)
+    assert not tracker.update(series)
+    # New views over the same segment objects are not a change either
+    assert not tracker.update(EnergySeries(series.segments))
+    # A refetched month with identical values is not a change, even with pruned days
+    assert not tracker.update(_series(days))
+
+    days[date(2025, 3, 20)] = {"crec": 0.0, "cgrid": 50.0, "ctotal": 50.0}
+    assert tracker.update(_series(days))
+    _assert_windows(tracker, days)
+
+
+def test_gap_rebuilds_windows():
+    """Data resuming after more than a window length starts fresh windows."""
+    tracker = KpiTracker()
+    days = _history(date(2025, 1, 1), 10)
+    tracker.update(_series(days))
+
+    later = _history(date(2025, 4, 1), 5)
+    days.update(later)
+    assert tracker.update(_series(days))
+    _assert_windows(tracker, days)
+    assert tracker.value(KPI_SELF_SUFFICIENCY, PERIOD_ROLLING) == _expected(
+        later, KPI_SELF_SUFFICIENCY, date(2025, 4, 1), date(2025, 4, 5)
+    )
@@ -0,0 +1,257 @@
+"""Tests for the quarter-hour load profiles."""
+from __future__ import annotations
+
+import asyncio
+import math
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.fronius_energiegemeinschaft import api_client
+from custom_components.fronius_energiegemeinschaft import load_profile as load_profile_module
+from custom_components.fronius_energiegemeinschaft.api_client import (
+    PRIORITY_SWEEP,
+    PortalRequestError,
+    PortalUnavailableError,
+)
+from custom_components.fronius_energiegemeinschaft.const import LOAD_PROFILE_RETRY
+from custom_components.fronius_energiegemeinschaft.load_profile import (
+    LoadProfileBuffer,
+    LoadProfileManager,
+    expected_slots,
+    parse_day_view,
+)
+
+VIENNA = ZoneInfo("Europe/Vienna")
+TODAY = date(2025, 1, 20)
+
+
+def _day_view(day: str, slots: range, value: float = 0.25) -> dict:
+    """Return a day view with UTC timestamps for the given local slots."""
+    midnight = datetime.combine(date.fromisoformat(day), datetime.min.time(), VIENNA)
+    return {
+        "data": [
+            {
+                "date": (midnight + timedelta(minutes=15 * slot))
+                .astimezone(timezone.utc)
+                .strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "cgrid": {"value": value},
+            }
+            for slot in slots
+        ]
+    }
+
+
+def test_parse_day_view_converts_utc_to_local_slots():
+    """UTC timestamps land in local slots; entries of other local days are dropped."""
+    view = _day_view("2025-01-15", range(96))
+    view["data"].append({"date": "2025-01-15T23:00:00Z", "cgrid": 9.0})  # 00:00 next day
+
+    slots = parse_day_view(view, "2025-01-15", VIENNA)
+
+    assert view["data"][0]["date"] == "2025-01-14T23:00:00Z"
+    assert slots["cgrid"] == [0.25] * 96
+    assert all(math.isnan(value) for value in slots["crec"])
+
+
+def test_expected_slots_on_dst_days():
+    """Spring-forward has 92 quarter hours; fall-back sums into 96 slots."""
+    assert expected_slots("2025-03-30", VIENNA) == 92
+    assert expected_slots("2025-10-26", VIENNA) == 96
+    assert expected_slots("2025-01-15", VIENNA) == 96
+
+
+def test_buffer_export_round_trip():
+    """A restored buffer holds the same days and values."""
+    buffer = LoadProfileBuffer(3)
+    for offset in range(4):
+        buffer.append_day(f"2025-01-0{offset + 1}", {"cgrid": [float(offset)] * 96})
+
+    restored = LoadProfileBuffer.from_export(buffer.export(), 3)
+
+    assert restored.days() == ["2025-01-02", "2025-01-03", "2025-01-04"]
+    assert restored.get_day("2025-01-04", "cgrid") == [3.0] * 96
+    assert restored.peak("cgrid") == ("2025-01-04", 0, 3.0)
+
+
+class FakeClient:
+    """Portal publishing complete days up to `published` and part of the next day."""
+
+    def __init__(self) -> None:
+        self.published = TODAY - timedelta(days=2)
+        self.partial_slots = 40
+        self.requests: list[tuple[int, str]] = []
+        self.running = 0
+        self.max_running = 0
+        self.priorities: set[int] = set()
+        # day -> exception raised instead of answering
+        self.errors: dict[str, Exception] = {}
+
+    async def get_counter_point_energy_data(self, cp_id, view="month", time=None):
+        self.requests.append((cp_id, time))
+        self.priorities.add(api_client._REQUEST_PRIORITY.get())
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0)
+        self.running -= 1
+        if time in self.errors:
+            raise self.errors[time]
+        day = date.fromisoformat(time)
+        if day <= self.published:
+            return _day_view(time, range(96))
+        if day == self.published + timedelta(days=1):
+            return _day_view(time, range(self.partial_slots))
+        return {"data": []}
+
+
+class FakeStore:
+    """In-memory stand-in for a Home Assistant Store."""
+
+    def __init__(self) -> None:
+        self.data = None
+        self.delayed = None
+
+    async def async_load(self):
+        return self.data
+
+    async def async_save(self, data):
+        self.data = data
+        self.delayed = None
+
+    def async_delay_save(self, data_func, delay=0):
+        self.delayed = data_func
+
+
+class FrozenDatetime(datetime):
+    """datetime whose now() is noon of TODAY."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.combine(TODAY, datetime.min.time().replace(hour=12), tz)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(load_profile_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+async def test_manager_fetches_window_concurrently(clock):
+    """All missing days of all counter points are requested at once."""
+    client = FakeClient()
+    manager = LoadProfileManager(client, VIENNA, capacity_days=7)
+
+    new_days = await manager.async_update([1, 2], TODAY)
+
+    assert len(client.requests) == 14
+    assert client.max_running == 14
+    # Five complete days and the partial day after them
+    assert sorted({day for _, day, _ in new_days}) == [
+        (TODAY - timedelta(days=offset)).isoformat() for offset in range(6, 0, -1)
+    ]
+    assert manager.buffers[1].days()[-1] == (TODAY - timedelta(days=1)).isoformat()
+
+
+async def test_manager_refetches_recent_incomplete_days(clock):
+    """Partial recent days are fetched again until complete; complete days are kept."""
+    client = FakeClient()
+    manager = LoadProfileManager(client, VIENNA, capacity_days=7)
+    await manager.async_update([1], TODAY)
+    yesterday = (TODAY - timedelta(days=1)).isoformat()
+
+    client.requests.clear()
+    assert await manager.async_update([1], TODAY) == []
+    assert client.requests == []
+
+    clock[0] += LOAD_PROFILE_RETRY
+    client.published = TODAY - timedelta(days=1)
+    new_days = await manager.async_update([1], TODAY)
+    assert sorted(day for _, day in client.requests) == [yesterday, TODAY.isoformat()]
+    assert sorted(day for _, day, _ in new_days) == [yesterday, TODAY.isoformat()]
+    assert manager.buffers[1].get_day(yesterday, "cgrid") == [0.25] * 96
+
+    clock[0] += LOAD_PROFILE_RETRY
+    client.requests.clear()
+    await manager.async_update([1], TODAY)
+    assert client.requests == [(1, TODAY.isoformat())]
+
+
+async def test_manager_persists_buffers(clock):
+    """Buffers are saved after new days and restored on load."""
+    store = FakeStore()
+    client = FakeClient()
+    manager = LoadProfileManager(client, VIENNA, store, capacity_days=7)
+    await manager.async_update([1], TODAY)
+    assert store.delayed is not None
+    # Unload writes the delayed save right away
+    await manager.async_stop()
+    assert store.delayed is None
+
+    restored = LoadProfileManager(FakeClient(), VIENNA, store, capacity_days=7)
+    await restored.async_load()
+
+    assert len(restored.buffers[1]) == 6
+    assert restored.buffers[1].peak("cgrid") == (
+        (TODAY - timedelta(days=6)).isoformat(),
+        0,
+        0.25,
+    )
+
+
+async def test_outage_stops_the_round_without_retry_delay(clock):
+    """Outages propagate; fetched days are kept and returned by the next round."""
+    client = FakeClient()
+    manager = LoadProfileManager(client, VIENNA, capacity_days=7)
+    outage_day = (TODAY - timedelta(days=3)).isoformat()
+    client.errors[outage_day] = PortalUnavailableError("down")
+
+    with pytest.raises(PortalUnavailableError):
+        await manager.async_update([1], TODAY)
+    assert outage_day not in manager.buffers[1]
+    assert len(manager.buffers[1]) == 5
+
+    # The outage day is due again right away, the others are not
+    del client.errors[outage_day]
+    client.requests.clear()
+    new_days = await manager.async_update([1], TODAY)
+    assert client.requests == [(1, outage_day)]
+    assert len(new_days) == 6
+
+
+async def test_rejected_day_waits_for_retry(clock):
+    """A rejected request is retried after LOAD_PROFILE_RETRY, not on every round."""
+    client = FakeClient()
+    manager = LoadProfileManager(client, VIENNA, capacity_days=7)
+    rejected = (TODAY - timedelta(days=3)).isoformat()
+    client.errors[rejected] = PortalRequestError("Request failed: 500", 500)
+
+    await manager.async_update([1], TODAY)
+    client.requests.clear()
+    await manager.async_update([1], TODAY)
+    assert (1, rejected) not in client.requests
+
+    clock[0] += LOAD_PROFILE_RETRY
+    await manager.async_update([1], TODAY)
+    assert (1, rejected) in client.requests
+
+
+async def test_background_update_at_sweep_priority(hass, clock, monkeypatch):
+    """async_start fetches in a background task and reports the stored days."""
+    monkeypatch.setattr(load_profile_module, "datetime", FrozenDatetime)
+    client = FakeClient()
+    manager = LoadProfileManager(client, VIENNA, FakeStore(), capacity_days=7)
+    reported = []
+
+    async def on_new_days(new_days):
+        reported.extend(new_days)
+
+    manager.async_start(hass, [1], on_new_days)
+    # A second start while the first runs is ignored
+    manager.async_start(hass, [1], on_new_days)
+    await manager._task
+
+    assert client.priorities == {PRIORITY_SWEEP}
+    assert len(client.requests) == 7
+    assert len(reported) == 6
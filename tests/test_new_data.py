@@ -0,0 +1,38 @@
+"""Tests for the new data events."""
+from __future__ import annotations
+
+from custom_components.fronius_energiegemeinschaft.energy_data import (
+    EnergySeries,
+    MonthSegment,
+)
+from custom_components.fronius_energiegemeinschaft.new_data import NewDataNotifier
+
+PRICING = {
+    "grid_consumption": 0.3,
+    "community_consumption": 0.2,
+    "grid_feed_in": 0.1,
+    "community_feed_in": 0.1,
+}
+
+
+def _counter_points(days: list[str]) -> dict:
+    energy_data = {"data": [{"date": f"{day}T00:00:00+01:00", "cgrid": 1.0} for day in days]}
+    segment = MonthSegment.from_energy_data("2025-02", energy_data, "total")
+    return {7: {"energy": EnergySeries((segment,)), "info": {"counter_number": "AT07"}}}
+
+
+async def test_newest_day_survives_unload(hass):
+    """async_save writes the newest announced day, so no day is announced twice."""
+    notifier = NewDataNotifier(hass, "entry", PRICING)
+    await notifier.async_load()
+    notifier.update("counter_points", _counter_points(["2025-02-01", "2025-02-02"]))
+    await notifier.async_save()
+
+    restored = NewDataNotifier(hass, "entry", PRICING)
+    await restored.async_load()
+    restored.update("counter_points", _counter_points(["2025-02-01", "2025-02-02", "2025-02-03"]))
+
+    # Home Assistant is not started in the test, so the events wait for it
+    assert [(event["date"], event["change"]) for event in restored._pending] == [
+        ("2025-02-03", "new")
+    ]
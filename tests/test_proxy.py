@@ -0,0 +1,130 @@
+"""Tests for the caching proxy."""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from custom_components.fronius_energiegemeinschaft import proxy as proxy_module
+from custom_components.fronius_energiegemeinschaft.api_client import (
+    FroniusEnergyClient,
+    PortalUnavailableError,
+)
+from custom_components.fronius_energiegemeinschaft.const import (
+    PROXY_TTL_CLOSED,
+    PROXY_TTL_CURRENT,
+    PROXY_TTL_LIST,
+    PROXY_TTL_SETTLING,
+)
+from custom_components.fronius_energiegemeinschaft.proxy import CachingProxy, cache_ttl
+
+TODAY = date(2026, 3, 15)
+
+
+class Clock:
+    """Monotonic clock the test advances by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(proxy_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def proxy():
+    return CachingProxy(FroniusEnergyClient("user@example.com", "portal"), "proxy", max_entries=2)
+
+
+@pytest.mark.parametrize(
+    ("params", "ttl"),
+    [
+        ({}, PROXY_TTL_LIST),
+        ({"view": "month"}, PROXY_TTL_CURRENT),
+        ({"view": "month", "time": "2026-03"}, PROXY_TTL_CURRENT),
+        ({"view": "day", "time": "2026-03-13"}, PROXY_TTL_CURRENT),
+        ({"view": "day", "time": "2026-03-12"}, PROXY_TTL_SETTLING),
+        ({"view": "month", "time": "2026-02"}, PROXY_TTL_SETTLING),
+        ({"view": "month", "time": "2026-01"}, PROXY_TTL_CLOSED),
+        ({"view": "year", "time": "2025"}, PROXY_TTL_CLOSED),
+        ({"view": "year", "time": "2026"}, PROXY_TTL_CURRENT),
+        ({"view": "month", "time": "garbage"}, PROXY_TTL_CURRENT),
+    ],
+)
+def test_cache_ttl_by_period_age(params, ttl):
+    """The older the period, the longer its response is cached."""
+    assert cache_ttl(params, TODAY) == ttl
+
+
+async def test_fetch_caches_until_expiry(proxy, clock):
+    """Hits are served from cache, an expired entry is loaded again."""
+    calls = []
+
+    async def loader():
+        calls.append(clock.now)
+        return {"call": len(calls)}
+
+    assert await proxy.fetch("/list", {}, loader) == b'{"call": 1}'
+    clock.now += PROXY_TTL_LIST - 1
+    assert await proxy.fetch("/list", {}, loader) == b'{"call": 1}'
+    clock.now += 2
+    assert await proxy.fetch("/list", {}, loader) == b'{"call": 2}'
+    assert (proxy.hits, proxy.misses) == (1, 2)
+
+
+async def test_fetch_serves_stale_while_portal_unavailable(proxy, clock):
+    """An expired body replaces the error while the breaker is open."""
+
+    async def loader():
+        return [1]
+
+    async def unavailable():
+        raise PortalUnavailableError("circuit open")
+
+    await proxy.fetch("/list", {}, loader)
+    clock.now += PROXY_TTL_LIST + 1
+    assert await proxy.fetch("/list", {}, unavailable) == b"[1]"
+    assert proxy.stale == 1
+    with pytest.raises(PortalUnavailableError):
+        await proxy.fetch("/other", {}, unavailable)
+
+
+async def test_fetch_evicts_least_recently_used(proxy, clock):
+    """At most max_entries responses are kept."""
+
+    async def loader():
+        return {}
+
+    for path in ("/a", "/b", "/a", "/c"):
+        await proxy.fetch(path, {}, loader)
+    assert proxy.status()["entries"] == 2
+    await proxy.fetch("/a", {}, loader)
+    await proxy.fetch("/b", {}, loader)
+    assert (proxy.hits, proxy.misses) == (2, 4)
+
+
+def test_sessions_expire_and_are_capped(clock):
+    """Tokens expire after the session TTL and the oldest go beyond the cap."""
+    proxy = CachingProxy(
+        FroniusEnergyClient("user@example.com", "portal"), "proxy", max_sessions=2, session_ttl=60
+    )
+    assert proxy.check_login("user@example.com", "proxy")
+    assert not proxy.check_login("user@example.com", "portal")
+
+    first, second = proxy.open_session(), proxy.open_session()
+    third = proxy.open_session()
+    assert not proxy.has_session(first)
+    assert proxy.has_session(second) and proxy.has_session(third)
+    assert not proxy.has_session(None)
+
+    clock.now += 61
+    assert not proxy.has_session(third)
+    proxy.open_session()
+    assert proxy.status()["sessions"] == 1
@@ -0,0 +1,76 @@
+"""Tests for the sensor base behaviour."""
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from custom_components.fronius_energiegemeinschaft.sensor import SkipUnchangedMixin
+
+
+class Base:
+    """Stand-in for CoordinatorEntity: counts state writes."""
+
+    available = True
+
+    def __init__(self, coordinator) -> None:
+        self.coordinator = coordinator
+        self.writes = 0
+
+    def async_write_ha_state(self) -> None:
+        self.writes += 1
+
+
+class DefaultEntity(SkipUnchangedMixin, Base):
+    """Entity relying on the mixin defaults."""
+
+
+class SeriesEntity(SkipUnchangedMixin, Base):
+    """Entity whose state depends on one series object."""
+
+    def _fingerprint(self) -> tuple:
+        return (self.coordinator.data["series"], round(self.coordinator.data["value"], 2))
+
+    def _state_attributes(self) -> dict:
+        return {"value": self.coordinator.data["value"]}
+
+
+def _coordinator(data) -> SimpleNamespace:
+    return SimpleNamespace(data=data, stale_since=None)
+
+
+def test_state_written_only_when_fingerprint_changes():
+    """Identical objects and equal values skip the write; stale_since forces one."""
+    series = object()
+    coordinator = _coordinator({"series": series, "value": 1.0})
+    entity = SeriesEntity(coordinator)
+    entity._written_fingerprint = entity._full_fingerprint()
+
+    coordinator.data = {"series": series, "value": 1.001}
+    entity._handle_coordinator_update()
+    assert entity.writes == 0
+
+    coordinator.data = {"series": object(), "value": 1.0}
+    entity._handle_coordinator_update()
+    assert entity.writes == 1
+
+    coordinator.stale_since = datetime(2025, 1, 1, 12, 0)
+    entity._handle_coordinator_update()
+    assert entity.writes == 2
+    assert entity.extra_state_attributes == {
+        "value": 1.0,
+        "stale_since": "2025-01-01T12:00:00",
+    }
+
+
+def test_defaults_write_every_refresh():
+    """Without overrides every new coordinator data object is written."""
+    coordinator = _coordinator({})
+    entity = DefaultEntity(coordinator)
+    entity._written_fingerprint = entity._full_fingerprint()
+
+    entity._handle_coordinator_update()
+    assert entity.writes == 0
+    coordinator.data = {}
+    entity._handle_coordinator_update()
+    assert entity.writes == 1
+    assert entity.extra_state_attributes == {}
@@ -0,0 +1,96 @@
+"""Tests for the tariff comparison."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from custom_components.fronius_energiegemeinschaft.archive import ArchiveManager
+from custom_components.fronius_energiegemeinschaft.const import LOAD_PROFILE_SLOTS
+from custom_components.fronius_energiegemeinschaft.energy_data import FLOWS
+from custom_components.fronius_energiegemeinschaft.tariffs import (
+    archive_coverage,
+    compare_tariffs,
+)
+
+CURRENT = {
+    "grid_consumption": 0.3,
+    "community_consumption": 0.2,
+    "grid_feed_in": 0.1,
+    "community_feed_in": 0.1,
+}
+DAY = {"crec": 2.0, "cgrid": 10.0, "frec": 2.0, "fgrid": 4.0}
+
+
+def _days(start: date, count: int) -> list[date]:
+    return [start + timedelta(days=offset) for offset in range(count)]
+
+
+def _store_days(archive: ArchiveManager, cp_id: int, days: list[date], values=DAY) -> None:
+    archive.daily("counter_point", cp_id).upsert(
+        (day, [values.get(flow, float("nan")) for flow in FLOWS]) for day in days
+    )
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ArchiveManager(tmp_path)
+
+
+def test_compare_tariffs_prices_every_scenario(archive):
+    """Costs are consumption minus feed-in revenue, grouped by month."""
+    _store_days(archive, 1, _days(date(2025, 1, 1), 59))
+    scenarios = {
+        "current": CURRENT,
+        "cheap community": {**CURRENT, "community_consumption": 0.1},
+    }
+
+    result = compare_tariffs(archive, [1], scenarios, date(2025, 1, 1), date(2025, 2, 28))
+
+    # 10 * 0.3 + 2 * 0.2 - 4 * 0.1 - 2 * 0.1 = 2.8 per day
+    assert result["scenarios"]["current"]["monthly_costs"] == {"2025-01": 86.8, "2025-02": 78.4}
+    assert result["scenarios"]["current"]["total"] == 165.2
+    assert result["scenarios"]["cheap community"]["total"] == pytest.approx(165.2 - 59 * 0.2)
+    assert result["counter_points"] == {1: {"current": 165.2, "cheap community": 153.4}}
+    assert result["days"] == 59
+    assert result["time_of_use_days"] == 0
+
+
+def test_compare_tariffs_prices_time_of_use_per_quarter_hour(tmp_path):
+    """Days with archived quarter hours use the time-of-use windows."""
+    archive = ArchiveManager(tmp_path, quarter_hour=True)
+    day = date(2025, 1, 6)
+    _store_days(archive, 1, [day, day + timedelta(days=1)])
+    # All grid consumption of the first day falls into the night window
+    slots = {flow: [0.0] * LOAD_PROFILE_SLOTS for flow in FLOWS}
+    slots["cgrid"][4] = 10.0
+    archive.store_quarter_hours(1, day.isoformat(), slots)
+    night = {
+        **CURRENT,
+        "time_of_use": [{"start": "22:00", "end": "06:00", "grid_consumption": 0.1}],
+    }
+
+    result = compare_tariffs(
+        archive, [1], {"current": CURRENT, "night": night}, day, day + timedelta(days=1)
+    )
+
+    assert result["time_of_use_days"] == 1
+    # Day one: 10 kWh at 0.1 €, no other flows in the slots; day two at base prices
+    assert result["scenarios"]["night"]["total"] == pytest.approx(1.0 + 2.8)
+    assert result["scenarios"]["current"]["total"] == pytest.approx(2 * 2.8)
+
+
+def test_archive_coverage_reports_gaps(archive):
+    """A day is covered only if every counter point has it."""
+    _store_days(archive, 1, _days(date(2025, 1, 1), 31))
+    _store_days(archive, 2, _days(date(2025, 1, 1), 9) + _days(date(2025, 1, 13), 10))
+
+    coverage = archive_coverage(archive, [1, 2], date(2025, 1, 1), date(2025, 2, 2))
+
+    assert coverage == {
+        "days_requested": 33,
+        "days_covered": 19,
+        "missing_days": 14,
+        "missing_ranges": [["2025-01-10", "2025-01-12"], ["2025-01-23", "2025-02-02"]],
+    }
+    assert archive_coverage(archive, [3], date(2025, 1, 1), date(2025, 1, 1))["days_covered"] == 0
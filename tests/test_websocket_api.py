@@ -0,0 +1,91 @@
+"""Tests for the delta-encoded series subscription."""
+from __future__ import annotations
+
+from custom_components.fronius_energiegemeinschaft.energy_data import (
+    EnergySeries,
+    MonthSegment,
+)
+from custom_components.fronius_energiegemeinschaft.websocket_api import SeriesDiffer
+
+FLOWS = ("crec", "cgrid")
+PRICING = {
+    "grid_consumption": 0.3,
+    "community_consumption": 0.2,
+    "grid_feed_in": 0.1,
+    "community_feed_in": 0.1,
+}
+
+
+def _segment(month: str, days: dict[str, tuple[float, float]]) -> MonthSegment:
+    entries = [
+        {"date": f"{day}T00:00:00+01:00", "crec": crec, "cgrid": cgrid}
+        for day, (crec, cgrid) in days.items()
+    ]
+    return MonthSegment.from_energy_data(month, {"data": entries}, "total")
+
+
+JANUARY = _segment("2025-01", {"2025-01-30": (1.0, 2.0), "2025-01-31": (1.0, 3.0)})
+FEBRUARY = _segment("2025-02", {"2025-02-01": (2.0, 4.0)})
+
+
+def test_snapshot_then_changed_days_only():
+    """Deltas carry appended and revised days of changed segments, None without change."""
+    differ = SeriesDiffer(FLOWS, None)
+    snapshot = differ.snapshot(EnergySeries((JANUARY, FEBRUARY)))
+    assert snapshot["columns"] == ["crec", "cgrid"]
+    assert snapshot["days"] == {
+        "2025-01-30": [1.0, 2.0],
+        "2025-01-31": [1.0, 3.0],
+        "2025-02-01": [2.0, 4.0],
+    }
+
+    # A new view over the same segments is not a change
+    assert differ.delta(EnergySeries((JANUARY, FEBRUARY))) is None
+
+    # A refetched month with one revised and one appended day
+    february = _segment("2025-02", {"2025-02-01": (2.0, 4.5), "2025-02-02": (0.0, 1.0)})
+    assert differ.delta(EnergySeries((JANUARY, february))) == {
+        "type": "delta",
+        "upsert": {"2025-02-01": [2.0, 4.5], "2025-02-02": [0.0, 1.0]},
+        "remove": [],
+    }
+
+    # A refetched month with identical values sends nothing
+    january = _segment("2025-01", {"2025-01-30": (1.0, 2.0), "2025-01-31": (1.0, 3.0)})
+    assert differ.delta(EnergySeries((january, february))) is None
+
+    # A month leaving the window removes its days
+    assert differ.delta(EnergySeries((february,))) == {
+        "type": "delta",
+        "upsert": {},
+        "remove": ["2025-01-30", "2025-01-31"],
+    }
+    assert differ.delta(None) == {
+        "type": "delta",
+        "upsert": {},
+        "remove": ["2025-02-01", "2025-02-02"],
+    }
+    assert differ.delta(None) is None
+
+
+def test_unchanged_newer_segment_wins_on_overlap():
+    """A revised older segment does not override a day the newer segment reports."""
+    differ = SeriesDiffer(FLOWS, None)
+    overlap = _segment("2025-02", {"2025-01-31": (9.0, 9.0), "2025-02-01": (2.0, 4.0)})
+    differ.snapshot(EnergySeries((JANUARY, overlap)))
+
+    january = _segment("2025-01", {"2025-01-30": (1.0, 2.5), "2025-01-31": (5.0, 5.0)})
+    assert differ.delta(EnergySeries((january, overlap))) == {
+        "type": "delta",
+        "upsert": {"2025-01-30": [1.0, 2.5]},
+        "remove": [],
+    }
+
+
+def test_cost_column_with_pricing():
+    """With pricing each row ends with the net cost of the day."""
+    differ = SeriesDiffer(FLOWS, PRICING)
+    snapshot = differ.snapshot(EnergySeries((FEBRUARY,)))
+    assert snapshot["columns"] == ["crec", "cgrid", "cost"]
+    assert snapshot["days"] == {"2025-02-01": [2.0, 4.0, 1.6]}
+    assert differ.snapshot(None)["days"] == {}